@@ -1,10 +1,19 @@
-import random
-import time
 from typing import Any
 
 import requests
 
+from backend.py.collectors.facets import crawl_facet_partitions
+from backend.py.collectors.http import RetryPolicy, configure_session, request_with_retry
+from backend.py.collectors.incremental import crawl_incremental
+from backend.py.collectors.pagination import DEFAULT_WORKERS, fetch_offset_sharded
+
 SEARCH_URL = "https://www.amazon.jobs/api/jobs/search"
+SESSION_NAME = "amazon"
+JOB_DETAILS_URL = "https://www.amazon.jobs/en/jobs/{job_key}"
+# The search API refuses to page past item number 10,000.
+MAX_START = 10000
+# Facets the search API reports counts for; used to split queries that exceed MAX_START.
+SPLIT_FACETS = ("normalizedCountryCode", "normalizedStateName", "normalizedCityName", "jobCategory")
 SEARCH_KEY = "PbxxNwIlTi4FP5oijKdtk3IrBF5CLd4R4oPHsKNh"
 
 DEFAULT_HEADERS = {
@@ -19,47 +28,7 @@ DEFAULT_HEADERS = {
     "x-api-key": SEARCH_KEY,
 }
 
-
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    params: dict | None = None,
-    json: dict | None = None,
-    headers: dict | None = None,
-    timeout: int = 25,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.request(
-                method,
-                url,
-                params=params,
-                json=json,
-                headers=h,
-                timeout=timeout,
-            )
-            if resp.status_code in (429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-                time.sleep(min(30.0, wait))
-                continue
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-            time.sleep(min(30.0, wait))
-
-    raise RuntimeError("unreachable")
+configure_session(SESSION_NAME, headers=DEFAULT_HEADERS, policy=RetryPolicy())
 
 
 def _first(v: Any) -> Any:
@@ -93,22 +62,59 @@ def _normalize_job(hit: dict[str, Any]) -> dict:
     }
 
 
-def fetch_amazon_jobs_page(size: int = 100, start: int = 0) -> tuple[int, int, list[dict]]:
+def _search_amazon(size: int, start: int, sort: str | None = None, filters: dict | None = None) -> dict | None:
     body = {
         "locale": "en-US",
         "start": start,
         "size": size,
     }
+    if sort:
+        body["sort"] = sort
+    if filters:
+        body["filters"] = [{"field": k, "values": list(v)} for k, v in filters.items()]
     try:
-        resp = request_with_retry("POST", SEARCH_URL, json=body)
+        resp = request_with_retry(SESSION_NAME, "POST", SEARCH_URL, json=body, hedge=True)
     except requests.HTTPError as e:
         text = ""
         if e.response is not None and isinstance(e.response.text, str):
             text = e.response.text
         if e.response is not None and e.response.status_code == 400 and "item number 10,000" in text:
-            return 10000, start, []
+            return None
         raise
     payload = resp.json()
+    return payload if isinstance(payload, dict) else {}
+
+
+def _facet_counts(payload: dict | None) -> dict[str, list[tuple[str, int]]]:
+    """Accept both {"field": [{"value": v, "count": n}, ...]} and {"field": {v: n}} facet shapes."""
+    facets = payload.get("facets") if isinstance(payload, dict) else None
+    out: dict[str, list[tuple[str, int]]] = {}
+    if not isinstance(facets, dict):
+        return out
+    for field, values in facets.items():
+        pairs: list[tuple[str, int]] = []
+        if isinstance(values, dict):
+            pairs = [(str(k), int(v or 0)) for k, v in values.items() if isinstance(v, (int, float))]
+        elif isinstance(values, list):
+            for v in values:
+                if isinstance(v, dict):
+                    value = v.get("value", v.get("key"))
+                    if value is not None:
+                        pairs.append((str(value), int(v.get("count") or 0)))
+        if pairs:
+            out[field] = pairs
+    return out
+
+
+def fetch_amazon_jobs_page(
+    size: int = 100,
+    start: int = 0,
+    sort: str | None = None,
+    filters: dict | None = None,
+) -> tuple[int, int, list[dict]]:
+    payload = _search_amazon(size=size, start=start, sort=sort, filters=filters)
+    if payload is None:
+        return MAX_START, start, []
     total = int(payload.get("found", 0) or 0)
     current_start = int(payload.get("start", start) or 0)
     hits = payload.get("searchHits", [])
@@ -117,32 +123,45 @@ def fetch_amazon_jobs_page(size: int = 100, start: int = 0) -> tuple[int, int, l
     return total, current_start, hits
 
 
-def fetch_all_amazon_jobs(size: int = 100, max_pages: int = 500) -> tuple[int, list[dict]]:
-    all_jobs: list[dict] = []
-    total_hint = 0
-    start = 0
-
-    for _ in range(max_pages):
-        if start >= 10000:
-            break
-        total, current_start, hits = fetch_amazon_jobs_page(size=size, start=start)
-        total_hint = max(total_hint, total)
-
-        if not hits:
-            break
-
-        for hit in hits:
-            if not isinstance(hit, dict):
-                continue
-            all_jobs.append(_normalize_job(hit))
-
-        start = current_start + len(hits)
-        if total_hint and start >= total_hint:
-            break
-        if len(hits) < size:
-            break
-
-        time.sleep(random.uniform(0.08, 0.2))
+def fetch_all_amazon_jobs(
+    size: int = 100,
+    max_pages: int = 500,
+    workers: int = DEFAULT_WORKERS,
+    stats: dict | None = None,
+) -> tuple[int, list[dict]]:
+    def probe(applied: dict) -> tuple[int, list[dict], dict]:
+        payload = _search_amazon(size=size, start=0, filters=applied)
+        if payload is None:
+            return 0, [], {}
+        hits = payload.get("searchHits", [])
+        jobs = [_normalize_job(h) for h in hits if isinstance(h, dict)] if isinstance(hits, list) else []
+        return int(payload.get("found", 0) or 0), jobs, _facet_counts(payload)
+
+    def crawl(applied: dict, first: tuple[int, list[dict]]) -> tuple[int, list[dict], dict]:
+        def fetch_page(start: int, page_size: int) -> tuple[int, list[dict]]:
+            total, _, hits = fetch_amazon_jobs_page(size=page_size, start=start, filters=applied)
+            return total, [_normalize_job(h) for h in hits if isinstance(h, dict)]
+
+        return fetch_offset_sharded(
+            fetch_page,
+            limit=size,
+            key_fn=lambda j: j.get("job_key"),
+            first_page=first,
+            workers=workers if not applied else max(1, workers // 2),
+            max_offset=min(MAX_START, size * max_pages),
+        )
+
+    # Queries over MAX_START are split by facet until every partition is reachable.
+    total_hint, all_jobs, part_stats = crawl_facet_partitions(
+        probe,
+        crawl,
+        cap=MAX_START,
+        key_fn=lambda j: j.get("job_key"),
+        split_order=SPLIT_FACETS,
+        workers=workers,
+    )
+    if stats is not None:
+        stats.update(part_stats)
 
     seen = set()
     uniq = []
@@ -154,3 +173,30 @@ def fetch_all_amazon_jobs(size: int = 100, max_pages: int = 500) -> tuple[int, l
         uniq.append(j)
 
     return total_hint or len(uniq), uniq
+
+
+def amazon_job_exists(job_key: str) -> bool:
+    try:
+        request_with_retry(SESSION_NAME, "HEAD", JOB_DETAILS_URL.format(job_key=job_key), max_retries=2)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code in (404, 410):
+            return False
+        raise
+    return True
+
+
+def fetch_incremental_amazon_jobs(
+    known: dict[str, dict],
+    size: int = 100,
+    max_pages: int = 100,
+) -> tuple[int, list[dict], dict]:
+    """Newest-first crawl that stops at previously seen postings; see crawl_incremental."""
+
+    def fetch_page(idx: int) -> tuple[int, list[dict]]:
+        start = idx * size
+        if start >= MAX_START:
+            return 0, []
+        total, _, hits = fetch_amazon_jobs_page(size=size, start=start, sort="recent")
+        return total, [_normalize_job(h) for h in hits if isinstance(h, dict)]
+
+    return crawl_incremental(fetch_page, known, exists=amazon_job_exists, max_pages=max_pages)
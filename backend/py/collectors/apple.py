@@ -1,10 +1,13 @@
-import random
-import time
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 import requests
 
+from backend.py.collectors.http import RetryPolicy, configure_session, request_with_retry
+from backend.py.collectors.incremental import crawl_incremental
+
 SEARCH_URL = "https://jobs.apple.com/api/v1/search"
+SESSION_NAME = "apple"
+JOB_DETAILS_URL = "https://jobs.apple.com/en-us/details/{job_key}"
 
 DEFAULT_HEADERS = {
     "Accept": "application/json",
@@ -17,47 +20,7 @@ DEFAULT_HEADERS = {
     "Referer": "https://jobs.apple.com/en-us/search",
 }
 
-
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    params: dict | None = None,
-    json: dict | None = None,
-    headers: dict | None = None,
-    timeout: int = 25,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.request(
-                method,
-                url,
-                params=params,
-                json=json,
-                headers=h,
-                timeout=timeout,
-            )
-            if resp.status_code in (429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-                time.sleep(min(30.0, wait))
-                continue
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-            time.sleep(min(30.0, wait))
-
-    raise RuntimeError("unreachable")
+configure_session(SESSION_NAME, headers=DEFAULT_HEADERS, policy=RetryPolicy())
 
 
 def _normalize_location(loc: dict[str, Any]) -> str | None:
@@ -123,7 +86,7 @@ def fetch_apple_jobs_page(page: int = 1) -> tuple[int, list[dict]]:
             "mediumDate": "MMM D, YYYY",
         },
     }
-    resp = request_with_retry("POST", SEARCH_URL, json=body)
+    resp = request_with_retry(SESSION_NAME, "POST", SEARCH_URL, json=body, hedge=True)
     payload = resp.json()
     res = payload.get("res", {}) if isinstance(payload, dict) else {}
     total = int(res.get("totalRecords", 0) or 0)
@@ -133,13 +96,26 @@ def fetch_apple_jobs_page(page: int = 1) -> tuple[int, list[dict]]:
     return total, items
 
 
-def fetch_all_apple_jobs(max_pages: int = 500) -> tuple[int, list[dict]]:
-    all_jobs: list[dict] = []
+def iter_apple_jobs(
+    max_pages: int = 500,
+    stats: dict | None = None,
+    start_page: int = 1,
+    seen: Iterable[str] = (),
+) -> Iterator[dict]:
+    """
+    Yield unique postings page by page; stats["total"] tracks the reported total and
+    stats["cursor"] the page being yielded. Job keys in `seen` are not yielded again.
+    """
+    stats = stats if stats is not None else {}
     total_hint = 0
+    n_items = 0
+    seen = set(seen)
 
-    for page in range(1, max_pages + 1):
+    for page in range(max(1, start_page), max_pages + 1):
+        stats["cursor"] = page
         total, items = fetch_apple_jobs_page(page=page)
         total_hint = max(total_hint, total)
+        stats["total"] = total_hint or len(seen)
 
         if not items:
             break
@@ -147,20 +123,40 @@ def fetch_all_apple_jobs(max_pages: int = 500) -> tuple[int, list[dict]]:
         for item in items:
             if not isinstance(item, dict):
                 continue
-            all_jobs.append(_normalize_job(item))
+            n_items += 1
+            job = _normalize_job(item)
+            k = job.get("job_key")
+            if not k or k in seen:
+                continue
+            seen.add(k)
+            yield job
 
-        if total_hint and len(all_jobs) >= total_hint:
+        if total_hint and n_items >= total_hint:
             break
+    stats["total"] = total_hint or len(seen)
 
-        time.sleep(random.uniform(0.08, 0.2))
 
-    seen = set()
-    uniq = []
-    for j in all_jobs:
-        k = j.get("job_key")
-        if not k or k in seen:
-            continue
-        seen.add(k)
-        uniq.append(j)
-
-    return total_hint or len(uniq), uniq
+def fetch_all_apple_jobs(max_pages: int = 500) -> tuple[int, list[dict]]:
+    stats: dict = {}
+    jobs = list(iter_apple_jobs(max_pages, stats))
+    return stats["total"], jobs
+
+
+def apple_job_exists(job_key: str) -> bool:
+    try:
+        request_with_retry(SESSION_NAME, "HEAD", JOB_DETAILS_URL.format(job_key=job_key), max_retries=2)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code in (404, 410):
+            return False
+        raise
+    return True
+
+
+def fetch_incremental_apple_jobs(known: dict[str, dict], max_pages: int = 500) -> tuple[int, list[dict], dict]:
+    """Newest-first crawl that stops at previously seen postings; see crawl_incremental."""
+
+    def fetch_page(idx: int) -> tuple[int, list[dict]]:
+        total, items = fetch_apple_jobs_page(page=idx + 1)
+        return total, [_normalize_job(x) for x in items if isinstance(x, dict)]
+
+    return crawl_incremental(fetch_page, known, exists=apple_job_exists, max_pages=max_pages)
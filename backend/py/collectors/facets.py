@@ -0,0 +1,211 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# probe(applied) -> (total, first_page_items, {facet_param: [(value_id, count), ...]})
+Probe = Callable[[dict], tuple[int, list[dict], dict[str, list[tuple[str, int]]]]]
+# crawl(applied, (total, first_page_items)) -> (total, items, pagination_stats)
+Crawl = Callable[[dict, tuple[int, list[dict]]], tuple[int, list[dict], dict]]
+
+# Workday stops serving results past ~2000 for a single query.
+WORKDAY_RESULT_CAP = 2000
+WORKDAY_SPLIT_FACETS = ("locationCountry", "locations", "jobFamilyGroup")
+
+
+def crawl_facet_partitions(
+    probe: Probe,
+    crawl: Crawl,
+    *,
+    cap: int,
+    key_fn: Callable[[dict], str | None],
+    split_order: list[str] | tuple[str, ...],
+    workers: int = 4,
+) -> tuple[int, list[dict], dict]:
+    """
+    Crawl a listing whose result window is capped at `cap` by recursively splitting the
+    query on facets (country, then city, then job family, ...) until each partition fits.
+
+    Partitions are probed and crawled concurrently; results are de-duplicated by key
+    because multi-location postings show up under several location facets. A partition
+    that is still over the cap with no facet left to split on is crawled as far as the
+    cap allows and counted as truncated. Postings with no value for the split facet are not
+    reachable through any child, so when the children's counts fall short of their parent's
+    total, the parent is crawled as far as the cap allows as well. A partition whose probe
+    or crawl fails (e.g. its facet filter is rejected with a 400) falls back to its parent's
+    capped crawl, once per parent, and is listed in stats["failed_partitions"].
+    """
+    t0 = time.monotonic()
+    root_total, root_items, root_facets = probe({})
+    # (applied, first page or None, parent (applied, first page) to fall back to)
+    leaves: list[tuple[dict, tuple[int, list[dict]] | None, tuple[dict, tuple[int, list[dict]]] | None]] = []
+    frontier = [({}, root_total, root_items, root_facets)]
+    truncated = 0
+    probes = 1
+    remainder_crawls = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while frontier:
+            next_frontier = []
+            for applied, total, items, facets in frontier:
+                if total < cap:
+                    leaves.append((applied, (total, items), None))
+                    continue
+
+                param = next((p for p in split_order if p not in applied and facets.get(p)), None)
+                if param is None:
+                    truncated += 1
+                    leaves.append((applied, (total, items), None))
+                    continue
+
+                children = [({**applied, param: [value_id]}, count) for value_id, count in facets[param] if count]
+                big = [c for c, count in children if count >= cap]
+                try:
+                    probed = list(pool.map(probe, big))
+                    probes += len(big)
+                except Exception:  # noqa: BLE001
+                    # Facet filter rejected upstream; fall back to the capped crawl.
+                    truncated += 1
+                    leaves.append((applied, (total, items), None))
+                    continue
+                parent_keys = [key_fn(x) for x in items]
+                if any(
+                    child_total >= total and [key_fn(x) for x in child_items] == parent_keys
+                    for child_total, child_items, _ in probed
+                ):
+                    # The filter was ignored upstream; splitting further is pointless.
+                    truncated += 1
+                    leaves.append((applied, (total, items), None))
+                    continue
+
+                parent = (applied, (total, items))
+                if sum(count for _, count in children) < total:
+                    # Postings without a value for this facet cannot be reached through it.
+                    remainder_crawls += 1
+                    leaves.append((applied, (total, items), None))
+                for child in (c for c, count in children if count < cap):
+                    leaves.append((child, None, parent))
+                for child, (child_total, child_items, child_facets) in zip(big, probed):
+                    next_frontier.append((child, child_total, child_items, child_facets))
+            frontier = next_frontier
+
+        def crawl_one(applied: dict, first: tuple[int, list[dict]] | None) -> tuple[dict, int, list[dict], dict, float]:
+            l0 = time.monotonic()
+            if first is None:
+                child_total, child_items, _ = probe(applied)
+                first = (child_total, child_items)
+            total, items, page_stats = crawl(applied, first)
+            return applied, total, items, page_stats, time.monotonic() - l0
+
+        def run_leaf(leaf) -> tuple | Exception:
+            applied, first, parent = leaf
+            try:
+                return crawl_one(applied, first)
+            except Exception as e:  # noqa: BLE001
+                if parent is None:
+                    raise
+                return e
+
+        results = []
+        failed = []
+        fallbacks: dict[str, tuple[dict, tuple[int, list[dict]]]] = {}
+        for leaf, result in zip(leaves, pool.map(run_leaf, leaves)):
+            if isinstance(result, Exception):
+                applied, _, parent = leaf
+                failed.append({"facets": applied, "error": f"{type(result).__name__}: {result}"})
+                fallbacks.setdefault(repr(sorted(parent[0].items())), parent)
+            else:
+                results.append(result)
+        # A parent already crawled for its remainder needs no second crawl.
+        for applied, _, _, _, _ in results:
+            fallbacks.pop(repr(sorted(applied.items())), None)
+        # Partitions whose filter failed are covered by their parent's capped crawl.
+        truncated += len(fallbacks)
+        results.extend(pool.map(lambda parent: crawl_one(*parent), fallbacks.values()))
+
+    seen: set[str] = set()
+    merged: list[dict] = []
+    partitions = []
+    for applied, total, items, page_stats, seconds in results:
+        partitions.append(
+            {
+                "facets": applied,
+                "total": total,
+                "items": len(items),
+                "seconds": round(seconds, 3),
+                "shards": page_stats.get("shards", []),
+            }
+        )
+        for item in items:
+            k = key_fn(item)
+            if k:
+                if k in seen:
+                    continue
+                seen.add(k)
+            merged.append(item)
+
+    stats = {
+        "root_total": root_total,
+        "partitions": partitions,
+        "probes": probes,
+        "truncated": truncated,
+        "failed_partitions": failed,
+        "remainder_crawls": remainder_crawls,
+        "uncovered_estimate": max(0, root_total - len(merged)),
+        "seconds": round(time.monotonic() - t0, 3),
+    }
+    return max(root_total, len(merged)), merged, stats
+
+
+def flatten_workday_facets(facets) -> dict[str, list[tuple[str, int]]]:
+    """
+    Workday nests facets (locationMainGroup -> locationCountry / locations). Flatten to
+    {facetParameter: [(id, count), ...]} for every group whose values carry ids and counts.
+    """
+    out: dict[str, list[tuple[str, int]]] = {}
+
+    def walk(node):
+        if isinstance(node, list):
+            for x in node:
+                walk(x)
+            return
+        if not isinstance(node, dict):
+            return
+        param = node.get("facetParameter")
+        values = node.get("values")
+        if isinstance(param, str) and isinstance(values, list):
+            leaf_values = [
+                (str(v["id"]), int(v.get("count") or 0))
+                for v in values
+                if isinstance(v, dict) and v.get("id") is not None and "facetParameter" not in v
+            ]
+            if leaf_values:
+                out.setdefault(param, []).extend(leaf_values)
+            walk([v for v in values if isinstance(v, dict) and "facetParameter" in v])
+
+    walk(facets)
+    return out
+
+
+def print_partition_stats(stats: dict) -> None:
+    for sub in stats.get("searches", []):
+        print("Search text:", repr(sub.get("search_text")))
+        print_partition_stats(sub)
+    if "partitions" not in stats:
+        return
+    print("Facet partitions:", len(stats.get("partitions", [])), f"(probes={stats.get('probes', 0)})")
+    print("Truncated partitions:", stats.get("truncated", 0))
+    for part in stats.get("failed_partitions", []):
+        label = ",".join(f"{k}={'|'.join(v)}" for k, v in part["facets"].items())
+        print(f"  failed partition {label}: {part['error']} (parent crawled instead)")
+    if stats.get("remainder_crawls"):
+        print("Parents crawled for postings without split facet:", stats["remainder_crawls"])
+    if stats.get("uncovered_estimate"):
+        print("Postings not reached (estimate):", stats["uncovered_estimate"])
+    for part in stats.get("partitions", []):
+        label = ",".join(f"{k}={'|'.join(v)}" for k, v in part["facets"].items()) or "<all>"
+        print(f"  partition {label}: total={part['total']} items={part['items']} {part['seconds']:.2f}s")
+        for st in part.get("shards", []):
+            print(
+                f"    shard {st['shard']}: offsets {st['first_offset']}-{st['last_offset']} "
+                f"pages={st['pages']} items={st['items']} {st['seconds']:.2f}s"
+            )
@@ -1,64 +1,65 @@
 import html
-import random
 import re
-import time
+from typing import Iterable, Iterator
+from urllib.parse import urljoin
 
 import requests
 
-RESULTS_URL = "https://www.google.com/about/careers/applications/jobs/results"
+from backend.py.collectors.http import RetryPolicy, configure_session, request_with_retry
+from backend.py.collectors.incremental import crawl_incremental
+
+CAREERS_URL = "https://www.google.com/about/careers/applications/"
+RESULTS_URL = urljoin(CAREERS_URL, "jobs/results")
+SESSION_NAME = "google"
 
 DEFAULT_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Encoding": "identity",
     "User-Agent": "Mozilla/5.0",
 }
 
+configure_session(
+    SESSION_NAME,
+    headers=DEFAULT_HEADERS,
+    policy=RetryPolicy(retry_statuses=(400, 429, 500, 502, 503, 504), timeout=30),
+)
 
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    headers: dict | None = None,
-    timeout: int = 30,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.request(method, url, headers=h, timeout=timeout)
-            if resp.status_code in (400, 429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-                time.sleep(min(30.0, wait))
-                continue
 
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-            time.sleep(min(30.0, wait))
+def _results_url(page: int, sort_by: str | None = None) -> str:
+    params = []
+    if sort_by:
+        params.append(f"sort_by={sort_by}")
+    if page > 1:
+        params.append(f"page={page}")
+    return f"{RESULTS_URL}?{'&'.join(params)}" if params else RESULTS_URL
 
-    raise RuntimeError("unreachable")
 
+_TAG_RE = re.compile(r"<[^>]+>")
 
-def _results_url(page: int) -> str:
-    return RESULTS_URL if page <= 1 else f"{RESULTS_URL}?page={page}"
+# One pass over the page: every token the card extractor cares about, in document order.
+# Tag alternatives share the "<" prefix so the regex engine can skip ahead cheaply.
+_CARD_START = '<li class="lLd3Je"'
+_CARD_TOKEN_RE = re.compile(
+    r"<(?:"
+    r'(?P<card>li class="lLd3Je"[^>]*>)'
+    r"|(?P<end>/li>)"
+    r'|h3 class="QJPWVe">(?P<title>.*?)</h3>'
+    r'|span class="r0wTof[^"]*">(?P<loc>.*?)</span>'
+    r")"
+    r'|jsdata="Aiqs8c;(?P<id>\d+);'
+    r'|href="(?P<href>jobs/results/[^"]+)"',
+    flags=re.S,
+)
 
 
 def _clean_text(raw: str | None) -> str:
     if not raw:
         return ""
-    text = re.sub(r"<[^>]+>", " ", raw)
-    text = html.unescape(text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    text = raw
+    if "<" in text:
+        text = _TAG_RE.sub(" ", text)
+    if "&" in text:
+        text = html.unescape(text)
+    return " ".join(text.split())
 
 
 def _extract_total_jobs(html_text: str) -> int | None:
@@ -73,51 +74,66 @@ def _extract_total_jobs(html_text: str) -> int | None:
         return None
 
 
-def _extract_job_cards(html_text: str) -> list[dict]:
-    out: list[dict] = []
-    parts = re.split(r'<li class="lLd3Je"[^>]*>', html_text)
-    if len(parts) <= 1:
-        return out
-
-    for part in parts[1:]:
-        card = part.split("</li>", 1)[0]
-
-        id_match = re.search(r'jsdata="Aiqs8c;(\d+);', card)
-        href_match = re.search(r'href="(jobs/results/[^"]+)"', card)
-        title_match = re.search(r'<h3 class="QJPWVe">(.*?)</h3>', card, flags=re.S)
+def _finish_card(card: dict, out: list[dict]) -> None:
+    job_id = card["id"]
+    href = card["href"]
+    if job_id is None and href is None:
+        return
+    job_key = job_id if job_id is not None else _clean_text(href)
 
-        if not id_match and not href_match:
-            continue
-
-        job_key = id_match.group(1) if id_match else _clean_text(href_match.group(1))
-        title = _clean_text(title_match.group(1) if title_match else "")
-
-        location_bits = re.findall(r'<span class="r0wTof[^"]*">(.*?)</span>', card, flags=re.S)
-        location_joined = "; ".join(_clean_text(x).lstrip(";").strip() for x in location_bits if _clean_text(x))
-        locations = [x.strip() for x in location_joined.split(";") if x.strip()]
-
-        seen = set()
-        uniq_locations = []
-        for loc in locations:
-            if loc in seen:
+    seen = set()
+    uniq_locations = []
+    for bit in card["locs"]:
+        for loc in _clean_text(bit).split(";"):
+            loc = loc.strip()
+            if not loc or loc in seen:
                 continue
             seen.add(loc)
             uniq_locations.append(loc)
 
-        out.append(
-            {
-                "job_key": str(job_key).strip(),
-                "title": title,
-                "locations": uniq_locations,
-                "posted_on": None,
-            }
-        )
+    out.append(
+        {
+            "job_key": str(job_key).strip(),
+            "title": _clean_text(card["title"] or ""),
+            "locations": uniq_locations,
+            "posted_on": None,
+        }
+    )
+
 
+def _extract_job_cards(html_text: str) -> list[dict]:
+    """
+    Single-pass card extractor: walks the tokens of _CARD_TOKEN_RE once and keeps a small
+    per-card state, instead of splitting the page and re-scanning every card four times.
+    A card runs from <li class="lLd3Je"> to the first </li> (or the next card).
+    """
+    out: list[dict] = []
+    start = html_text.find(_CARD_START)
+    if start == -1:
+        return out
+    card = None
+    for m in _CARD_TOKEN_RE.finditer(html_text, start):
+        kind = m.lastgroup
+        if kind == "card":
+            if card is not None:
+                _finish_card(card, out)
+            card = {"id": None, "href": None, "title": None, "locs": []}
+        elif card is None:
+            continue
+        elif kind == "end":
+            _finish_card(card, out)
+            card = None
+        elif kind == "loc":
+            card["locs"].append(m.group("loc"))
+        elif card[kind] is None:
+            card[kind] = m.group(kind)
+    if card is not None:
+        _finish_card(card, out)
     return out
 
 
-def _fetch_google_results_page(page: int) -> tuple[list[dict], int | None]:
-    resp = request_with_retry("GET", _results_url(page))
+def _fetch_google_results_page(page: int, sort_by: str | None = None) -> tuple[list[dict], int | None]:
+    resp = request_with_retry(SESSION_NAME, "GET", _results_url(page, sort_by=sort_by))
     html_text = resp.text
     return _extract_job_cards(html_text), _extract_total_jobs(html_text)
 
@@ -127,17 +143,27 @@ def fetch_google_jobs_page(page: int = 1, limit: int = 50) -> tuple[list[dict],
     return _fetch_google_results_page(page)
 
 
-def fetch_all_google_jobs(limit: int = 50, max_pages: int = 250) -> tuple[int, list[dict]]:
-    del limit  # Google page size is controlled by site, not by API args
-    all_jobs: list[dict] = []
+def iter_google_jobs(
+    max_pages: int = 250,
+    stats: dict | None = None,
+    start_page: int = 1,
+    seen: Iterable[str] = (),
+) -> Iterator[dict]:
+    """
+    Yield unique postings page by page; stats["total"] tracks the reported total and
+    stats["cursor"] the page being yielded. Job keys in `seen` are not yielded again.
+    """
+    stats = stats if stats is not None else {}
     total_hint: int | None = None
-    seen_keys: set[str] = set()
+    seen_keys: set[str] = set(seen)
     no_new_streak = 0
 
-    for page in range(1, max_pages + 1):
+    for page in range(max(1, start_page), max_pages + 1):
+        stats["cursor"] = page
         jobs, total = _fetch_google_results_page(page)
         if total is not None:
             total_hint = total
+        stats["total"] = total_hint or len(seen_keys)
 
         added = 0
         for j in jobs:
@@ -145,15 +171,51 @@ def fetch_all_google_jobs(limit: int = 50, max_pages: int = 250) -> tuple[int, l
             if not key or key in seen_keys:
                 continue
             seen_keys.add(key)
-            all_jobs.append(j)
             added += 1
+            yield j
 
         no_new_streak = no_new_streak + 1 if added == 0 else 0
         if total_hint is not None and len(seen_keys) >= total_hint:
             break
         if no_new_streak >= 3:
             break
+    stats["total"] = total_hint or len(seen_keys)
+
+
+def fetch_all_google_jobs(limit: int = 50, max_pages: int = 250) -> tuple[int, list[dict]]:
+    del limit  # Google page size is controlled by site, not by API args
+    stats: dict = {}
+    jobs = list(iter_google_jobs(max_pages, stats))
+    return stats["total"], jobs
 
-        time.sleep(random.uniform(0.04, 0.12))
 
-    return total_hint or len(all_jobs), all_jobs
+def _job_url(job_key: str) -> str:
+    """Detail page for a card's job_key: its numeric id, or the card href ("jobs/results/<id>-<slug>")."""
+    if job_key.isdigit():
+        return f"{RESULTS_URL}/{job_key}"
+    return urljoin(CAREERS_URL, job_key)
+
+
+def google_job_exists(job_key: str) -> bool:
+    try:
+        request_with_retry(SESSION_NAME, "GET", _job_url(job_key), max_retries=2)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code in (404, 410):
+            return False
+        raise
+    return True
+
+
+def fetch_incremental_google_jobs(known: dict[str, dict], max_pages: int = 250) -> tuple[int, list[dict], dict]:
+    """Newest-first crawl that stops at previously seen postings; see crawl_incremental."""
+
+    def fetch_page(idx: int) -> tuple[int, list[dict]]:
+        jobs, total = _fetch_google_results_page(idx + 1, sort_by="date")
+        return total or 0, jobs
+
+    return crawl_incremental(
+        fetch_page,
+        known,
+        exists=google_job_exists,
+        max_pages=max_pages,
+    )
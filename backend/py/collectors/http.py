@@ -0,0 +1,401 @@
+import random
+import threading
+import time
+from concurrent.futures import Future, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable
+
+import requests
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+from backend.py.collectors.http_cache import BodyTee, ConditionalAdapter, wrap_adapter
+from backend.py.collectors.ratelimit import HostLimiter, host_limiter
+from backend.py.collectors.replay import make_adapter
+from backend.py.storage.archive import ArchivingAdapter
+
+# One pooled keep-alive session per collector. requests advertises "br" on its own
+# when a brotli package is installed, so compression needs no extra wiring here.
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 16
+
+# Requests that may be sent twice without side effects; listing POSTs opt in with hedge=True.
+HEDGE_METHODS = ("GET", "HEAD")
+HEDGE_MIN_DELAY = 0.05
+# Retries and hedges per collector and run: RETRY_BUDGET_MIN plus this share of requests.
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_MIN = 20
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How a collector retries: which statuses, how often, and how long to back off."""
+
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+    max_retries: int = 4
+    timeout: float = 25
+    base_backoff: float = 1.0
+    max_backoff: float = 30.0
+    jitter: float = 0.4
+    honor_retry_after: bool = False
+    # Send a duplicate of an idempotent request still unanswered after the host's p95 latency.
+    hedge: bool = True
+
+    def backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        wait = self.base_backoff * (2**attempt)
+        if self.honor_retry_after and retry_after:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                pass
+        return min(self.max_backoff, wait) + random.uniform(0, self.jitter)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+# Workday tenants throttle with 429 + Retry-After and rarely fail with a plain 500.
+WORKDAY_RETRY_POLICY = RetryPolicy(
+    retry_statuses=(429, 502, 503, 504),
+    max_retries=5,
+    timeout=20,
+    max_backoff=60.0,
+    jitter=0.5,
+    honor_retry_after=True,
+)
+
+_lock = threading.Lock()
+_sessions: dict[str, requests.Session] = {}
+_bootstrap: dict[str, object] = {}
+_headers: dict[str, dict[str, str]] = {}
+_policies: dict[str, RetryPolicy] = {}
+_budgets: dict[str, "RetryBudget"] = {}
+
+
+class RetryBudget:
+    """
+    Extra attempts (retries and hedges) a collector may spend: `min_extra` plus `ratio`
+    of the requests it has sent. Once spent, failures surface instead of being retried,
+    so a struggling site does not get max_retries times the traffic.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_extra: int = RETRY_BUDGET_MIN):
+        self.ratio = ratio
+        self.min_extra = min_extra
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "exhausted": 0}
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            self.counts[field] += 1
+
+    def spend(self, field: str) -> bool:
+        """Take one extra attempt of kind `field` ("retries" or "hedges") if the budget allows."""
+        with self._lock:
+            c = self.counts
+            if c["retries"] + c["hedges"] >= self.min_extra + self.ratio * c["requests"]:
+                c["exhausted"] += 1
+                return False
+            c[field] += 1
+            return True
+
+
+def retry_budget(name: str) -> RetryBudget:
+    with _lock:
+        budget = _budgets.get(name)
+        if budget is None:
+            budget = _budgets[name] = RetryBudget()
+        return budget
+
+
+def _spawn(fn: Callable, *args) -> Future:
+    """Run fn(*args) on a thread of its own, started now rather than queued behind other sends."""
+    fut: Future = Future()
+    fut.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:  # noqa: BLE001
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="http-hedge", daemon=True).start()
+    return fut
+
+
+def configure_session(name: str, *, headers: dict | None = None, policy: RetryPolicy | None = None) -> None:
+    """Register a collector's default headers and retry policy (call once at import time)."""
+    with _lock:
+        if headers is not None:
+            _headers[name] = dict(headers)
+        if policy is not None:
+            _policies[name] = policy
+
+
+def get_session(name: str) -> requests.Session:
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            # Plain pooled adapter, or the record/replay transport (see collectors.replay),
+            # behind the conditional GET cache for live traffic (see collectors.http_cache)
+            # and the raw response archive (see storage.archive).
+            adapter = make_adapter(name, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            adapter = ArchivingAdapter(name, wrap_adapter(name, adapter))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = DEFAULT_ACCEPT_ENCODING
+            session.headers["Connection"] = "keep-alive"
+            session.headers.update(_headers.get(name, {}))
+            _sessions[name] = session
+        return session
+
+
+def _send(session: requests.Session, limiter: HostLimiter, method: str, url: str, kwargs: dict):
+    """One request on a limiter slot the caller has already acquired."""
+    t0 = time.monotonic()
+    try:
+        resp = session.request(method, url, **kwargs)
+    except requests.RequestException:
+        limiter.release(None, time.monotonic() - t0)
+        raise
+    limiter.release(resp.status_code, time.monotonic() - t0, resp.headers.get("Retry-After"))
+    return resp
+
+
+def _close_loser(fut: Future) -> None:
+    if not fut.cancelled() and fut.exception() is None:
+        resp = fut.result()
+        if isinstance(resp.raw, BodyTee):
+            resp.raw.discard()  # the caller never sees it: neither archived nor cached
+        resp.close()
+
+
+def _preloaded(resp: requests.Response, preload: bool) -> requests.Response:
+    if preload:
+        resp.content  # read the winner now, as a non-streamed request would have been
+    return resp
+
+
+def _send_hedged(
+    budget: RetryBudget,
+    session: requests.Session,
+    limiter: HostLimiter,
+    delay: float,
+    method: str,
+    url: str,
+    kwargs: dict,
+) -> requests.Response:
+    """
+    Send the request and, if it is still unanswered after `delay`, a duplicate; the first
+    response wins and the other one is closed when it arrives.
+
+    The primary goes out at once on its own thread (the caller waits on both), so `delay`
+    counts from the send. The duplicate only takes a host slot that is free right now: if
+    the limiter is at its cap, waiting for a slot would mean waiting for the primary, so
+    no hedge is sent and no budget is spent. Both are sent with stream=True and only the
+    winner's body is read, so the loser is neither downloaded nor archived or cached.
+    """
+    preload = not kwargs.get("stream")
+    kwargs = dict(kwargs, stream=True)
+    primary = _spawn(_send, session, limiter, method, url, kwargs)
+    try:
+        return _preloaded(primary.result(timeout=delay), preload)
+    except FutureTimeout:
+        pass
+    if not limiter.try_acquire():
+        return _preloaded(primary.result(), preload)
+    if not budget.spend("hedges"):
+        limiter.cancel()
+        return _preloaded(primary.result(), preload)
+    backup = _spawn(_send, session, limiter, method, url, kwargs)
+    error = None
+    for fut in as_completed((primary, backup)):
+        if fut.exception() is not None:
+            error = error or fut.exception()
+            continue
+        (backup if fut is primary else primary).add_done_callback(_close_loser)
+        if fut is backup:
+            budget.count("hedge_wins")
+        return _preloaded(fut.result(), preload)
+    raise error
+
+
+def request_with_retry(
+    name: str,
+    method: str,
+    url: str,
+    *,
+    headers: dict | None = None,
+    timeout: float | None = None,
+    max_retries: int | None = None,
+    hedge: bool | None = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Send a request on collector `name`'s session, retrying throttling, server errors
+    and transport failures per the collector's RetryPolicy. Other error statuses raise
+    HTTPError right away so callers can act on 401/403/404 without waiting out backoff.
+
+    Each attempt is paced by the host's adaptive limiter (see collectors.ratelimit), so
+    collectors need no sleeps of their own between requests. GET/HEAD requests (and
+    others passed hedge=True, e.g. listing POSTs) are hedged once the host's p95 latency
+    is known. Retries and hedges draw on the collector's RetryBudget.
+    """
+    policy = _policies.get(name, DEFAULT_RETRY_POLICY)
+    retries = policy.max_retries if max_retries is None else max_retries
+    session = get_session(name)
+    limiter = host_limiter(url)
+    budget = retry_budget(name)
+    if hedge is None:
+        hedge = method.upper() in HEDGE_METHODS
+    hedge = hedge and policy.hedge
+    kwargs = dict(kwargs, headers=headers, timeout=timeout or policy.timeout)
+
+    for attempt in range(retries + 1):
+        budget.count("requests")
+        p95 = limiter.latency_p95() if hedge else None
+        limiter.acquire()
+        try:
+            if p95 is None:
+                resp = _send(session, limiter, method, url, kwargs)
+            else:
+                resp = _send_hedged(budget, session, limiter, max(HEDGE_MIN_DELAY, p95), method, url, kwargs)
+        except requests.RequestException:
+            if attempt == retries or not budget.spend("retries"):
+                raise
+            time.sleep(policy.backoff(attempt))
+            continue
+        if resp.status_code in policy.retry_statuses and attempt < retries and budget.spend("retries"):
+            retry_after = resp.headers.get("Retry-After")
+            resp.close()
+            time.sleep(policy.backoff(attempt, retry_after))
+            continue
+        if not resp.ok:
+            resp.close()  # hand the connection back even when the caller asked for stream=True
+        resp.raise_for_status()
+        return resp
+
+    raise RuntimeError("unreachable")
+
+
+def reset_session(name: str) -> None:
+    """Drop a collector's session and cached bootstrap state (cookies, CSRF tokens)."""
+    with _lock:
+        session = _sessions.pop(name, None)
+        _bootstrap.pop(name, None)
+        _budgets.pop(name, None)
+    if session is not None:
+        session.close()
+
+
+def reset_session_stats(name: str) -> None:
+    """
+    Zero a collector's request, 304 and retry-budget counters but keep its pooled
+    connections, bootstrap state and HTTP cache, so a resident process starts each run warm.
+    """
+    with _lock:
+        session = _sessions.get(name)
+        _budgets.pop(name, None)
+    if session is None:
+        return
+    for adapter in set(session.adapters.values()):
+        layer = adapter
+        while layer is not None:
+            if isinstance(layer, ConditionalAdapter):
+                layer.counts = dict.fromkeys(layer.counts, 0)
+            layer = getattr(layer, "inner", None)
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                pool.num_requests = 0
+                pool.num_connections = 0
+
+
+def get_bootstrap(name: str, factory: Callable[[requests.Session], object], *, refresh: bool = False):
+    """
+    Cache per-collector auth/CSRF bootstrap state next to its session.
+    Pass refresh=True after a 401/403 to scrape a fresh token.
+    """
+    session = get_session(name)
+    with _lock:
+        if not refresh and name in _bootstrap:
+            return _bootstrap[name]
+    state = factory(session)
+    with _lock:
+        _bootstrap[name] = state
+    return state
+
+
+def reset_all_sessions() -> None:
+    with _lock:
+        names = list(_sessions)
+    for name in names:
+        reset_session(name)
+
+
+def connection_stats(name: str) -> dict:
+    """
+    Requests sent vs TCP/TLS connections opened by a collector's session pools, how
+    many conditional GETs came back 304 (body served from the HTTP cache), and what the
+    collector spent of its retry budget on retries and hedges.
+    """
+    session = _sessions.get(name)
+    n_requests = 0
+    n_connections = 0
+    not_modified = 0
+    bytes_saved = 0
+    if session is not None:
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            layer = adapter
+            while layer is not None:
+                if isinstance(layer, ConditionalAdapter):
+                    not_modified += layer.counts["not_modified"]
+                    bytes_saved += layer.counts["bytes_saved"]
+                layer = getattr(layer, "inner", None)
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    n_requests += pool.num_requests
+                    n_connections += pool.num_connections
+    return {
+        "requests": n_requests,
+        "connections": n_connections,
+        "reuse_ratio": round(1 - n_connections / n_requests, 4) if n_requests else None,
+        "not_modified": not_modified,
+        "not_modified_rate": round(not_modified / n_requests, 4) if n_requests else None,
+        "bytes_saved": bytes_saved,
+        **_budget_stats(name),
+    }
+
+
+def _budget_stats(name: str) -> dict:
+    budget = _budgets.get(name)
+    c = dict(budget.counts) if budget is not None else {"retries": 0, "hedges": 0, "hedge_wins": 0, "exhausted": 0}
+    return {
+        "retries": c["retries"],
+        "hedges": c["hedges"],
+        "hedge_wins": c["hedge_wins"],
+        "hedge_win_rate": round(c["hedge_wins"] / c["hedges"], 4) if c["hedges"] else None,
+        "retry_budget_exhausted": c["exhausted"],
+    }
+
+
+def print_connection_stats(name: str) -> None:
+    st = connection_stats(name)
+    print("HTTP requests:", st["requests"])
+    print("HTTP connections opened:", st["connections"])
+    if st["reuse_ratio"] is not None:
+        print("Connection reuse ratio:", f"{st['reuse_ratio']:.3f}")
+    print("HTTP 304 responses:", st["not_modified"])
+    if st["not_modified_rate"] is not None:
+        print("HTTP 304 rate:", f"{st['not_modified_rate']:.3f}")
+    print("HTTP bytes saved:", st["bytes_saved"])
+    print("HTTP retries:", st["retries"])
+    print("HTTP hedged requests:", st["hedges"], f"(won={st['hedge_wins']})")
+    if st["hedge_win_rate"] is not None:
+        print("HTTP hedge win rate:", f"{st['hedge_win_rate']:.3f}")
+    print("Retry budget exhausted:", st["retry_budget_exhausted"])
@@ -0,0 +1,330 @@
+"""
+Conditional GET cache shared by the collector sessions.
+
+Responses that carry an ETag or Last-Modified are stored (body decoded, zlib-compressed)
+in <cache dir>/http_cache.sqlite3, keyed by collector and URL. The next GET for the URL
+sends If-None-Match / If-Modified-Since; on 304 Not Modified the stored body is handed
+back as a normal 200 response, so callers need no changes. Bodies are stored as the caller
+reads them (BodyTee), so stream=True reads keep their memory flat and can stop early; a
+body that is not read to the end is not stored. GETs sent with Cache-Control: no-store
+(pages that hand out per-session tokens) bypass the cache both ways.
+
+Enabled for live traffic (COLLECTOR_HTTP_MODE=off) unless COLLECTOR_HTTP_CACHE=off.
+"""
+import io
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from backend.py.collectors.replay import _DROP_HEADERS, http_mode, request_key
+from backend.py.storage.detail_cache import cache_dir
+
+DEFAULT_TTL_SEC = 60 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500_000
+# Larger bodies are passed through without being stored.
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def http_cache_enabled() -> bool:
+    flag = (os.environ.get("COLLECTOR_HTTP_CACHE") or "on").strip().lower()
+    return flag not in ("off", "0", "false", "no") and http_mode() == "off"
+
+
+class HttpCache:
+    """Validators and bodies of cacheable responses; entries unused for `ttl_sec` are evicted."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path) if path else cache_dir() / "http_cache.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_sec = float(ttl_sec)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+              key TEXT PRIMARY KEY,
+              etag TEXT,
+              last_modified TEXT,
+              status INTEGER NOT NULL,
+              reason TEXT,
+              headers TEXT NOT NULL,
+              body BLOB NOT NULL,
+              used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_http_cache_used_at ON http_cache (used_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, status, reason, headers, body FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        headers = [tuple(line.split(": ", 1)) for line in row[4].split("\n") if ": " in line]
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "status": row[2],
+            "reason": row[3],
+            "headers": headers,
+            "body": zlib.decompress(row[5]),
+        }
+
+    def put(self, key: str, etag: str | None, last_modified: str | None, status: int, reason: str | None,
+            headers: list[tuple[str, str]], body: bytes) -> None:
+        self.put_compressed(key, etag, last_modified, status, reason, headers, zlib.compress(body))
+
+    def put_compressed(self, key: str, etag: str | None, last_modified: str | None, status: int,
+                       reason: str | None, headers: list[tuple[str, str]], blob: bytes) -> None:
+        """put() for a body already zlib-compressed."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO http_cache (key, etag, last_modified, status, reason, headers, body, used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                  etag = excluded.etag,
+                  last_modified = excluded.last_modified,
+                  status = excluded.status,
+                  reason = excluded.reason,
+                  headers = excluded.headers,
+                  body = excluded.body,
+                  used_at = excluded.used_at
+                """,
+                (key, etag, last_modified, status, reason, "\n".join(f"{k}: {v}" for k, v in headers),
+                 blob, time.time()),
+            )
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop entries unused for `ttl_sec`, then the least recently used beyond `max_entries`."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM http_cache WHERE used_at < ?", (time.time() - self.ttl_sec,))
+            removed = cur.rowcount
+            cur = self._conn.execute(
+                """
+                DELETE FROM http_cache WHERE rowid IN (
+                  SELECT rowid FROM http_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _cacheable(resp) -> bool:
+    if resp.status_code != 200:
+        return False
+    if not (resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+        return False
+    if "no-store" in (resp.headers.get("Cache-Control") or "").lower():
+        return False
+    try:
+        return int(resp.headers.get("Content-Length") or 0) <= MAX_BODY_BYTES
+    except ValueError:
+        return True
+
+
+class BodyTee:
+    """
+    Stands in for a response's urllib3 `raw`, copying the decoded body to `sink` as the
+    caller reads it (resp.content, iter_content, raw.read). The sink gets write(chunk) per
+    chunk, then close(complete) once: complete is False when the body was closed before
+    its end. Bodies read without decoding, or longer than `limit`, are abort()ed instead.
+    """
+
+    def __init__(self, raw, sink, limit: int | None = None):
+        object.__setattr__(self, "_raw", raw)
+        object.__setattr__(self, "_sink", sink)
+        object.__setattr__(self, "_limit", limit)
+        object.__setattr__(self, "_size", 0)
+        object.__setattr__(self, "_done", False)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)  # e.g. decode_content
+
+    def _record(self, data: bytes, decode_content) -> None:
+        if self._done or not data:
+            return
+        decoded = decode_content if decode_content is not None else self._raw.decode_content
+        size = self._size + len(data)
+        if (not decoded and self._raw.headers.get("Content-Encoding")) or (self._limit and size > self._limit):
+            self._finish(aborted=True)
+            return
+        object.__setattr__(self, "_size", size)
+        self._sink.write(data)
+
+    def _finish(self, complete: bool = False, aborted: bool = False) -> None:
+        if self._done:
+            return
+        object.__setattr__(self, "_done", True)
+        if aborted:
+            self._sink.abort()
+        else:
+            self._sink.close(complete)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        data = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        self._record(data, decode_content)
+        if amt is None or (amt and not data):
+            self._finish(complete=True)
+        return data
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._record(chunk, decode_content)
+            yield chunk
+        self._finish(complete=True)
+
+    def close(self):
+        self._raw.close()
+        self._finish(complete=False)
+
+    def discard(self) -> None:
+        """Close the body without handing any of it to the sinks (e.g. a hedge's losing response)."""
+        self._finish(aborted=True)
+        if isinstance(self._raw, BodyTee):
+            self._raw.discard()
+        else:
+            self._raw.close()
+
+
+class _CacheSink:
+    def __init__(self, adapter: "ConditionalAdapter", key: str, resp):
+        self.adapter = adapter
+        self.key = key
+        self.meta = (
+            resp.headers.get("ETag"),
+            resp.headers.get("Last-Modified"),
+            resp.status_code,
+            resp.reason,
+            [(k, v) for k, v in resp.raw.headers.items() if k.lower() not in _DROP_HEADERS],
+        )
+        self._z = zlib.compressobj()
+        self._parts: list[bytes] = []
+
+    def write(self, chunk: bytes) -> None:
+        self._parts.append(self._z.compress(chunk))
+
+    def close(self, complete: bool) -> None:
+        if not complete:
+            return
+        self._parts.append(self._z.flush())
+        self.adapter.cache.put_compressed(self.key, *self.meta, b"".join(self._parts))
+        self.adapter._count("stored")
+
+    def abort(self) -> None:
+        self._parts = []
+
+
+class ConditionalAdapter(BaseAdapter):
+    """
+    Wraps a session's transport adapter: GETs with stored validators are sent as
+    conditional requests, and 304s are answered from the cache. Requests marked
+    Cache-Control: no-store are passed through untouched and not stored.
+    """
+
+    def __init__(self, name: str, inner: HTTPAdapter, cache: HttpCache):
+        super().__init__()
+        self.name = name
+        self.inner = inner
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.counts = {"conditional": 0, "not_modified": 0, "stored": 0, "bytes_saved": 0}
+
+    @property
+    def poolmanager(self):
+        return self.inner.poolmanager
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[field] += n
+
+    def _response(self, request, status: int, reason: str | None, headers: list, body: bytes):
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers + [("Content-Length", str(len(body)))],
+            status=status,
+            reason=reason,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.inner.build_response(request, raw)
+
+    def send(self, request, **kwargs):
+        if request.method != "GET" or "no-store" in request.headers.get("Cache-Control", "").lower():
+            return self.inner.send(request, **kwargs)
+        key = f"{self.name}:{request_key(request.method, request.url, request.body)}"
+        entry = self.cache.get(key)
+        outgoing = request
+        if entry is not None:
+            outgoing = request.copy()
+            if entry["etag"]:
+                outgoing.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                outgoing.headers["If-Modified-Since"] = entry["last_modified"]
+            self._count("conditional")
+
+        resp = self.inner.send(outgoing, **kwargs)
+        if entry is not None and resp.status_code == 304:
+            resp.close()
+            self.cache.touch(key)
+            self._count("not_modified")
+            self._count("bytes_saved", len(entry["body"]))
+            # Headers sent with the 304 (fresh Date, validators) override the stored ones.
+            refreshed = {k.lower() for k in resp.headers}
+            headers = [(k, v) for k, v in entry["headers"] if k.lower() not in refreshed]
+            headers += [(k, v) for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS]
+            return self._response(request, entry["status"], entry["reason"], headers, entry["body"])
+        if _cacheable(resp):
+            # Stored once the caller has read the whole body; nothing is buffered up front.
+            resp.raw = BodyTee(resp.raw, _CacheSink(self, key, resp), limit=MAX_BODY_BYTES)
+        return resp
+
+    def build_response(self, req, resp):
+        return self.inner.build_response(req, resp)
+
+    def close(self) -> None:
+        self.inner.close()
+        self.cache.close()
+
+
+def wrap_adapter(name: str, adapter: HTTPAdapter) -> BaseAdapter:
+    """The session adapter for collector `name`, behind the conditional cache when enabled."""
+    if not http_cache_enabled():
+        return adapter
+    cache = HttpCache()
+    cache.evict()
+    return ConditionalAdapter(name, adapter, cache)
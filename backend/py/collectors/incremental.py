@@ -0,0 +1,93 @@
+from typing import Callable
+
+# A posting counts as "known" when its job_key was in the previous snapshot.
+# Listings are sorted newest-first, so a long run of known postings means the
+# rest of the listing was already captured last time.
+DEFAULT_KNOWN_RUN = 50
+
+
+def crawl_incremental(
+    fetch_page: Callable[[int], tuple[int, list[dict]]],
+    known: dict[str, dict],
+    *,
+    exists: Callable[[str], bool] | None = None,
+    known_run: int = DEFAULT_KNOWN_RUN,
+    max_pages: int = 500,
+) -> tuple[int, list[dict], dict]:
+    """
+    Fetch a newest-first listing only until `known_run` consecutive known postings
+    are seen, then carry forward the previous snapshot's postings that are still live.
+
+    `fetch_page(i)` returns (total, normalized jobs) for the i-th page (0-based).
+    `exists(job_key)` is a cheap liveness probe; it is only called when the listing
+    total says some known postings disappeared.
+
+    Returns (total, postings, stats).
+    """
+    seen: set[str] = set()
+    fresh: list[dict] = []
+    total_hint = 0
+    known_streak = 0
+    pages = 0
+    reached_known = False
+
+    for page_idx in range(max_pages):
+        total, jobs = fetch_page(page_idx)
+        pages += 1
+        total_hint = max(total_hint, int(total or 0))
+        if not jobs:
+            break
+
+        for j in jobs:
+            k = j.get("job_key")
+            if not k or k in seen:
+                continue
+            seen.add(k)
+            fresh.append(j)
+            known_streak = known_streak + 1 if k in known else 0
+
+        if known_streak >= known_run:
+            reached_known = True
+            break
+        if total_hint and len(seen) >= total_hint:
+            break
+
+    unseen_known = [k for k in known if k not in seen]
+    removed: set[str] = set()
+    checks = 0
+    if reached_known and unseen_known:
+        # Postings still live but below the stop point = total - what we saw.
+        expected_live = total_hint - len(seen) if total_hint else len(unseen_known)
+        # Without a probe we cannot tell which ones went away; keep them all.
+        if exists is not None and expected_live < len(unseen_known):
+            for k in unseen_known:
+                checks += 1
+                try:
+                    alive = exists(k)
+                except Exception:  # noqa: BLE001
+                    alive = True
+                if not alive:
+                    removed.add(k)
+                if len(unseen_known) - len(removed) <= expected_live:
+                    break
+
+    carried = [known[k] for k in unseen_known if k not in removed] if reached_known else []
+    stats = {
+        "pages": pages,
+        "fresh": len(fresh),
+        "new": sum(1 for k in seen if k not in known),
+        "carried_forward": len(carried),
+        "removed": len(removed) if reached_known else len(unseen_known),
+        "existence_checks": checks,
+        "stopped_on_known": reached_known,
+    }
+    postings = fresh + carried
+    return max(total_hint, len(postings)), postings, stats
+
+
+def print_incremental_stats(stats: dict) -> None:
+    print("Incremental pages fetched:", stats["pages"])
+    print("Incremental new postings:", stats["new"])
+    print("Carried forward postings:", stats["carried_forward"])
+    print("Removed postings:", stats["removed"])
+    print("Existence checks:", stats["existence_checks"])
@@ -1,11 +1,34 @@
-import random
-import time
+import io
+import json
+import queue
+import threading
 import xml.etree.ElementTree as ET
-from typing import Any
+from typing import Any, BinaryIO, Iterable, Iterator
 
 import requests
 
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+from backend.py.collectors.http import RetryPolicy, configure_session, request_with_retry
+from backend.py.storage.detail_cache import DetailCache
+
 SITEMAP_URL = "https://www.metacareers.com/jobs/sitemap.xml"
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+LD_JSON_MARKER = b'<script type="application/ld+json"'
+SCRIPT_CLOSE = b"</script>"
+READ_CHUNK = 16 * 1024
+# Finish reading a detail page (keeping the connection alive) when this little is left;
+# otherwise abort the download once the JSON-LD block has been read.
+DRAIN_LIMIT = 64 * 1024
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+SESSION_NAME = "meta"
+CACHE_NAMESPACE = "meta"
 
 DEFAULT_HEADERS = {
     "Accept": "*/*",
@@ -13,77 +36,115 @@ DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0",
 }
 
+configure_session(
+    SESSION_NAME,
+    headers=DEFAULT_HEADERS,
+    policy=RetryPolicy(retry_statuses=(400, 429, 500, 502, 503, 504)),
+)
 
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    headers: dict | None = None,
-    timeout: int = 25,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.request(method, url, headers=h, timeout=timeout)
-            if resp.status_code in (400, 429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-                time.sleep(min(30.0, wait))
-                continue
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-            time.sleep(min(30.0, wait))
 
-    raise RuntimeError("unreachable")
+def _iter_sitemap_entries(source: BinaryIO) -> Iterator[tuple[str, str | None]]:
+    """
+    Stream (job-detail URL, lastmod) pairs out of a sitemap with iterparse. Each <url> is
+    dropped from the tree once read, so memory does not grow with the size of the sitemap.
+    """
+    url_tag = f"{{{SITEMAP_NS}}}url"
+    loc_tag = f"{{{SITEMAP_NS}}}loc"
+    lastmod_tag = f"{{{SITEMAP_NS}}}lastmod"
+    root = None
+    loc = lastmod = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        if elem.tag == loc_tag:
+            loc = elem.text
+        elif elem.tag == lastmod_tag:
+            lastmod = elem.text
+        elif elem.tag == url_tag:
+            if loc and "/profile/job_details/" in loc:
+                yield loc.strip(), (lastmod or "").strip() or None
+            loc = lastmod = None
+            if root is not None:
+                root.clear()
+
+
+def _iter_sitemap_urls(source: BinaryIO) -> Iterator[str]:
+    for loc, _ in _iter_sitemap_entries(source):
+        yield loc
+
+
+def _parse_sitemap_entries(xml_text: str) -> list[tuple[str, str | None]]:
+    return list(_iter_sitemap_entries(io.BytesIO(xml_text.encode("utf-8"))))
 
 
 def _parse_sitemap_urls(xml_text: str) -> list[str]:
-    root = ET.fromstring(xml_text)
-    ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-    urls = []
-    for loc in root.findall("sm:url/sm:loc", ns):
-        if loc.text and "/profile/job_details/" in loc.text:
-            urls.append(loc.text.strip())
-    return urls
+    return [loc for loc, _ in _parse_sitemap_entries(xml_text)]
+
+
+def iter_meta_sitemap_entries() -> Iterator[tuple[str, str | None]]:
+    resp = request_with_retry(SESSION_NAME, "GET", SITEMAP_URL, stream=True)
+    try:
+        resp.raw.decode_content = True
+        yield from _iter_sitemap_entries(resp.raw)
+    finally:
+        resp.close()
+
+
+def iter_meta_job_detail_urls() -> Iterator[str]:
+    for loc, _ in iter_meta_sitemap_entries():
+        yield loc
 
 
 def fetch_meta_job_detail_urls() -> list[str]:
-    resp = request_with_retry("GET", SITEMAP_URL)
-    return _parse_sitemap_urls(resp.text)
+    return list(iter_meta_job_detail_urls())
 
 
-def _extract_ld_json(html: str) -> dict[str, Any] | None:
-    marker = '<script type="application/ld+json"'
-    start = html.find(marker)
-    if start == -1:
-        return None
-    open_end = html.find(">", start)
-    if open_end == -1:
-        return None
-    close = html.find("</script>", open_end)
-    if close == -1:
-        return None
+def _read_ld_json_block(chunks: Iterable[bytes]) -> bytes | None:
+    """
+    Consume body chunks only until the JSON-LD <script> block is complete and return
+    its raw bytes. Bytes before the block are dropped as they are scanned.
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf += chunk
+        start = buf.find(LD_JSON_MARKER)
+        if start == -1:
+            # Keep just enough of the tail to match a marker split across chunks.
+            del buf[: max(0, len(buf) - len(LD_JSON_MARKER))]
+            continue
+        if start:
+            del buf[:start]
+        open_end = buf.find(b">")
+        if open_end == -1:
+            continue
+        close = buf.find(SCRIPT_CLOSE, open_end)
+        if close != -1:
+            return bytes(buf[open_end + 1 : close])
+    return None
+
 
-    raw = html[open_end + 1 : close]
+def _parse_ld_json(raw: bytes) -> dict[str, Any] | None:
     try:
-        # Meta renders JSON-LD with escaped forward slashes.
-        unescaped = raw.encode("utf-8").decode("unicode_escape")
-        data = requests.models.complexjson.loads(unescaped)
-        if isinstance(data, dict):
-            return data
-    except Exception:
-        return None
-    return None
+        # Escaped forward slashes ("\/") are plain JSON escapes; no pre-pass needed.
+        data = _json_loads(raw)
+    except ValueError:
+        try:
+            # Fallback for blocks that are JS-string escaped. Non-ASCII text is kept as
+            # \u escapes first so unicode_escape cannot mangle UTF-8 bytes.
+            text = raw.decode("utf-8").encode("ascii", "backslashreplace").decode("unicode_escape")
+            data = json.loads(text)
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _extract_ld_json(html: str) -> dict[str, Any] | None:
+    raw = _read_ld_json_block([html.encode("utf-8")])
+    return _parse_ld_json(raw) if raw is not None else None
 
 
 def _extract_locations(ldj: dict[str, Any]) -> list[str]:
@@ -110,16 +171,35 @@ def _extract_locations(ldj: dict[str, Any]) -> list[str]:
     return uniq
 
 
+def _finish_or_abort(resp: requests.Response) -> None:
+    try:
+        length = int(resp.headers.get("Content-Length") or 0)
+    except ValueError:
+        length = 0
+    if length and length - resp.raw.tell() <= DRAIN_LIMIT:
+        for _ in resp.iter_content(READ_CHUNK):
+            pass
+    resp.close()
+
+
+def _job_key_from_url(job_url: str) -> str:
+    return job_url.rstrip("/").split("/")[-1]
+
+
 def fetch_meta_job_detail(job_url: str) -> dict | None:
-    resp = request_with_retry("GET", job_url)
-    ldj = _extract_ld_json(resp.text)
+    resp = request_with_retry(SESSION_NAME, "GET", job_url, stream=True)
+    try:
+        raw = _read_ld_json_block(resp.iter_content(READ_CHUNK))
+    finally:
+        _finish_or_abort(resp)
+    ldj = _parse_ld_json(raw) if raw is not None else None
     if not ldj:
         return None
 
     title = ldj.get("title")
     posted_on = ldj.get("datePosted")
     locations = _extract_locations(ldj)
-    job_key = job_url.rstrip("/").split("/")[-1]
+    job_key = _job_key_from_url(job_url)
 
     return {
         "job_key": str(job_key).strip() if job_key else None,
@@ -129,26 +209,99 @@ def fetch_meta_job_detail(job_url: str) -> dict | None:
     }
 
 
-def fetch_all_meta_jobs(max_jobs: int | None = None) -> tuple[int, list[dict]]:
-    urls = fetch_meta_job_detail_urls()
-    if max_jobs is not None:
-        urls = urls[: max(0, int(max_jobs))]
-
-    jobs: list[dict] = []
-    for idx, u in enumerate(urls):
-        item = fetch_meta_job_detail(u)
-        if isinstance(item, dict):
-            jobs.append(item)
-        if idx < len(urls) - 1:
-            time.sleep(random.uniform(0.04, 0.12))
+_SITEMAP_DONE = object()
+# Sitemap URLs parsed ahead of the detail fetches; the producer blocks once this many wait,
+# so the sitemap is read at the pace of the detail pages instead of into memory.
+URL_QUEUE_SIZE = 256
+
+
+def _produce_sitemap_urls(out: queue.Queue, source: Iterable, max_jobs: int | None, stop: threading.Event) -> None:
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for idx, u in enumerate(source):
+            if (max_jobs is not None and idx >= max_jobs) or not put(u):
+                break
+    except BaseException as e:  # noqa: BLE001
+        put(e)
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()  # ends the sitemap generator, which closes its streamed response
+        put(_SITEMAP_DONE)
+
+
+def iter_meta_jobs(
+    max_jobs: int | None = None,
+    stats: dict | None = None,
+    urls: Iterable[str | tuple[str, str | None]] | None = None,
+    seen: Iterable[str] = (),
+    cache: DetailCache | None = None,
+) -> Iterator[dict]:
+    """
+    Yield unique job details as they are fetched. The sitemap streams in on a background
+    thread, so detail pages are fetched as soon as their URLs arrive instead of after the
+    whole sitemap is parsed. stats["total"] counts sitemap URLs handed out so far.
+
+    `urls` replaces the sitemap crawl (e.g. with a saved copy of it) and holds URLs or
+    (URL, lastmod) pairs. URLs whose job key is in `seen` are counted but their detail
+    pages are not fetched. With a `cache`, a detail payload stored under the same
+    sitemap lastmod is reused, so only new and changed postings are fetched; URLs
+    without a lastmod are always fetched. stats["fetched"] counts detail requests.
+    """
+    stats = stats if stats is not None else {}
+    source = urls if urls is not None else iter_meta_sitemap_entries()
+    url_queue: queue.Queue = queue.Queue(maxsize=URL_QUEUE_SIZE)
+    limit = max(0, int(max_jobs)) if max_jobs is not None else None
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce_sitemap_urls, args=(url_queue, source, limit, stop), daemon=True)
+    producer.start()
+
+    n_urls = 0
+    fetched = 0
+    seen = set(seen)
+    try:
+        while True:
+            entry = url_queue.get()
+            if entry is _SITEMAP_DONE:
+                break
+            if isinstance(entry, BaseException):
+                raise entry
+            n_urls += 1
+            stats["total"] = n_urls
+            u, lastmod = (entry, None) if isinstance(entry, str) else entry
+            url_key = _job_key_from_url(u)
+            if url_key in seen:
+                continue
+            item = cache.get(CACHE_NAMESPACE, url_key, lastmod) if cache is not None and lastmod else None
+            if item is None:
+                fetched += 1
+                stats["fetched"] = fetched
+                item = fetch_meta_job_detail(u)
+                if cache is not None and lastmod and isinstance(item, dict):
+                    cache.put(CACHE_NAMESPACE, url_key, lastmod, item)
+            if not isinstance(item, dict):
+                continue
+            k = item.get("job_key")
+            if not k or k in seen:
+                continue
+            seen.add(k)
+            yield item
+        producer.join()
+    finally:
+        # Stopped early (error or the caller closed us): unblock the producer so it lets go of the sitemap.
+        stop.set()
+    stats["total"] = n_urls
 
-    seen = set()
-    uniq = []
-    for j in jobs:
-        k = j.get("job_key")
-        if not k or k in seen:
-            continue
-        seen.add(k)
-        uniq.append(j)
 
-    return len(urls), uniq
+def fetch_all_meta_jobs(max_jobs: int | None = None) -> tuple[int, list[dict]]:
+    stats: dict = {}
+    jobs = list(iter_meta_jobs(max_jobs, stats))
+    return stats.get("total", 0), jobs
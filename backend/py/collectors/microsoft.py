@@ -1,61 +1,30 @@
-import random
 import re
-import time
+from typing import Iterable, Iterator
 
 import requests
 
+from backend.py.collectors.http import RetryPolicy, configure_session, get_bootstrap, request_with_retry
+
 CAREERS_URL = "https://apply.careers.microsoft.com/careers?hl=en"
 SEARCH_URL = "https://apply.careers.microsoft.com/api/pcsx/search"
+SESSION_NAME = "microsoft"
 
 DEFAULT_HEADERS = {
     "Accept": "application/json, text/plain, */*",
     "User-Agent": "Mozilla/5.0",
 }
 
-
-def request_with_retry(
-    session: requests.Session,
-    method: str,
-    url: str,
-    *,
-    params: dict | None = None,
-    headers: dict | None = None,
-    timeout: int = 30,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = session.request(method, url, params=params, headers=h, timeout=timeout)
-            if resp.status_code in (400, 429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-                time.sleep(min(30.0, wait))
-                continue
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.4)
-            time.sleep(min(30.0, wait))
-
-    raise RuntimeError("unreachable")
+configure_session(
+    SESSION_NAME,
+    headers=DEFAULT_HEADERS,
+    policy=RetryPolicy(retry_statuses=(400, 429, 500, 502, 503, 504), timeout=30),
+)
 
 
-def _bootstrap_session() -> tuple[requests.Session, str, str]:
-    session = requests.Session()
-    resp = request_with_retry(
-        session,
-        "GET",
-        CAREERS_URL,
-        headers={"Accept-Encoding": "identity"},
-    )
+def _scrape_bootstrap(session: requests.Session) -> tuple[str, str]:
+    del session  # cookies land on the shared session through request_with_retry
+    # The page carries a per-session CSRF token: a cached copy would hand back a stale one.
+    resp = request_with_retry(SESSION_NAME, "GET", CAREERS_URL, headers={"Cache-Control": "no-store"})
     text = resp.text
     m_csrf = re.search(r'<meta name="_csrf" content="([^"]+)"', text)
     if not m_csrf:
@@ -64,7 +33,44 @@ def _bootstrap_session() -> tuple[requests.Session, str, str]:
 
     m_gid = re.search(r'window\._EF_GROUP_ID\s*=\s*"([^"]+)"', text)
     group_id = m_gid.group(1) if m_gid else "microsoft.com"
-    return session, csrf, group_id
+    return csrf, group_id
+
+
+def _bootstrap_session(refresh: bool = False) -> tuple[str, str]:
+    # Session cookies and the CSRF token are scraped once and reused for every page.
+    return get_bootstrap(SESSION_NAME, _scrape_bootstrap, refresh=refresh)
+
+
+def _search(start: int, query: str = "", location: str = "") -> dict | None:
+    csrf, group_id = _bootstrap_session()
+    for attempt in range(2):
+        params = {
+            "domain": group_id,
+            "query": query or "",
+            "location": location or "",
+            "start": max(0, int(start)),
+            "hl": "en",
+        }
+        headers = {
+            "X-CSRF-Token": csrf,
+            "X-EF-GROUP-ID": group_id,
+            "X-EF-USER": "",
+            "X-User-Timezone": "America/Los_Angeles",
+            "Referer": CAREERS_URL,
+        }
+        try:
+            resp = request_with_retry(SESSION_NAME, "GET", SEARCH_URL, params=params, headers=headers)
+        except requests.HTTPError as e:
+            expired = e.response is not None and e.response.status_code in (401, 403)
+            if not expired or attempt == 1:
+                raise
+            # Token or session cookie expired: scrape a fresh one and retry once.
+            csrf, group_id = _bootstrap_session(refresh=True)
+            continue
+        payload = resp.json()
+        data = payload.get("data") if isinstance(payload, dict) else None
+        return data if isinstance(data, dict) else None
+    raise RuntimeError("unreachable")
 
 
 def _normalize_locations(raw: list[str] | None, fallback: list[str] | None) -> list[str]:
@@ -106,25 +112,8 @@ def _normalize_job(job: dict) -> dict:
 
 
 def fetch_microsoft_jobs_page(start: int = 0, query: str = "", location: str = "") -> tuple[int | None, list[dict]]:
-    session, csrf, group_id = _bootstrap_session()
-    params = {
-        "domain": group_id,
-        "query": query or "",
-        "location": location or "",
-        "start": max(0, int(start)),
-        "hl": "en",
-    }
-    headers = {
-        "X-CSRF-Token": csrf,
-        "X-EF-GROUP-ID": group_id,
-        "X-EF-USER": "",
-        "X-User-Timezone": "America/Los_Angeles",
-        "Referer": CAREERS_URL,
-    }
-    resp = request_with_retry(session, "GET", SEARCH_URL, params=params, headers=headers)
-    payload = resp.json()
-    data = payload.get("data") if isinstance(payload, dict) else None
-    if not isinstance(data, dict):
+    data = _search(start, query=query, location=location)
+    if data is None:
         return None, []
     total = data.get("count")
     if isinstance(total, str) and total.isdigit():
@@ -138,35 +127,25 @@ def fetch_microsoft_jobs_page(start: int = 0, query: str = "", location: str = "
     return total, jobs
 
 
-def fetch_all_microsoft_jobs(page_size: int = 10, max_pages: int = 500) -> tuple[int, list[dict]]:
-    del page_size  # server side fixed to 10
-    session, csrf, group_id = _bootstrap_session()
-
-    all_jobs: list[dict] = []
+def iter_microsoft_jobs(
+    max_pages: int = 500,
+    stats: dict | None = None,
+    start: int = 0,
+    seen: Iterable[str] = (),
+) -> Iterator[dict]:
+    """
+    Yield unique postings page by page; stats["total"] tracks the reported total and
+    stats["cursor"] the result offset being yielded. Job keys in `seen` are not yielded again.
+    """
+    stats = stats if stats is not None else {}
     total_hint: int | None = None
-    seen: set[str] = set()
-    start = 0
+    seen = set(seen)
     no_new_streak = 0
 
     for _ in range(max_pages):
-        params = {
-            "domain": group_id,
-            "query": "",
-            "location": "",
-            "start": start,
-            "hl": "en",
-        }
-        headers = {
-            "X-CSRF-Token": csrf,
-            "X-EF-GROUP-ID": group_id,
-            "X-EF-USER": "",
-            "X-User-Timezone": "America/Los_Angeles",
-            "Referer": CAREERS_URL,
-        }
-        resp = request_with_retry(session, "GET", SEARCH_URL, params=params, headers=headers)
-        payload = resp.json()
-        data = payload.get("data") if isinstance(payload, dict) else None
-        if not isinstance(data, dict):
+        stats["cursor"] = start
+        data = _search(start)
+        if data is None:
             break
 
         total = data.get("count")
@@ -174,6 +153,7 @@ def fetch_all_microsoft_jobs(page_size: int = 10, max_pages: int = 500) -> tuple
             total = int(total)
         if isinstance(total, int):
             total_hint = total
+        stats["total"] = total_hint or len(seen)
 
         positions = data.get("positions")
         if not isinstance(positions, list) or not positions:
@@ -188,8 +168,8 @@ def fetch_all_microsoft_jobs(page_size: int = 10, max_pages: int = 500) -> tuple
             if not k or k in seen:
                 continue
             seen.add(k)
-            all_jobs.append(item)
             added += 1
+            yield item
 
         no_new_streak = no_new_streak + 1 if added == 0 else 0
         if no_new_streak >= 3:
@@ -198,6 +178,11 @@ def fetch_all_microsoft_jobs(page_size: int = 10, max_pages: int = 500) -> tuple
             break
 
         start += len(positions)
-        time.sleep(random.uniform(0.06, 0.14))
+    stats["total"] = total_hint or len(seen)
 
-    return total_hint or len(all_jobs), all_jobs
+
+def fetch_all_microsoft_jobs(page_size: int = 10, max_pages: int = 500) -> tuple[int, list[dict]]:
+    del page_size  # server side fixed to 10
+    stats: dict = {}
+    jobs = list(iter_microsoft_jobs(max_pages, stats))
+    return stats["total"], jobs
@@ -1,12 +1,14 @@
-import random
-import time
 from typing import Any
 
-import requests
+from backend.py.collectors.http import RetryPolicy, configure_session, request_with_retry
+from backend.py.collectors.incremental import crawl_incremental
+from backend.py.collectors.pagination import DEFAULT_WORKERS, fetch_offset_sharded
 
 BASE = "https://fa-evmr-saasfaprod1.fa.ocs.oraclecloud.com:443/hcmRestApi/resources/latest"
 JOBS_URL = f"{BASE}/recruitingCEJobRequisitions"
+JOB_DETAILS_URL = f"{BASE}/recruitingCEJobRequisitionDetails"
 SITE_NUMBER = "CX_1"
+SESSION_NAME = "nokia"
 
 DEFAULT_HEADERS = {
     "Accept": "application/json",
@@ -14,6 +16,8 @@ DEFAULT_HEADERS = {
     "(KHTML, like Gecko) Chrome/122.0 Safari/537.36",
 }
 
+configure_session(SESSION_NAME, headers=DEFAULT_HEADERS, policy=RetryPolicy(jitter=0.5))
+
 EXPAND = (
     "requisitionList.workLocation,"
     "requisitionList.otherWorkLocations,"
@@ -22,51 +26,20 @@ EXPAND = (
 )
 
 
-def request_with_retry(
-    method: str,
-    url: str,
-    *,
-    params: dict | None = None,
-    headers: dict | None = None,
-    timeout: int = 25,
-    max_retries: int = 4,
-    base_backoff: float = 1.0,
-):
-    h = dict(DEFAULT_HEADERS)
-    if headers:
-        h.update(headers)
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.request(method, url, params=params, headers=h, timeout=timeout)
-            if resp.status_code in (429, 500, 502, 503, 504):
-                if attempt == max_retries:
-                    resp.raise_for_status()
-                wait = base_backoff * (2**attempt) + random.uniform(0, 0.5)
-                time.sleep(min(30.0, wait))
-                continue
-            resp.raise_for_status()
-            return resp
-        except requests.RequestException:
-            if attempt == max_retries:
-                raise
-            wait = base_backoff * (2**attempt) + random.uniform(0, 0.5)
-            time.sleep(min(30.0, wait))
-
-    raise RuntimeError("unreachable")
-
-
-def _finder(limit: int, offset: int) -> str:
-    return f"findReqs;siteNumber={SITE_NUMBER},limit={limit},offset={offset}"
+def _finder(limit: int, offset: int, sort_by: str | None = None) -> str:
+    finder = f"findReqs;siteNumber={SITE_NUMBER},limit={limit},offset={offset}"
+    if sort_by:
+        finder += f",sortBy={sort_by}"
+    return finder
 
 
-def fetch_nokia_jobs_page(limit: int = 24, offset: int = 0) -> tuple[int, list[dict]]:
+def fetch_nokia_jobs_page(limit: int = 24, offset: int = 0, sort_by: str | None = None) -> tuple[int, list[dict]]:
     params = {
         "onlyData": "true",
         "expand": EXPAND,
-        "finder": _finder(limit=limit, offset=offset),
+        "finder": _finder(limit=limit, offset=offset, sort_by=sort_by),
     }
-    resp = request_with_retry("GET", JOBS_URL, params=params)
+    resp = request_with_retry(SESSION_NAME, "GET", JOBS_URL, params=params)
     data = resp.json()
     items = data.get("items", [])
     if not items:
@@ -147,31 +120,25 @@ def _normalize_job(j: dict[str, Any]) -> dict:
     }
 
 
-def fetch_all_nokia_jobs(limit: int = 24, max_pages: int = 300) -> tuple[int, list[dict]]:
-    all_jobs: list[dict] = []
-    total_hint = 0
-    offset = 0
-    page_count = 0
-
-    while page_count < max_pages:
-        total, reqs = fetch_nokia_jobs_page(limit=limit, offset=offset)
-        total_hint = max(total_hint, total)
-        if not reqs:
-            break
-
-        for j in reqs:
-            if not isinstance(j, dict):
-                continue
-            all_jobs.append(_normalize_job(j))
-
-        if len(reqs) < limit:
-            break
-
-        offset += len(reqs)
-        page_count += 1
-        if total_hint and len(all_jobs) >= total_hint:
-            break
-        time.sleep(random.uniform(0.08, 0.2))
+def fetch_all_nokia_jobs(
+    limit: int = 24,
+    max_pages: int = 300,
+    workers: int = DEFAULT_WORKERS,
+    stats: dict | None = None,
+) -> tuple[int, list[dict]]:
+    def fetch_page(offset: int, page_limit: int) -> tuple[int, list[dict]]:
+        total, reqs = fetch_nokia_jobs_page(limit=page_limit, offset=offset)
+        return total, [_normalize_job(j) for j in reqs if isinstance(j, dict)]
+
+    total_hint, all_jobs, shard_stats = fetch_offset_sharded(
+        fetch_page,
+        limit=limit,
+        key_fn=lambda j: j.get("job_key"),
+        workers=workers,
+        max_offset=limit * max_pages,
+    )
+    if stats is not None:
+        stats.update(shard_stats)
 
     # de-dup by job_key
     seen = set()
@@ -184,3 +151,27 @@ def fetch_all_nokia_jobs(limit: int = 24, max_pages: int = 300) -> tuple[int, li
         uniq.append(j)
 
     return total_hint or len(uniq), uniq
+
+
+def nokia_job_exists(job_key: str) -> bool:
+    params = {
+        "onlyData": "true",
+        "finder": f'ById;Id="{job_key}",siteNumber={SITE_NUMBER}',
+    }
+    resp = request_with_retry(SESSION_NAME, "GET", JOB_DETAILS_URL, params=params, max_retries=2)
+    items = resp.json().get("items", [])
+    return isinstance(items, list) and len(items) > 0
+
+
+def fetch_incremental_nokia_jobs(
+    known: dict[str, dict],
+    limit: int = 24,
+    max_pages: int = 300,
+) -> tuple[int, list[dict], dict]:
+    """Newest-first crawl that stops at previously seen postings; see crawl_incremental."""
+
+    def fetch_page(idx: int) -> tuple[int, list[dict]]:
+        total, reqs = fetch_nokia_jobs_page(limit=limit, offset=idx * limit, sort_by="POSTING_DATES_DESC")
+        return total, [_normalize_job(j) for j in reqs if isinstance(j, dict)]
+
+    return crawl_incremental(fetch_page, known, exists=nokia_job_exists, max_pages=max_pages)
@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+DEFAULT_WORKERS = 4
+DEFAULT_REPAIR_PASSES = 2
+
+
+def _split_shards(offsets: list[int], workers: int) -> list[list[int]]:
+    if not offsets:
+        return []
+    n = max(1, min(workers, len(offsets)))
+    size, extra = divmod(len(offsets), n)
+    shards = []
+    i = 0
+    for s in range(n):
+        step = size + (1 if s < extra else 0)
+        shards.append(offsets[i : i + step])
+        i += step
+    return shards
+
+
+def fetch_offset_sharded(
+    fetch_page: Callable[[int, int], tuple[int, list[dict]]],
+    *,
+    limit: int,
+    key_fn: Callable[[dict], str | None],
+    first_page: tuple[int, list[dict]] | None = None,
+    workers: int = DEFAULT_WORKERS,
+    max_offset: int | None = None,
+    repair_passes: int = DEFAULT_REPAIR_PASSES,
+) -> tuple[int, list[dict], dict]:
+    """
+    Offset pagination fanned out across workers once the first page reveals the total.
+
+    `fetch_page(offset, limit)` returns (total, items); a total of 0 means "not reported".
+    Remaining offsets are split into contiguous shards, one per worker. Results are merged
+    in offset order and de-duplicated with `key_fn`. If fewer unique items than `total`
+    came back (listing drift while crawling), suspicious pages are re-fetched.
+
+    Returns (total, items, stats) where stats carries per-shard timing.
+    """
+    t0 = time.monotonic()
+    if first_page is None:
+        first_page = fetch_page(0, limit)
+    total = int(first_page[0] or 0)
+    pages: dict[int, list[dict]] = {0: list(first_page[1] or [])}
+
+    end = total if max_offset is None else min(total, max_offset)
+    offsets = list(range(limit, end, limit))
+
+    def run_shard(shard_idx: int, shard: list[int]) -> dict:
+        s0 = time.monotonic()
+        got = 0
+        page_total = 0
+        for offset in shard:
+            page_total, items = fetch_page(offset, limit)
+            pages[offset] = list(items or [])
+            got += len(pages[offset])
+            if not items:
+                break
+        return {
+            "shard": shard_idx,
+            "first_offset": shard[0],
+            "last_offset": shard[-1],
+            "pages": len(shard),
+            "items": got,
+            "total": int(page_total or 0),
+            "seconds": round(time.monotonic() - s0, 3),
+        }
+
+    def run_all(offset_list: list[int]) -> list[dict]:
+        shards = _split_shards(offset_list, workers)
+        if not shards:
+            return []
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            return list(pool.map(lambda a: run_shard(*a), enumerate(shards)))
+
+    shard_stats = run_all(offsets)
+    for st in shard_stats:
+        total = max(total, st.pop("total"))
+
+    def merge() -> list[dict]:
+        seen: set[str] = set()
+        out: list[dict] = []
+        for offset in sorted(pages):
+            for item in pages[offset]:
+                k = key_fn(item)
+                if k:
+                    if k in seen:
+                        continue
+                    seen.add(k)
+                out.append(item)
+        return out
+
+    merged = merge()
+    target = total if max_offset is None else min(total, max_offset)
+    repaired_pages = 0
+    before_repair = len(merged)
+
+    for repair in range(repair_passes):
+        if len(merged) >= target:
+            break
+        if repair == 0:
+            # Drift shows up as short pages or pages overlapping their neighbours; the
+            # item that slipped across a boundary lives on the page before or after.
+            suspicious: set[int] = set()
+            owner: dict[str, int] = {}
+            for offset in sorted(pages):
+                items = pages[offset]
+                if len(items) < min(limit, end - offset):
+                    suspicious.add(offset)
+                for item in items:
+                    k = key_fn(item)
+                    if k and k in owner and owner[k] != offset:
+                        suspicious.update((owner[k], offset))
+                    elif k:
+                        owner[k] = offset
+            retry = set()
+            for offset in suspicious:
+                retry.update(o for o in (offset - limit, offset, offset + limit) if 0 <= o < end)
+            retry_offsets = sorted(retry)
+        else:
+            retry_offsets = [0] + offsets
+        if not retry_offsets:
+            continue
+        repaired_pages += len(retry_offsets)
+        old_pages = dict(pages)
+        run_all(retry_offsets)
+        # Keep items from both fetches of a page; merge() de-duplicates by key.
+        for offset, items in old_pages.items():
+            if pages.get(offset) is not items:
+                pages[offset] = items + pages[offset]
+        merged = merge()
+
+    stats = {
+        "workers": workers,
+        "pages": len(offsets) + 1,
+        "shards": shard_stats,
+        "repaired_pages": repaired_pages,
+        "repair_added": len(merged) - before_repair,
+        "seconds": round(time.monotonic() - t0, 3),
+    }
+    return max(total, len(merged)), merged, stats
+
+
+def print_shard_stats(stats: dict) -> None:
+    for sub in stats.get("searches", []):
+        print("Search text:", repr(sub.get("search_text")))
+        print_shard_stats(sub)
+    if "shards" not in stats:
+        return
+    print("Sharded pages:", stats.get("pages", 0), f"(workers={stats.get('workers')})")
+    for st in stats.get("shards", []):
+        print(
+            f"  shard {st['shard']}: offsets {st['first_offset']}-{st['last_offset']} "
+            f"pages={st['pages']} items={st['items']} {st['seconds']:.2f}s"
+        )
+    if stats.get("repaired_pages"):
+        print("Drift repair pages:", stats["repaired_pages"], "added:", stats.get("repair_added", 0))
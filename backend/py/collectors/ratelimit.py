@@ -0,0 +1,249 @@
+"""
+Adaptive per-host request pacing (AIMD).
+
+Every request_with_retry call goes through the HostLimiter for its URL's host, which
+caps requests in flight and spaces request starts 1/rate apart. While responses come
+back healthy (no throttling status, latency not far above the host's running average)
+the rate and concurrency grow additively; a 429/503, a Retry-After header or a transport
+error halves both, and Retry-After also pauses the host for the advertised time.
+
+Learned limits are saved to <cache dir>/rate_limits.json (save_host_limits, called at
+the end of each pipeline run) and are the starting point for the next run. Replayed
+traffic (COLLECTOR_HTTP_MODE=replay) is not paced, and limits are only saved from live
+runs (COLLECTOR_HTTP_MODE=off), so benchmark latencies never stand in for a real host's.
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from backend.py.collectors.replay import http_mode
+from backend.py.storage.detail_cache import cache_dir
+
+THROTTLE_STATUSES = (429, 503)
+# Healthy latencies kept per host for latency_p95().
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+
+@dataclass(frozen=True)
+class AimdPolicy:
+    initial_rate: float = 2.0  # request starts per second
+    min_rate: float = 0.2
+    max_rate: float = 20.0
+    initial_concurrency: float = 2.0
+    max_concurrency: float = 8.0
+    # The rate grows by about `rate_step` per `rate` healthy responses, i.e. ~rate_step/s.
+    rate_step: float = 1.0
+    decrease: float = 0.5
+    # Slower than this (or `slow_factor` x the running average) holds the rate steady.
+    slow_latency_sec: float = 5.0
+    slow_factor: float = 3.0
+    max_pause_sec: float = 120.0
+    jitter: float = 0.2
+
+
+DEFAULT_AIMD_POLICY = AimdPolicy()
+
+
+def limits_path() -> Path:
+    return Path(os.environ.get("COLLECTOR_RATE_LIMITS") or cache_dir() / "rate_limits.json")
+
+
+def _retry_after_sec(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form; the backoff in request_with_retry still applies
+
+
+class HostLimiter:
+    """Concurrency cap and start-time pacing for one host, adjusted AIMD-style."""
+
+    def __init__(self, host: str, policy: AimdPolicy = DEFAULT_AIMD_POLICY, rate: float | None = None,
+                 concurrency: float | None = None):
+        self.host = host
+        self.policy = policy
+        self.rate = min(policy.max_rate, max(policy.min_rate, rate or policy.initial_rate))
+        self.concurrency = min(policy.max_concurrency, max(1.0, concurrency or policy.initial_concurrency))
+        self.in_flight = 0
+        self.latency_avg: float | None = None
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"requests": 0, "throttled": 0, "errors": 0, "decreases": 0}
+        self._next_start = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a request slot is free and this request's start time has come."""
+        with self._cond:
+            while self.in_flight >= int(self.concurrency):
+                self._cond.wait()
+            self.in_flight += 1
+            now = time.monotonic()
+            start = max(now, self._next_start, self._paused_until)
+            interval = 1.0 / self.rate
+            self._next_start = start + interval * random.uniform(1 - self.policy.jitter, 1 + self.policy.jitter)
+        if start > now:
+            time.sleep(start - now)
+
+    def try_acquire(self) -> bool:
+        """Take a request slot only if one is free and the pacing allows a start now."""
+        with self._cond:
+            now = time.monotonic()
+            if self.in_flight >= int(self.concurrency) or max(self._next_start, self._paused_until) > now:
+                return False
+            self.in_flight += 1
+            interval = 1.0 / self.rate
+            self._next_start = now + interval * random.uniform(1 - self.policy.jitter, 1 + self.policy.jitter)
+            return True
+
+    def cancel(self) -> None:
+        """Give back a slot taken by try_acquire/acquire without sending a request."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, status: int | None, latency: float, retry_after: str | None = None) -> None:
+        """Record a finished request; `status` is None for a transport error."""
+        p = self.policy
+        with self._cond:
+            self.in_flight -= 1
+            self.counts["requests"] += 1
+            pause = _retry_after_sec(retry_after)
+            if status is None or status in THROTTLE_STATUSES or pause is not None:
+                self.counts["errors" if status is None else "throttled"] += 1
+                self._decrease(pause)
+            else:
+                slow = latency > p.slow_latency_sec or (
+                    self.latency_avg is not None and latency > p.slow_factor * self.latency_avg
+                )
+                if not slow:
+                    self.rate = min(p.max_rate, self.rate + p.rate_step / self.rate)
+                    self.concurrency = min(p.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+                self.latency_avg = latency if self.latency_avg is None else 0.8 * self.latency_avg + 0.2 * latency
+                self._latencies.append(latency)
+            self._cond.notify_all()
+
+    def latency_p95(self) -> float | None:
+        """95th percentile of recent healthy response latencies, once enough are known."""
+        with self._cond:
+            if len(self._latencies) < LATENCY_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def _decrease(self, pause: float | None) -> None:
+        p = self.policy
+        now = time.monotonic()
+        if pause:
+            self._paused_until = max(self._paused_until, now + min(pause, p.max_pause_sec))
+        # Requests already in flight see the same overload; cut once per round trip.
+        if now - self._last_decrease < max(1.0 / self.rate, self.latency_avg or 0.0):
+            return
+        self._last_decrease = now
+        self.counts["decreases"] += 1
+        self.rate = max(p.min_rate, self.rate * p.decrease)
+        self.concurrency = max(1.0, self.concurrency * p.decrease)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"rate": round(self.rate, 3), "concurrency": round(self.concurrency, 3), **self.counts}
+
+
+_lock = threading.Lock()
+_limiters: dict[str, HostLimiter] = {}
+_saved: dict[str, dict] | None = None
+
+
+def _load_saved() -> dict[str, dict]:
+    try:
+        data = json.loads(limits_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class _Unpaced:
+    """HostLimiter stand-in for replayed traffic: no caps, no pacing, no hedging."""
+
+    host = ""
+
+    def acquire(self) -> None:
+        pass
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def cancel(self) -> None:
+        pass
+
+    def release(self, status: int | None, latency: float, retry_after: str | None = None) -> None:
+        pass
+
+    def latency_p95(self) -> float | None:
+        return None
+
+
+UNPACED = _Unpaced()
+
+
+def host_limiter(url: str) -> HostLimiter:
+    """The shared limiter for `url`'s host, seeded from the saved limits on first use."""
+    global _saved
+    if http_mode() == "replay":
+        return UNPACED
+    host = (urlsplit(url).hostname or "").lower()
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            if _saved is None:
+                _saved = _load_saved()
+            saved = _saved.get(host) or {}
+            limiter = _limiters[host] = HostLimiter(host, rate=saved.get("rate"), concurrency=saved.get("concurrency"))
+        return limiter
+
+
+def save_host_limits() -> None:
+    """Merge the limits learned by this process into the saved file (live runs only)."""
+    if http_mode() != "off":
+        return
+    with _lock:
+        limiters = list(_limiters.values())
+    if not limiters:
+        return
+    data = _load_saved()
+    for limiter in limiters:
+        st = limiter.snapshot()
+        data[limiter.host] = {"rate": st["rate"], "concurrency": st["concurrency"], "updated_at": int(time.time())}
+    path = limits_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def reset_host_limiters() -> None:
+    global _saved
+    with _lock:
+        _limiters.clear()
+        _saved = None
+
+
+def print_host_limits() -> None:
+    with _lock:
+        limiters = sorted(_limiters.values(), key=lambda x: x.host)
+    for limiter in limiters:
+        st = limiter.snapshot()
+        print(
+            f"Host rate {limiter.host}: {st['rate']:.2f} req/s concurrency={st['concurrency']:.1f} "
+            f"requests={st['requests']} throttled={st['throttled']} decreases={st['decreases']}"
+        )
@@ -0,0 +1,311 @@
+"""
+Record/replay transport for collector sessions.
+
+    COLLECTOR_HTTP_MODE=record   responses are saved to the corpus as they are fetched
+    COLLECTOR_HTTP_MODE=replay   requests are served from the corpus by a local stand-in server
+
+The corpus lives in COLLECTOR_HTTP_CORPUS (default <cache dir>/http_corpus), one gzipped
+JSON file per request at <collector>/<key>.json.gz, where key hashes method, URL and body.
+
+In replay mode the session's adapter rewrites each request to a ReplayServer on
+127.0.0.1, so pooling, keep-alive, concurrency and the collectors' retry loops all run
+over a real socket. COLLECTOR_HTTP_LATENCY_MS and COLLECTOR_HTTP_RATE_429 configure
+the server started in-process; COLLECTOR_HTTP_REPLAY_URL points at one started with
+
+    python -m backend.py.collectors.replay --latency-ms 80 --rate-429 0.02 --port 8765
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from backend.py.storage.detail_cache import cache_dir
+
+MODES = ("off", "record", "replay")
+# Not recorded; chosen so collectors neither retry it nor read it as "posting removed".
+MISS_STATUS = 501
+# Hop-by-hop / encoding headers that no longer describe the stored (decoded) body.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def http_mode() -> str:
+    mode = (os.environ.get("COLLECTOR_HTTP_MODE") or "off").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"COLLECTOR_HTTP_MODE must be one of {MODES}, got {mode!r}")
+    return mode
+
+
+def corpus_dir() -> Path:
+    return Path(os.environ.get("COLLECTOR_HTTP_CORPUS") or cache_dir() / "http_corpus")
+
+
+def request_key(method: str, url: str, body: bytes | str | None) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    h = hashlib.sha1(f"{method.upper()} {url}\n".encode("utf-8"))
+    h.update(body or b"")
+    return h.hexdigest()
+
+
+class Corpus:
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root is not None else corpus_dir()
+
+    def path(self, name: str, key: str) -> Path:
+        return self.root / name / f"{key}.json.gz"
+
+    def save(self, name: str, key: str, entry: dict) -> None:
+        path = self.path(name, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def load(self, name: str, key: str) -> dict | None:
+        try:
+            with gzip.open(self.path(name, key), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Passes requests through and saves every response (body decoded) to the corpus."""
+
+    def __init__(self, name: str, corpus: Corpus, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        content = resp.content
+        headers = [(k, v) for k, v in resp.raw.headers.items() if k.lower() not in _DROP_HEADERS]
+        self.corpus.save(
+            self.name,
+            request_key(request.method, request.url, request.body),
+            {
+                "method": request.method,
+                "url": request.url,
+                "status": resp.status_code,
+                "reason": resp.reason,
+                "headers": headers,
+                "body": base64.b64encode(content).decode("ascii"),
+                "recorded_at": time.time(),
+            },
+        )
+        # Hand back a fresh response over the buffered body so stream=True callers
+        # (resp.raw, iter_content) still see the whole payload.
+        raw = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=headers + [("Content-Length", str(len(content)))],
+            status=resp.status_code,
+            reason=resp.reason,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to a ReplayServer instead of the origin."""
+
+    def __init__(self, name: str, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        local = request.copy()
+        local.url = f"{self.base_url}/{self.name}/{request_key(request.method, request.url, request.body)}"
+        resp = super().send(local, **kwargs)
+        resp.request = request
+        resp.url = request.url
+        return resp
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the career sites: serves recorded responses after `latency_ms`
+    (± `jitter_ms`) and answers a `rate_429` share of requests with 429 Too Many Requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        corpus: Corpus,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        seed: int | None = None,
+    ):
+        super().__init__((host, port), _ReplayHandler)
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], dict | None] = {}
+        self.counts = {"requests": 0, "served": 0, "throttled": 0, "missing": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def entry(self, name: str, key: str) -> dict | None:
+        with self._lock:
+            if (name, key) in self._entries:
+                return self._entries[(name, key)]
+        entry = self.corpus.load(name, key)
+        if entry is not None:
+            entry["body"] = base64.b64decode(entry["body"])
+        with self._lock:
+            self._entries[(name, key)] = entry
+        return entry
+
+    def draw(self) -> tuple[float, bool]:
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            return delay, self._rng.random() < self.rate_429
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            self.counts[field] += 1
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.serve_forever, name="replay-server", daemon=True).start()
+        return self
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def _reply(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        srv = self.server
+        srv.count("requests")
+        delay, throttle = srv.draw()
+        if delay:
+            time.sleep(delay)
+
+        parts = self.path.strip("/").split("/")
+        entry = srv.entry(parts[0], parts[1]) if len(parts) == 2 else None
+        if throttle:
+            srv.count("throttled")
+            self._send(429, "Too Many Requests", [("Retry-After", str(srv.retry_after))], b"")
+        elif entry is None:
+            srv.count("missing")
+            self._send(MISS_STATUS, "Not Recorded", [], b"no recorded response for this request")
+        else:
+            srv.count("served")
+            self._send(entry["status"], entry.get("reason") or "", entry["headers"], entry["body"])
+
+    def _send(self, status: int, reason: str, headers: list, body: bytes) -> None:
+        self.send_response(status, reason)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = do_PUT = _reply
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+_server_lock = threading.Lock()
+_server: ReplayServer | None = None
+
+
+def replay_server() -> ReplayServer:
+    """In-process replay server, configured from the environment on first use."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ReplayServer(
+                Corpus(),
+                latency_ms=float(os.environ.get("COLLECTOR_HTTP_LATENCY_MS") or 0),
+                jitter_ms=float(os.environ.get("COLLECTOR_HTTP_JITTER_MS") or 0),
+                rate_429=float(os.environ.get("COLLECTOR_HTTP_RATE_429") or 0),
+            ).start()
+        return _server
+
+
+def stop_replay_server() -> None:
+    global _server
+    with _server_lock:
+        srv, _server = _server, None
+    if srv is not None:
+        srv.shutdown()
+        srv.server_close()
+
+
+def make_adapter(name: str, **pool_kwargs) -> HTTPAdapter:
+    """Adapter for a collector session according to COLLECTOR_HTTP_MODE."""
+    mode = http_mode()
+    if mode == "record":
+        return RecordingAdapter(name, Corpus(), **pool_kwargs)
+    if mode == "replay":
+        base_url = os.environ.get("COLLECTOR_HTTP_REPLAY_URL") or replay_server().base_url
+        return ReplayAdapter(name, base_url, **pool_kwargs)
+    return HTTPAdapter(**pool_kwargs)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Serve a recorded collector corpus on localhost.")
+    p.add_argument("--corpus", default=None, help="Corpus directory (default: COLLECTOR_HTTP_CORPUS).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0)
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=None)
+    args = p.parse_args()
+
+    srv = ReplayServer(
+        Corpus(args.corpus),
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        seed=args.seed,
+    )
+    print(f"Replaying {srv.corpus.root} on {srv.base_url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        print("Counts:", srv.counts)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+"""
+Generic Workday career-site collector, driven by a tenant registry.
+
+Every Workday site exposes the same JSON API under
+{base}/wday/cxs/{tenant}/{site}/: POST jobs for listing pages (with facet filters) and
+GET {externalPath} for a posting's detail. A tenant is therefore just configuration:
+
+    {"key": "nvidia", "company_name": "NVIDIA",
+     "base": "https://nvidia.wd5.myworkdayjobs.com", "tenant": "nvidia",
+     "site": "NVIDIAExternalCareerSite", "location_parser": "workday"}
+
+Tenants are read from workday_tenants.json next to this module, or from the JSON file
+named by COMPANYLOC_WORKDAY_TENANTS. Optional fields: referer (default {base}/{site}/),
+extra_search_texts (targeted searches merged into the listing, for sites whose broad
+query is capped), location_parser (see pipeline.workday.LOCATION_PARSERS) and
+scheduled (include the tenant when pipeline.ingest_workday runs without --companies;
+default true).
+
+Each tenant has its own collector session, so requests are paced by the per-host AIMD
+limiter of its host (collectors.ratelimit); crawling many tenants at once spreads over
+hosts, and tenants that share a host share its limit.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from backend.py.collectors.facets import (
+    WORKDAY_RESULT_CAP,
+    WORKDAY_SPLIT_FACETS,
+    crawl_facet_partitions,
+    flatten_workday_facets,
+)
+from backend.py.collectors.http import WORKDAY_RETRY_POLICY, configure_session, request_with_retry
+from backend.py.collectors.pagination import DEFAULT_WORKERS, fetch_offset_sharded
+from backend.py.storage.detail_cache import DetailCache, listing_fingerprint
+
+DEFAULT_REGISTRY = Path(__file__).with_name("workday_tenants.json")
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+)
+
+
+@dataclass(frozen=True)
+class WorkdayTenant:
+    key: str
+    company_name: str
+    base: str
+    tenant: str
+    site: str
+    referer: Optional[str] = None
+    location_parser: str = "workday"
+    extra_search_texts: tuple[str, ...] = ()
+    scheduled: bool = True
+    session_name: str = field(default="")
+
+    def __post_init__(self):
+        if not self.session_name:
+            object.__setattr__(self, "session_name", self.key)
+
+    @property
+    def api_root(self) -> str:
+        return f"{self.base}/wday/cxs/{self.tenant}/{self.site}"
+
+    @property
+    def list_url(self) -> str:
+        return f"{self.api_root}/jobs"
+
+    @property
+    def detail_cache_namespace(self) -> str:
+        return f"workday:{self.tenant}/{self.site}"
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+            "Origin": self.base,
+            "Referer": self.referer or f"{self.base}/{self.site}/",
+        }
+
+
+def registry_path() -> Path:
+    return Path(os.environ.get("COMPANYLOC_WORKDAY_TENANTS") or DEFAULT_REGISTRY)
+
+
+def load_tenants(path: str | Path | None = None) -> dict[str, WorkdayTenant]:
+    """Registry entries by key, in file order."""
+    entries = json.loads(Path(path or registry_path()).read_text(encoding="utf-8"))
+    out = {}
+    for entry in entries:
+        entry = dict(entry)
+        entry["extra_search_texts"] = tuple(entry.get("extra_search_texts") or ())
+        tenant = WorkdayTenant(**entry)
+        if tenant.key in out:
+            raise ValueError(f"duplicate Workday tenant key: {tenant.key}")
+        out[tenant.key] = tenant
+    return out
+
+
+_tenants: Optional[dict[str, WorkdayTenant]] = None
+_clients: dict[str, "WorkdayClient"] = {}
+
+
+def workday_tenants() -> dict[str, WorkdayTenant]:
+    """The registry, read once per process."""
+    global _tenants
+    if _tenants is None:
+        _tenants = load_tenants()
+    return _tenants
+
+
+def workday_client(key: str) -> "WorkdayClient":
+    client = _clients.get(key)
+    if client is None:
+        tenant = workday_tenants().get(key)
+        if tenant is None:
+            raise KeyError(f"unknown Workday tenant: {key}")
+        client = _clients.setdefault(key, WorkdayClient(tenant))
+    return client
+
+
+def _dedupe(values: list[str]) -> list[str]:
+    seen = set()
+    out = []
+    for x in values:
+        if x not in seen:
+            seen.add(x)
+            out.append(x)
+    return out
+
+
+def is_multi_location_text(s: str) -> bool:
+    if not s:
+        return False
+    s = s.strip()
+    # e.g. "2 Locations"
+    return s.endswith("Locations") and s.split(" ")[0].isdigit()
+
+
+class WorkdayClient:
+    """Listing and detail calls for one tenant, on the tenant's own collector session."""
+
+    def __init__(self, tenant: WorkdayTenant):
+        self.tenant = tenant
+        self.session_name = tenant.session_name
+        configure_session(self.session_name, headers=tenant.headers, policy=WORKDAY_RETRY_POLICY)
+
+    def fetch_jobs_page(self, limit=20, offset=0, search_text="", applied_facets=None) -> dict:
+        payload = {
+            "appliedFacets": applied_facets or {},
+            "limit": limit,
+            "offset": offset,
+            "searchText": search_text,
+        }
+        resp = request_with_retry(self.session_name, "POST", self.tenant.list_url, json=payload, hedge=True)
+        return resp.json()
+
+    def _fetch_all_for_search(self, limit=20, search_text="", workers=DEFAULT_WORKERS, stats=None):
+        def probe(applied):
+            page = self.fetch_jobs_page(limit=limit, offset=0, search_text=search_text, applied_facets=applied)
+            return int(page.get("total", 0) or 0), page.get("jobPostings", []), flatten_workday_facets(page.get("facets"))
+
+        def crawl(applied, first):
+            def fetch_page(offset, page_limit):
+                page = self.fetch_jobs_page(
+                    limit=page_limit,
+                    offset=offset,
+                    search_text=search_text,
+                    applied_facets=applied,
+                )
+                return int(page.get("total", 0) or 0), page.get("jobPostings", [])
+
+            # Only the first page's total is reliable; the remaining offsets are known, so
+            # they are fetched in concurrent shards.
+            return fetch_offset_sharded(
+                fetch_page,
+                limit=limit,
+                key_fn=lambda p: p.get("externalPath"),
+                first_page=first,
+                workers=workers if not applied else max(1, workers // 2),
+                max_offset=WORKDAY_RESULT_CAP,
+            )
+
+        # Broad queries capped at ~2000 results are split recursively by country/city/job family facets.
+        total, postings, part_stats = crawl_facet_partitions(
+            probe,
+            crawl,
+            cap=WORKDAY_RESULT_CAP,
+            key_fn=lambda p: p.get("externalPath"),
+            split_order=WORKDAY_SPLIT_FACETS,
+            workers=workers,
+        )
+        if stats is not None:
+            stats.setdefault("searches", []).append({"search_text": search_text, **part_stats})
+        return total, postings
+
+    def fetch_all_jobs(self, limit=20, extra_search_texts=None, workers=DEFAULT_WORKERS, stats=None):
+        """
+        Every posting of the tenant as listing dicts (externalPath, title, locationsText,
+        postedOn, ...); returns (total, postings).
+        """
+        total, postings = self._fetch_all_for_search(limit=limit, search_text="", workers=workers, stats=stats)
+
+        # The broad query can cap at 2000; merge targeted searches by externalPath.
+        searches = self.tenant.extra_search_texts if extra_search_texts is None else extra_search_texts
+        if searches:
+            seen = {p.get("externalPath") for p in postings if p.get("externalPath")}
+            merged = list(postings)
+            for q in searches:
+                if not isinstance(q, str) or not q.strip():
+                    continue
+                _, sub = self._fetch_all_for_search(limit=limit, search_text=q.strip(), workers=workers, stats=stats)
+                for p in sub:
+                    k = p.get("externalPath")
+                    if k and k in seen:
+                        continue
+                    if k:
+                        seen.add(k)
+                    merged.append(p)
+            postings = merged
+
+        return max(total, len(postings)), postings
+
+    def fetch_job_detail_location_payload(self, external_path: str) -> dict:
+        """
+        {"country": ISO/name or None, "locations": [...]} from jobPostingInfo.location,
+        .additionalLocations and .country; a 403 yields no locations instead of failing the run.
+        """
+        if not external_path or not external_path.startswith("/job/"):
+            return {"country": None, "locations": []}
+
+        try:
+            resp = request_with_retry(self.session_name, "GET", f"{self.tenant.api_root}{external_path}")
+            data = resp.json()
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 403:
+                return {"country": None, "locations": []}
+            raise
+
+        jpi = data.get("jobPostingInfo", {}) or {}
+
+        country = jpi.get("country")
+        # Some tenants return {"descriptor", "value"}; keep only a string downstream.
+        if isinstance(country, dict):
+            country = country.get("value") or country.get("descriptor")
+        if isinstance(country, str):
+            country = country.strip() or None
+        else:
+            country = None
+
+        locs = []
+        main_loc = jpi.get("location")
+        if isinstance(main_loc, str) and main_loc.strip():
+            locs.append(main_loc.strip())
+
+        add_locs = jpi.get("additionalLocations")
+        if isinstance(add_locs, list):
+            for x in add_locs:
+                if isinstance(x, str) and x.strip():
+                    locs.append(x.strip())
+
+        return {"country": country, "locations": _dedupe(locs)}
+
+    def get_effective_locations_for_job(
+        self,
+        job_posting: dict,
+        cache: DetailCache | None = None,
+    ) -> tuple[list[str], str | None]:
+        loc_text = job_posting.get("locationsText")
+
+        if isinstance(loc_text, str) and is_multi_location_text(loc_text):
+            external_path = job_posting.get("externalPath")
+            namespace = self.tenant.detail_cache_namespace
+            payload = None
+            fingerprint = listing_fingerprint(job_posting.get("title"), loc_text)
+            if cache is not None and isinstance(external_path, str):
+                payload = cache.get(namespace, external_path, fingerprint)
+            if payload is None:
+                payload = self.fetch_job_detail_location_payload(external_path)
+                if cache is not None and isinstance(external_path, str) and payload.get("locations"):
+                    cache.put(namespace, external_path, fingerprint, payload)
+            locs = payload.get("locations") or []
+            country = payload.get("country")
+
+            # Detail blocked (403): fall back to the listing's summary text.
+            if not locs:
+                return [loc_text], None
+
+            if not isinstance(country, str):
+                country = None
+            return locs, country
+
+        # Single-location postings: keep list page location text.
+        if isinstance(loc_text, str) and loc_text.strip():
+            return [loc_text.strip()], None
+
+        return [], None
@@ -0,0 +1,489 @@
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+# ISO 3166-1: alpha-2, alpha-3, English short name, then common alternative names.
+_COUNTRIES = """
+AD|AND|Andorra
+AE|ARE|United Arab Emirates|UAE
+AF|AFG|Afghanistan
+AG|ATG|Antigua and Barbuda
+AI|AIA|Anguilla
+AL|ALB|Albania
+AM|ARM|Armenia
+AO|AGO|Angola
+AQ|ATA|Antarctica
+AR|ARG|Argentina
+AS|ASM|American Samoa
+AT|AUT|Austria
+AU|AUS|Australia
+AW|ABW|Aruba
+AX|ALA|Aland Islands
+AZ|AZE|Azerbaijan
+BA|BIH|Bosnia and Herzegovina|Bosnia
+BB|BRB|Barbados
+BD|BGD|Bangladesh
+BE|BEL|Belgium
+BF|BFA|Burkina Faso
+BG|BGR|Bulgaria
+BH|BHR|Bahrain
+BI|BDI|Burundi
+BJ|BEN|Benin
+BL|BLM|Saint Barthelemy
+BM|BMU|Bermuda
+BN|BRN|Brunei Darussalam|Brunei
+BO|BOL|Bolivia|Plurinational State of Bolivia
+BQ|BES|Bonaire, Sint Eustatius and Saba|Caribbean Netherlands
+BR|BRA|Brazil|Brasil
+BS|BHS|Bahamas|The Bahamas
+BT|BTN|Bhutan
+BV|BVT|Bouvet Island
+BW|BWA|Botswana
+BY|BLR|Belarus
+BZ|BLZ|Belize
+CA|CAN|Canada
+CC|CCK|Cocos (Keeling) Islands|Cocos Islands
+CD|COD|Congo, Democratic Republic of the|Democratic Republic of the Congo|DR Congo|DRC
+CF|CAF|Central African Republic
+CG|COG|Congo|Republic of the Congo
+CH|CHE|Switzerland|Schweiz|Suisse
+CI|CIV|Cote d'Ivoire|Ivory Coast
+CK|COK|Cook Islands
+CL|CHL|Chile
+CM|CMR|Cameroon
+CN|CHN|China|People's Republic of China|PRC|Mainland China
+CO|COL|Colombia
+CR|CRI|Costa Rica
+CU|CUB|Cuba
+CV|CPV|Cabo Verde|Cape Verde
+CW|CUW|Curacao
+CX|CXR|Christmas Island
+CY|CYP|Cyprus
+CZ|CZE|Czechia|Czech Republic
+DE|DEU|Germany|Deutschland
+DJ|DJI|Djibouti
+DK|DNK|Denmark
+DM|DMA|Dominica
+DO|DOM|Dominican Republic
+DZ|DZA|Algeria
+EC|ECU|Ecuador
+EE|EST|Estonia
+EG|EGY|Egypt
+EH|ESH|Western Sahara
+ER|ERI|Eritrea
+ES|ESP|Spain|Espana
+ET|ETH|Ethiopia
+FI|FIN|Finland|Suomi
+FJ|FJI|Fiji
+FK|FLK|Falkland Islands (Malvinas)|Falkland Islands
+FM|FSM|Micronesia, Federated States of|Micronesia
+FO|FRO|Faroe Islands
+FR|FRA|France
+GA|GAB|Gabon
+GB|GBR|United Kingdom|UK|U.K.|Great Britain|Britain|United Kingdom of Great Britain and Northern Ireland
+GD|GRD|Grenada
+GE|GEO|Georgia
+GF|GUF|French Guiana
+GG|GGY|Guernsey
+GH|GHA|Ghana
+GI|GIB|Gibraltar
+GL|GRL|Greenland
+GM|GMB|Gambia|The Gambia
+GN|GIN|Guinea
+GP|GLP|Guadeloupe
+GQ|GNQ|Equatorial Guinea
+GR|GRC|Greece
+GS|SGS|South Georgia and the South Sandwich Islands
+GT|GTM|Guatemala
+GU|GUM|Guam
+GW|GNB|Guinea-Bissau
+GY|GUY|Guyana
+HK|HKG|Hong Kong|Hong Kong SAR|Hong Kong SAR China
+HM|HMD|Heard Island and McDonald Islands
+HN|HND|Honduras
+HR|HRV|Croatia
+HT|HTI|Haiti
+HU|HUN|Hungary
+ID|IDN|Indonesia
+IE|IRL|Ireland|Republic of Ireland
+IL|ISR|Israel
+IM|IMN|Isle of Man
+IN|IND|India
+IO|IOT|British Indian Ocean Territory
+IQ|IRQ|Iraq
+IR|IRN|Iran|Islamic Republic of Iran
+IS|ISL|Iceland
+IT|ITA|Italy|Italia
+JE|JEY|Jersey
+JM|JAM|Jamaica
+JO|JOR|Jordan
+JP|JPN|Japan
+KE|KEN|Kenya
+KG|KGZ|Kyrgyzstan
+KH|KHM|Cambodia
+KI|KIR|Kiribati
+KM|COM|Comoros
+KN|KNA|Saint Kitts and Nevis
+KP|PRK|Korea, Democratic People's Republic of|North Korea
+KR|KOR|Korea, Republic of|South Korea|Korea|Republic of Korea
+KW|KWT|Kuwait
+KY|CYM|Cayman Islands
+KZ|KAZ|Kazakhstan
+LA|LAO|Lao People's Democratic Republic|Laos
+LB|LBN|Lebanon
+LC|LCA|Saint Lucia
+LI|LIE|Liechtenstein
+LK|LKA|Sri Lanka
+LR|LBR|Liberia
+LS|LSO|Lesotho
+LT|LTU|Lithuania
+LU|LUX|Luxembourg
+LV|LVA|Latvia
+LY|LBY|Libya
+MA|MAR|Morocco
+MC|MCO|Monaco
+MD|MDA|Moldova|Republic of Moldova
+ME|MNE|Montenegro
+MF|MAF|Saint Martin (French part)|Saint Martin
+MG|MDG|Madagascar
+MH|MHL|Marshall Islands
+MK|MKD|North Macedonia|Macedonia
+ML|MLI|Mali
+MM|MMR|Myanmar|Burma
+MN|MNG|Mongolia
+MO|MAC|Macao|Macau|Macao SAR China
+MP|MNP|Northern Mariana Islands
+MQ|MTQ|Martinique
+MR|MRT|Mauritania
+MS|MSR|Montserrat
+MT|MLT|Malta
+MU|MUS|Mauritius
+MV|MDV|Maldives
+MW|MWI|Malawi
+MX|MEX|Mexico
+MY|MYS|Malaysia
+MZ|MOZ|Mozambique
+NA|NAM|Namibia
+NC|NCL|New Caledonia
+NE|NER|Niger
+NF|NFK|Norfolk Island
+NG|NGA|Nigeria
+NI|NIC|Nicaragua
+NL|NLD|Netherlands|The Netherlands|Holland|Nederland
+NO|NOR|Norway|Norge
+NP|NPL|Nepal
+NR|NRU|Nauru
+NU|NIU|Niue
+NZ|NZL|New Zealand
+OM|OMN|Oman
+PA|PAN|Panama
+PE|PER|Peru
+PF|PYF|French Polynesia
+PG|PNG|Papua New Guinea
+PH|PHL|Philippines
+PK|PAK|Pakistan
+PL|POL|Poland|Polska
+PM|SPM|Saint Pierre and Miquelon
+PN|PCN|Pitcairn
+PR|PRI|Puerto Rico
+PS|PSE|Palestine, State of|Palestine
+PT|PRT|Portugal
+PW|PLW|Palau
+PY|PRY|Paraguay
+QA|QAT|Qatar
+RE|REU|Reunion
+RO|ROU|Romania
+RS|SRB|Serbia
+RU|RUS|Russian Federation|Russia
+RW|RWA|Rwanda
+SA|SAU|Saudi Arabia|KSA
+SB|SLB|Solomon Islands
+SC|SYC|Seychelles
+SD|SDN|Sudan
+SE|SWE|Sweden|Sverige
+SG|SGP|Singapore
+SH|SHN|Saint Helena, Ascension and Tristan da Cunha|Saint Helena
+SI|SVN|Slovenia
+SJ|SJM|Svalbard and Jan Mayen
+SK|SVK|Slovakia|Slovak Republic
+SL|SLE|Sierra Leone
+SM|SMR|San Marino
+SN|SEN|Senegal
+SO|SOM|Somalia
+SR|SUR|Suriname
+SS|SSD|South Sudan
+ST|STP|Sao Tome and Principe
+SV|SLV|El Salvador
+SX|SXM|Sint Maarten (Dutch part)|Sint Maarten
+SY|SYR|Syrian Arab Republic|Syria
+SZ|SWZ|Eswatini|Swaziland
+TC|TCA|Turks and Caicos Islands
+TD|TCD|Chad
+TF|ATF|French Southern Territories
+TG|TGO|Togo
+TH|THA|Thailand
+TJ|TJK|Tajikistan
+TK|TKL|Tokelau
+TL|TLS|Timor-Leste|East Timor
+TM|TKM|Turkmenistan
+TN|TUN|Tunisia
+TO|TON|Tonga
+TR|TUR|Turkiye|Turkey
+TT|TTO|Trinidad and Tobago
+TV|TUV|Tuvalu
+TW|TWN|Taiwan|Taiwan, Province of China|Chinese Taipei
+TZ|TZA|Tanzania|United Republic of Tanzania
+UA|UKR|Ukraine
+UG|UGA|Uganda
+UM|UMI|United States Minor Outlying Islands
+US|USA|United States|United States of America|U.S.|U.S.A.
+UY|URY|Uruguay
+UZ|UZB|Uzbekistan
+VA|VAT|Holy See|Vatican City|Vatican
+VC|VCT|Saint Vincent and the Grenadines
+VE|VEN|Venezuela|Bolivarian Republic of Venezuela
+VG|VGB|Virgin Islands, British|British Virgin Islands
+VI|VIR|Virgin Islands, U.S.|US Virgin Islands
+VN|VNM|Viet Nam|Vietnam
+VU|VUT|Vanuatu
+WF|WLF|Wallis and Futuna
+WS|WSM|Samoa
+XK|XKX|Kosovo
+YE|YEM|Yemen
+YT|MYT|Mayotte
+ZA|ZAF|South Africa
+ZM|ZMB|Zambia
+ZW|ZWE|Zimbabwe
+"""
+
+# ISO 3166-2 subdivisions for the countries postings come from most: country, code, names.
+_SUBDIVISIONS = """
+US|AL|Alabama
+US|AK|Alaska
+US|AZ|Arizona
+US|AR|Arkansas
+US|CA|California
+US|CO|Colorado
+US|CT|Connecticut
+US|DE|Delaware
+US|DC|District of Columbia|Washington DC|Washington, D.C.
+US|FL|Florida
+US|GA|Georgia
+US|HI|Hawaii
+US|ID|Idaho
+US|IL|Illinois
+US|IN|Indiana
+US|IA|Iowa
+US|KS|Kansas
+US|KY|Kentucky
+US|LA|Louisiana
+US|ME|Maine
+US|MD|Maryland
+US|MA|Massachusetts
+US|MI|Michigan
+US|MN|Minnesota
+US|MS|Mississippi
+US|MO|Missouri
+US|MT|Montana
+US|NE|Nebraska
+US|NV|Nevada
+US|NH|New Hampshire
+US|NJ|New Jersey
+US|NM|New Mexico
+US|NY|New York
+US|NC|North Carolina
+US|ND|North Dakota
+US|OH|Ohio
+US|OK|Oklahoma
+US|OR|Oregon
+US|PA|Pennsylvania
+US|RI|Rhode Island
+US|SC|South Carolina
+US|SD|South Dakota
+US|TN|Tennessee
+US|TX|Texas
+US|UT|Utah
+US|VT|Vermont
+US|VA|Virginia
+US|WA|Washington
+US|WV|West Virginia
+US|WI|Wisconsin
+US|WY|Wyoming
+CA|AB|Alberta
+CA|BC|British Columbia
+CA|MB|Manitoba
+CA|NB|New Brunswick
+CA|NL|Newfoundland and Labrador
+CA|NS|Nova Scotia
+CA|NT|Northwest Territories
+CA|NU|Nunavut
+CA|ON|Ontario
+CA|PE|Prince Edward Island
+CA|QC|Quebec
+CA|SK|Saskatchewan
+CA|YT|Yukon
+AU|ACT|Australian Capital Territory
+AU|NSW|New South Wales
+AU|NT|Northern Territory
+AU|QLD|Queensland
+AU|SA|South Australia
+AU|TAS|Tasmania
+AU|VIC|Victoria
+AU|WA|Western Australia
+DE|BW|Baden-Wurttemberg|Baden-Wuerttemberg
+DE|BY|Bavaria|Bayern
+DE|BE|Berlin
+DE|BB|Brandenburg
+DE|HB|Bremen
+DE|HH|Hamburg
+DE|HE|Hesse|Hessen
+DE|MV|Mecklenburg-Vorpommern
+DE|NI|Lower Saxony|Niedersachsen
+DE|NW|North Rhine-Westphalia|Nordrhein-Westfalen
+DE|RP|Rhineland-Palatinate|Rheinland-Pfalz
+DE|SL|Saarland
+DE|SN|Saxony|Sachsen
+DE|ST|Saxony-Anhalt|Sachsen-Anhalt
+DE|SH|Schleswig-Holstein
+DE|TH|Thuringia|Thuringen
+GB|ENG|England
+GB|NIR|Northern Ireland
+GB|SCT|Scotland
+GB|WLS|Wales
+IN|AP|Andhra Pradesh
+IN|AS|Assam
+IN|BR|Bihar
+IN|CT|Chhattisgarh
+IN|DL|Delhi|New Delhi|NCT of Delhi
+IN|GA|Goa
+IN|GJ|Gujarat
+IN|HR|Haryana
+IN|HP|Himachal Pradesh
+IN|JH|Jharkhand
+IN|KA|Karnataka
+IN|KL|Kerala
+IN|MP|Madhya Pradesh
+IN|MH|Maharashtra
+IN|OR|Odisha
+IN|PB|Punjab
+IN|RJ|Rajasthan
+IN|TN|Tamil Nadu
+IN|TG|Telangana
+IN|UP|Uttar Pradesh
+IN|UT|Uttarakhand
+IN|WB|West Bengal
+CN|BJ|Beijing
+CN|SH|Shanghai
+CN|GD|Guangdong
+CN|JS|Jiangsu
+CN|ZJ|Zhejiang
+CN|SC|Sichuan
+CN|HB|Hubei
+CN|TJ|Tianjin
+CN|CQ|Chongqing
+CN|SN|Shaanxi
+BR|SP|Sao Paulo
+BR|RJ|Rio de Janeiro
+BR|MG|Minas Gerais
+BR|RS|Rio Grande do Sul
+BR|PR|Parana
+BR|SC|Santa Catarina
+MX|JAL|Jalisco
+MX|CMX|Ciudad de Mexico|Mexico City|CDMX
+MX|NLE|Nuevo Leon
+"""
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fold(text: str) -> str:
+    """Lookup key: accents stripped, case-folded, punctuation dropped, spaces collapsed."""
+    s = unicodedata.normalize("NFKD", text)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).casefold()
+    s = _PUNCT_RE.sub(" ", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+class Gazetteer:
+    """
+    In-memory country and subdivision index.
+
+    Exact lookups go through a hash of folded names and codes; `scan` walks a token trie
+    of country names to find one embedded in a longer string ("Remote - United States").
+    Subdivision codes and alpha-3 codes only match in upper case, and `scan` ignores codes,
+    so words like "in" or "de" inside place names never count as codes.
+    """
+
+    def __init__(self, countries: Iterable[tuple[str, str, list[str]]], subdivisions: Iterable[tuple[str, str, list[str]]]):
+        self._codes: dict[str, str] = {}
+        self._names: dict[str, str] = {}
+        self._sub_codes: dict[str, list[tuple[str, str]]] = {}
+        self._sub_names: dict[str, list[tuple[str, str]]] = {}
+        self._trie: dict = {}
+        for iso2, iso3, names in countries:
+            self._codes[iso2] = iso2
+            self._codes[iso3] = iso2
+            for name in names:
+                key = fold(name)
+                self._names.setdefault(key, iso2)
+                self._insert(key, iso2)
+        for country, code, names in subdivisions:
+            self._sub_codes.setdefault(code, []).append((country, code))
+            for name in names:
+                self._sub_names.setdefault(fold(name), []).append((country, code))
+
+    @classmethod
+    def default(cls) -> "Gazetteer":
+        return cls(_parse(_COUNTRIES, 2), _parse(_SUBDIVISIONS, 2))
+
+    def _insert(self, key: str, iso2: str) -> None:
+        node = self._trie
+        for token in key.split(" "):
+            node = node.setdefault(token, {})
+        node[None] = iso2
+
+    def country(self, text: str) -> Optional[str]:
+        """ISO-2 for a country name, alias, or ISO alpha-2/alpha-3 code; None if unknown."""
+        s = text.strip()
+        code = s.upper() if len(s) == 2 else s
+        if code in self._codes:
+            return self._codes[code]
+        return self._names.get(fold(s))
+
+    def subdivisions(self, text: str) -> list[tuple[str, str]]:
+        """(country ISO-2, subdivision code) pairs a name or upper-case code may refer to."""
+        s = text.strip()
+        found = list(self._sub_names.get(fold(s), ()))
+        if s.isupper():
+            found += [x for x in self._sub_codes.get(s, ()) if x not in found]
+        return found
+
+    def scan(self, text: str) -> Optional[str]:
+        """Country whose name appears in `text` as whole words; the last, longest match wins."""
+        tokens = fold(text).split(" ")
+        found = None
+        i = 0
+        while i < len(tokens):
+            node, match, end = self._trie, None, i + 1
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    match, end = node[None], j + 1
+            if match is not None:
+                found = match
+            i = end
+        return found
+
+
+def _parse(table: str, n_codes: int) -> list[tuple[str, str, list[str]]]:
+    rows = []
+    for line in table.strip().splitlines():
+        fields = line.split("|")
+        rows.append((*fields[:n_codes], fields[n_codes:]))
+    return rows
+
+
+GAZETTEER = Gazetteer.default()
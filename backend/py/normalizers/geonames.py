@@ -0,0 +1,293 @@
+"""
+Offline city gazetteer built from a GeoNames dump.
+
+    # cities15000.zip and admin1CodesASCII.txt from https://download.geonames.org/export/dump/
+    python -m backend.py.normalizers.geonames build --cities cities15000.txt \
+        --admin1 admin1CodesASCII.txt
+    python -m backend.py.normalizers.geonames lookup "Santa Clara" --country US --region CA
+
+The index is a single little-endian file (default .cache/geonames.idx, or
+COMPANYLOC_GEONAMES_INDEX) that is memory-mapped, not loaded:
+
+    header    magic, record / name / fuzzy-key counts, string blob size
+    records   fixed-size: geonameid, lat, lon, population, name and admin1 string offsets, country
+    names     sorted 64-bit hashes of every folded name and alternate name + record numbers
+    fuzzy     sorted hashes of each name's single-character deletions + record numbers
+    strings   length-prefixed UTF-8
+
+Exact lookups are a binary search over the name hashes; fuzzy lookups (one edit) use
+symmetric deletion: the query's deletions are looked up in the fuzzy table and candidates
+are verified by edit distance.
+"""
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from backend.py.normalizers.gazetteer import fold
+from backend.py.storage.detail_cache import cache_dir
+
+MAGIC = b"GNIDX001"
+_HEADER = struct.Struct("<8sIIII")
+# geonameid, lat, lon, population, name offset, admin1 offset, country, padding
+_RECORD = struct.Struct("<IffIII2s2x")
+# Shorter names produce too many one-edit neighbours to be useful.
+FUZZY_MIN_LEN = 4
+
+
+class GeoPlace(NamedTuple):
+    geoname_id: int
+    name: str
+    country: str
+    admin1_code: Optional[str]
+    admin1_name: Optional[str]
+    latitude: float
+    longitude: float
+    population: int
+
+
+def default_index_path() -> Path:
+    return Path(os.environ.get("COMPANYLOC_GEONAMES_INDEX") or cache_dir() / "geonames.idx")
+
+
+def name_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _deletions(key: str) -> set[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1, or a single adjacent transposition."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+# --- build ---
+
+def _read_admin1(path: Optional[Path]) -> dict[str, str]:
+    if path is None:
+        return {}
+    out = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 2:
+                out[fields[0]] = fields[1]
+    return out
+
+
+def _read_cities(path: Path) -> Iterator[list[str]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 15 and fields[6] == "P":
+                yield fields
+
+
+def build_index(cities: Path, out: Path, admin1: Optional[Path] = None) -> dict:
+    """Write the index for a GeoNames cities*.txt dump (populated places only)."""
+    admin1_names = _read_admin1(admin1)
+    strings = bytearray()
+    string_offsets: dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        off = string_offsets.get(s)
+        if off is None:
+            raw = s.encode("utf-8")[:0xFFFF]
+            off = string_offsets[s] = len(strings)
+            strings.extend(struct.pack("<H", len(raw)) + raw)
+        return off
+
+    records = bytearray()
+    names: set[tuple[int, int]] = set()
+    fuzzy: set[tuple[int, int]] = set()
+    for idx, f in enumerate(_read_cities(cities)):
+        geoname_id, name, ascii_name, alternates = int(f[0]), f[1], f[2], f[3]
+        country, admin1_code = f[8], f[10]
+        admin1_label = f"{admin1_code}\t{admin1_names.get(f'{country}.{admin1_code}', '')}" if admin1_code else ""
+        records += _RECORD.pack(
+            geoname_id,
+            float(f[4]),
+            float(f[5]),
+            int(f[14] or 0),
+            intern(name),
+            intern(admin1_label),
+            country.encode("ascii")[:2].ljust(2),
+        )
+        for alt in {name, ascii_name, *alternates.split(",")}:
+            key = fold(alt)
+            if key:
+                names.add((name_hash(key), idx))
+        key = fold(ascii_name or name)
+        if len(key) >= FUZZY_MIN_LEN:
+            for variant in _deletions(key) | {key}:
+                fuzzy.add((name_hash(variant), idx))
+    n_records = len(records) // _RECORD.size
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    with open(tmp, "wb") as w:
+        w.write(_HEADER.pack(MAGIC, n_records, len(names), len(fuzzy), len(strings)))
+        w.write(records)
+        for table in (sorted(names), sorted(fuzzy)):
+            w.write(b"\0" * (-w.tell() % 8))
+            w.write(struct.pack(f"<{len(table)}Q", *(h for h, _ in table)))
+            w.write(struct.pack(f"<{len(table)}I", *(i for _, i in table)))
+        w.write(strings)
+    os.replace(tmp, out)
+    return {"records": n_records, "names": len(names), "fuzzy_keys": len(fuzzy), "bytes": out.stat().st_size}
+
+
+# --- lookup ---
+
+class GeoIndex:
+    """Read-only view of an index file; lookups touch only the pages they need."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_records, n_names, n_fuzzy, n_strings = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a geonames index: {self.path}")
+        view = memoryview(self._mm)
+        self._records_at = _HEADER.size
+        pos = self._records_at + self.n_records * _RECORD.size
+        self._names, self._name_recs, pos = self._table(view, pos, n_names)
+        self._fuzzy, self._fuzzy_recs, pos = self._table(view, pos, n_fuzzy)
+        self._strings_at = pos
+
+    @staticmethod
+    def _table(view: memoryview, pos: int, n: int):
+        pos += -pos % 8
+        keys = view[pos:pos + 8 * n].cast("Q")
+        pos += 8 * n
+        recs = view[pos:pos + 4 * n].cast("I")
+        return keys, recs, pos + 4 * n
+
+    @classmethod
+    def open_default(cls) -> Optional["GeoIndex"]:
+        path = default_index_path()
+        return cls(path) if path.exists() else None
+
+    def close(self) -> None:
+        for table in (self._names, self._name_recs, self._fuzzy, self._fuzzy_recs):
+            table.release()
+        self._mm.close()
+        self._file.close()
+
+    def _string(self, off: int) -> str:
+        at = self._strings_at + off
+        (n,) = struct.unpack_from("<H", self._mm, at)
+        return self._mm[at + 2:at + 2 + n].decode("utf-8")
+
+    def place(self, idx: int) -> GeoPlace:
+        gid, lat, lon, pop, name_off, admin1_off, country = _RECORD.unpack_from(
+            self._mm, self._records_at + idx * _RECORD.size
+        )
+        admin1 = self._string(admin1_off)
+        code, _, admin1_name = admin1.partition("\t")
+        return GeoPlace(gid, self._string(name_off), country.decode("ascii"), code or None, admin1_name or None, lat, lon, pop)
+
+    @staticmethod
+    def _records_for(keys: memoryview, recs: memoryview, h: int) -> Iterator[int]:
+        i = bisect.bisect_left(keys, h)
+        while i < len(keys) and keys[i] == h:
+            yield recs[i]
+            i += 1
+
+    def exact(self, name: str) -> list[GeoPlace]:
+        key = fold(name)
+        return [self.place(i) for i in self._records_for(self._names, self._name_recs, name_hash(key))] if key else []
+
+    def fuzzy(self, name: str) -> list[GeoPlace]:
+        key = fold(name)
+        if len(key) < FUZZY_MIN_LEN:
+            return []
+        seen: set[int] = set()
+        out = []
+        for variant in _deletions(key) | {key}:
+            for i in self._records_for(self._fuzzy, self._fuzzy_recs, name_hash(variant)):
+                if i in seen:
+                    continue
+                seen.add(i)
+                place = self.place(i)
+                if within_one_edit(key, fold(place.name)):
+                    out.append(place)
+        return out
+
+    def lookup(self, name: str, country: Optional[str] = None, region: Optional[str] = None) -> Optional[GeoPlace]:
+        """
+        Best place for a city name: exact matches first, then one-edit matches; within
+        `country` if given, preferring an admin1 matching `region` (code or name), then
+        the largest population.
+        """
+        for candidates in (self.exact(name), None):
+            if candidates is None:
+                candidates = self.fuzzy(name)
+            if country and country != "UN":
+                candidates = [p for p in candidates if p.country == country]
+            if candidates:
+                return max(candidates, key=lambda p: (_region_matches(p, region), p.population))
+        return None
+
+
+def _region_matches(place: GeoPlace, region: Optional[str]) -> bool:
+    if not region:
+        return False
+    return region.upper() == (place.admin1_code or "") or fold(region) == fold(place.admin1_name or "")
+
+
+@lru_cache(maxsize=1)
+def shared_index() -> Optional[GeoIndex]:
+    """The default index, opened once per process; None when it has not been built."""
+    return GeoIndex.open_default()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Build the index from a GeoNames cities dump.")
+    b.add_argument("--cities", required=True, type=Path)
+    b.add_argument("--admin1", type=Path, default=None)
+    b.add_argument("--out", type=Path, default=None)
+    q = sub.add_parser("lookup", help="Look up a city in the index.")
+    q.add_argument("name")
+    q.add_argument("--country", default=None)
+    q.add_argument("--region", default=None)
+    q.add_argument("--index", type=Path, default=None)
+    args = p.parse_args(list(argv) if argv is not None else None)
+
+    if args.cmd == "build":
+        stats = build_index(args.cities, args.out or default_index_path(), admin1=args.admin1)
+        print(" ".join(f"{k}={v}" for k, v in stats.items()))
+        return 0
+    idx = GeoIndex(args.index or default_index_path())
+    print(idx.lookup(args.name, country=args.country, region=args.region))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from backend.py.normalizers.gazetteer import GAZETTEER
+from backend.py.normalizers.geonames import GeoIndex, GeoPlace
+from backend.py.pipeline.common import as_text, normalize_country_iso2
+
+# Each parser normalizes one collector location string to
+# (city_norm, region_norm, country_norm, confidence). `detail_country` is the
+# posting-level ISO-2 fallback (already normalized by the caller, "UN" if unknown).
+ParsedLocation = Tuple[Optional[str], Optional[str], str, float]
+LocationParser = Callable[[str, Optional[str]], ParsedLocation]
+
+# Parsed results at least this confident, and not borrowed from the posting country,
+# are written back to location_aliases.
+LEARN_MIN_CONFIDENCE = 0.8
+# Source of the location_aliases rows a company's runs learn; other sources (manual fixes)
+# apply to every company.
+LEARNED_ALIAS_SOURCE_PREFIX = "pipeline:"
+
+
+def learned_alias_source(company_key: str) -> str:
+    return f"{LEARNED_ALIAS_SOURCE_PREFIX}{company_key}"
+
+
+def aliases_for(by_source: dict[str, dict[str, ParsedLocation]], company_key: str) -> dict[str, ParsedLocation]:
+    """
+    A new dict of the aliases that apply to one company: rows its own runs learned, with
+    every non-learned row (manual fixes) on top. Aliases learned through another company's
+    parser are left out, since a mis-parse there says nothing about this company's strings.
+    """
+    own = learned_alias_source(company_key)
+    out = dict(by_source.get(own, {}))
+    for source, aliases in by_source.items():
+        if not source.startswith(LEARNED_ALIAS_SOURCE_PREFIX):
+            out.update(aliases)
+    return out
+
+
+def resolve_country(part: str, hint: Optional[str] = None) -> str:
+    """
+    ISO-2 for one location part: a country name or code, a subdivision ("Texas", "ON"),
+    or text containing a country name ("Remote - Germany"). When the part could mean
+    several countries ("Georgia", "WA"), `hint` (the posting country) breaks the tie;
+    a subdivision shared by several countries without a hint stays "UN".
+    """
+    country = GAZETTEER.country(part)
+    candidates = [country] if country else []
+    candidates += [c for c, _ in GAZETTEER.subdivisions(part) if c not in candidates]
+    if not candidates:
+        return GAZETTEER.scan(part) or "UN"
+    if hint in candidates:
+        return hint
+    if country:
+        return country
+    return candidates[0] if len(candidates) == 1 else "UN"
+
+
+def infer_country(loc: str, position: int = -1) -> Optional[str]:
+    """ISO-2 of the comma-separated part at `position` (0: "US, CA, X"; -1: "X, CA, USA")."""
+    s = as_text(loc)
+    if not s:
+        return None
+    parts = [p.strip() for p in s.split(",") if p.strip()]
+    if not parts:
+        return None
+    c = resolve_country(parts[position])
+    return None if c == "UN" else c
+
+
+def parse_country_first(loc: str, detail_country: Optional[str]) -> ParsedLocation:
+    """Amazon / Intel: "US, WA, Seattle", "DEU, Berlin"."""
+    loc = as_text(loc)
+    detail_country = detail_country or "UN"
+    if not loc:
+        return (None, None, detail_country, 0.0)
+
+    parts = [p.strip() for p in loc.split(",") if p.strip()]
+    if len(parts) >= 3 and len(parts[0]) == 2 and parts[0].isalpha():
+        country = normalize_country_iso2(parts[0])
+        region = parts[1]
+        city = ", ".join(parts[2:])
+        return (city or None, region or None, country, 0.95 if country != "UN" else 0.5)
+
+    if len(parts) >= 2:
+        city = parts[-1]
+        maybe_country = resolve_country(parts[0], detail_country)
+        country = maybe_country if maybe_country != "UN" else detail_country
+        return (city or None, None, country, 0.8 if country != "UN" else 0.3)
+
+    return (loc, None, detail_country, 0.65 if detail_country != "UN" else 0.2)
+
+
+def parse_country_last(loc: str, detail_country: Optional[str]) -> ParsedLocation:
+    """Apple / Google / Nokia: "Cupertino, CA, USA", "Espoo, Finland"."""
+    loc = as_text(loc)
+    detail_country = detail_country or "UN"
+    if not loc:
+        return (None, None, detail_country, 0.0)
+
+    parts = [p.strip() for p in loc.split(",") if p.strip()]
+    if len(parts) >= 3 and len(parts[-1]) in (2, 3):
+        country = normalize_country_iso2(parts[-1])
+        region = parts[-2] if len(parts[-2]) <= 6 else None
+        city = ", ".join(parts[:-2]) if len(parts) > 2 else None
+        return (city or None, region, country, 0.9 if country != "UN" else 0.5)
+
+    if len(parts) >= 2:
+        maybe_country = resolve_country(parts[-1], detail_country)
+        city = ", ".join(parts[:-1])
+        country = maybe_country if maybe_country != "UN" else detail_country
+        return (city or None, None, country, 0.8 if country != "UN" else 0.3)
+
+    return (loc, None, detail_country, 0.65 if detail_country != "UN" else 0.2)
+
+
+def parse_city_first(loc: str, detail_country: Optional[str]) -> ParsedLocation:
+    """Meta / Microsoft: "Menlo Park, CA", "Redmond, Washington, United States"."""
+    loc = as_text(loc)
+    detail_country = detail_country or "UN"
+    if not loc:
+        return (None, None, detail_country, 0.0)
+
+    parts = [p.strip() for p in loc.split(",") if p.strip()]
+    if len(parts) >= 2:
+        city = parts[0]
+        maybe_country = resolve_country(parts[-1], detail_country)
+        country = maybe_country if maybe_country != "UN" else detail_country
+        region = parts[1] if len(parts) > 2 else None
+        return (city or None, region, country, 0.9 if country != "UN" else 0.4)
+
+    return (loc, None, detail_country, 0.65 if detail_country != "UN" else 0.2)
+
+
+def parse_workday_location(loc: str, detail_country: Optional[str]) -> ParsedLocation:
+    """
+    NVIDIA's Workday site.
+
+    Rules:
+      - "US, CA, Santa Clara" -> country=US, region=CA, city="Santa Clara"
+      - "Germany, Munich" / "Israel, Yokneam" -> use detail_country as ISO-2 fallback
+      - "Remote" / unstructured -> use detail_country if present else UN
+    """
+    loc = as_text(loc)
+    detail_country = detail_country or "UN"
+
+    if not loc:
+        return (None, None, detail_country, 0.0)
+
+    parts = [p.strip() for p in loc.split(",") if p.strip()]
+
+    # Typical Workday list format for US: "US, CA, Santa Clara"
+    if len(parts) >= 3 and len(parts[0]) == 2 and parts[0].isupper():
+        country = parts[0]
+        region = parts[1]
+        city = ", ".join(parts[2:])
+        return (city or None, region or None, country, 0.95)
+
+    # Common non-US list: "Germany, Munich" / "Israel, Yokneam"
+    if len(parts) >= 2:
+        city = parts[-1]
+        first = parts[0]
+        inferred_country = resolve_country(first, detail_country)
+        country = inferred_country if inferred_country != "UN" else detail_country
+        conf = 0.9 if inferred_country != "UN" else (0.85 if detail_country != "UN" else 0.2)
+        return (city or None, None, country, conf)
+
+    # Fallback single token: "Remote" etc.
+    return (loc or None, None, detail_country, 0.7 if detail_country != "UN" else 0.1)
+
+
+@dataclass(slots=True, frozen=True)
+class ResolvedLocation:
+    """A location ready for a fact row: cleaned parser output plus its GeoNames place."""
+
+    city_norm: Optional[str]
+    region_norm: Optional[str]
+    country_norm: str
+    confidence: float
+    geoname_id: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class LocationNormalizer:
+    """
+    Per-run memo in front of a plugin's location parser, backed by location_aliases.
+
+    Each (raw location, posting country) pair is parsed, cleaned and geocoded once per
+    run; repeats are cache hits that return the same ResolvedLocation. Raw strings listed
+    in location_aliases take the table's answer instead of the parser's, and confident
+    parses that do not depend on the posting country are collected in `learned` for
+    writing back to the table.
+
+    With a GeoNames index, `geocode` maps parsed (city, region, country) triples to
+    canonical places, also memoized.
+    """
+
+    def __init__(self, aliases: Optional[dict[str, ParsedLocation]] = None, geo: Optional[GeoIndex] = None):
+        self.aliases = aliases or {}
+        self.geo = geo
+        self.learned: dict[str, ParsedLocation] = {}
+        self._memo: dict[tuple[str, Optional[str]], ResolvedLocation] = {}
+        self._places: dict[tuple, Optional[GeoPlace]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.alias_hits = 0
+
+    def resolve(self, parser: LocationParser, loc: str, detail_country: Optional[str]) -> ResolvedLocation:
+        key = (loc, detail_country)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        city, region, country, conf = self.parse(parser, loc, detail_country)
+        city = as_text(city)
+        region = as_text(region)
+        country = normalize_country_iso2(country)
+        place = self.geocode(city, region, country)
+        resolved = ResolvedLocation(
+            city,
+            region,
+            country,
+            float(conf or 0.0),
+            *((place.geoname_id, place.latitude, place.longitude) if place is not None else ()),
+        )
+        self._memo[key] = resolved
+        return resolved
+
+    def parse(self, parser: LocationParser, loc: str, detail_country: Optional[str]) -> ParsedLocation:
+        """Uncached parse: the location_aliases row for `loc` if any, else the parser's result."""
+        result = self.aliases.get(loc)
+        if result is not None:
+            self.alias_hits += 1
+            return result
+        result = parser(loc, detail_country)
+        self._learn(parser, loc, detail_country, result)
+        return result
+
+    def _learn(self, parser: LocationParser, loc: str, detail_country: Optional[str], result: ParsedLocation) -> None:
+        country, conf = result[2], result[3]
+        if loc in self.learned or country == "UN" or conf < LEARN_MIN_CONFIDENCE:
+            return
+        if detail_country not in (None, "UN") and parser(loc, "UN")[2] != country:
+            return  # resolved from the posting, not from the string itself
+        self.learned[loc] = result
+
+    def geocode(self, city: Optional[str], region: Optional[str], country: str) -> Optional[GeoPlace]:
+        if self.geo is None or not city:
+            return None
+        key = (city, region, country)
+        if key not in self._places:
+            self._places[key] = self.geo.lookup(city, country=country, region=region)
+        return self._places[key]
+
+    @property
+    def geocoded(self) -> tuple[int, int]:
+        """(distinct locations resolved to a place, distinct locations looked up)."""
+        return sum(1 for p in self._places.values() if p is not None), len(self._places)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
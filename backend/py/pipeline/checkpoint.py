@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from backend.py.storage.detail_cache import cache_dir
+
+
+def checkpoint_root() -> Path:
+    return cache_dir() / "checkpoints"
+
+
+def new_run_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _write_json(path: Path, value) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(value, ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path, default=None):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return default
+
+
+def _read_jsonl(path: Path) -> Iterator[Any]:
+    try:
+        f = path.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # torn last line from a crash mid-write
+            yield json.loads(line)
+
+
+class RunCheckpoint:
+    """
+    On-disk record of one ingest_weekly run: .cache/checkpoints/<run_id>/run.json plus one
+    CompanyCheckpoint directory per company. Removed once the run finishes cleanly.
+    """
+
+    def __init__(self, run_id: str, root: str | Path | None = None):
+        self.run_id = run_id
+        self.path = Path(root or checkpoint_root()) / run_id
+
+    def exists(self) -> bool:
+        return (self.path / "run.json").exists()
+
+    def manifest(self) -> dict:
+        return _read_json(self.path / "run.json", {})
+
+    def save_manifest(self, **fields) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        _write_json(self.path / "run.json", {**self.manifest(), "run_id": self.run_id, **fields})
+
+    def company(self, company_key: str) -> "CompanyCheckpoint":
+        return CompanyCheckpoint(self.path / company_key)
+
+    def remove(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class CompanyCheckpoint:
+    """
+    Crawl progress for one company in one run, all append-only or atomically replaced:
+
+      meta.json        snapshot_date / captured_at / crawl_mode of the run, and status
+      state.json       small listing cursors (page, offset) keyed by name
+      <name>.jsonl     saved listings (sitemap URLs, listing rows) and a .done marker
+      resolved.jsonl   postings already fetched and normalized (detail pages included)
+      written.jsonl    conflict keys + confidence of rows committed to the database
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._state = _read_json(self.path / "state.json", {})
+        self._resolved = None
+        self._written = None
+        self._lock = threading.Lock()
+
+    # --- run metadata ---
+    def meta(self) -> dict:
+        return _read_json(self.path / "meta.json", {})
+
+    def save_meta(self, **fields) -> None:
+        _write_json(self.path / "meta.json", {**self.meta(), **fields})
+
+    # --- listing cursors ---
+    def get(self, name: str, default=None):
+        return self._state.get(name, default)
+
+    def put(self, name: str, value) -> None:
+        if self._state.get(name) == value:
+            return
+        self._state[name] = value
+        _write_json(self.path / "state.json", self._state)
+
+    # --- saved listings ---
+    def load_items(self, name: str) -> list | None:
+        """Items saved under `name`, or None unless the listing was saved completely."""
+        if not (self.path / f"{name}.done").exists():
+            return None
+        return list(_read_jsonl(self.path / f"{name}.jsonl"))
+
+    def tee_items(self, name: str, items: Iterable) -> Iterator:
+        """Pass items through while saving them; the listing counts as complete once exhausted."""
+        (self.path / f"{name}.done").unlink(missing_ok=True)
+        with (self.path / f"{name}.jsonl").open("w", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                yield item
+        (self.path / f"{name}.done").touch()
+
+    def save_items(self, name: str, items: list) -> list:
+        for _ in self.tee_items(name, items):
+            pass
+        return items
+
+    # --- per-posting progress ---
+    def resolved(self) -> Iterator[dict]:
+        """Saved {"key": raw posting key, "posting": normalized posting or None}."""
+        return _read_jsonl(self.path / "resolved.jsonl")
+
+    def add_resolved(self, key: str, posting: dict | None) -> None:
+        if self._resolved is None:
+            self._resolved = (self.path / "resolved.jsonl").open("a", encoding="utf-8")
+        self._resolved.write(json.dumps({"key": key, "posting": posting}, ensure_ascii=False, default=str) + "\n")
+        self._resolved.flush()
+
+    def written(self) -> Iterator[tuple[tuple, float]]:
+        for key, conf in _read_jsonl(self.path / "written.jsonl"):
+            yield tuple(key), conf
+
+    def add_written(self, entries: list[tuple[tuple, float]]) -> None:
+        # Called from the writer thread after each committed batch.
+        with self._lock:
+            if self._written is None:
+                self._written = (self.path / "written.jsonl").open("a", encoding="utf-8")
+            self._written.write("".join(json.dumps([list(k), c]) + "\n" for k, c in entries))
+            self._written.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._resolved, self._written):
+                if f is not None:
+                    f.close()
+            self._resolved = self._written = None
+
+    def remove(self) -> None:
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,140 @@
+"""
+Churn-adaptive crawl planning for pipeline.scheduler.
+
+A company's churn rate is the share of its postings that turn over per day: the mean of
+added and removed job_keys between consecutive snapshots in job_location_facts, divided
+by the days between them and by the typical snapshot size. From it, each company gets:
+
+- a cadence: crawl again once about TARGET_TURNOVER of the postings have changed, between
+  MIN_EVERY_HOURS and the configured every_hours (the configured cadence stays the
+  floor, so weekly sample_points in the avg MVs never get sparser);
+- a depth: an incremental crawl when the plugin supports it and few postings disappear
+  between crawls (each removal costs the incremental crawl a liveness probe), with a
+  full crawl at least every FULL_EVERY_DAYS; otherwise a full crawl.
+
+Companies with fewer than MIN_INTERVALS snapshot pairs keep their configured schedule.
+"""
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from backend.py.pipeline.engine import load_plugin
+from backend.py.storage.neon import fetch_snapshot_churn
+
+LOOKBACK_DAYS = 56
+MIN_INTERVALS = 2
+TARGET_TURNOVER = 0.03
+MIN_EVERY_HOURS = 24.0
+# Removed postings per crawl, as a share of the snapshot, up to which incremental is used.
+INCREMENTAL_MAX_REMOVED = 0.10
+FULL_EVERY_DAYS = 28
+
+
+@dataclass(frozen=True)
+class ChurnStats:
+    company_name: str
+    intervals: int
+    days: int
+    jobs: float  # mean postings per snapshot
+    added: int
+    removed: int
+
+    @property
+    def added_per_day(self) -> float:
+        return self.added / self.days if self.days else 0.0
+
+    @property
+    def removed_per_day(self) -> float:
+        return self.removed / self.days if self.days else 0.0
+
+    @property
+    def rate(self) -> float:
+        """Share of postings turned over per day."""
+        if not self.jobs:
+            return 0.0
+        return (self.added_per_day + self.removed_per_day) / 2 / self.jobs
+
+
+def churn_from_history(rows: Iterable[tuple]) -> dict[str, ChurnStats]:
+    """Aggregate fetch_snapshot_churn rows per company name."""
+    acc: dict[str, list] = {}
+    for name, day, prev, jobs, added, removed in rows:
+        a = acc.setdefault(name, [0, 0, 0, 0, 0])
+        a[0] += 1
+        a[1] += (day - prev).days
+        a[2] += jobs
+        a[3] += added
+        a[4] += removed
+    return {
+        name: ChurnStats(name, intervals=n, days=days, jobs=jobs / n, added=added, removed=removed)
+        for name, (n, days, jobs, added, removed) in acc.items()
+    }
+
+
+@dataclass(frozen=True)
+class CrawlPlan:
+    every_hours: float
+    crawl_mode: str
+    reason: str
+
+
+def plan_crawl(
+    stats: Optional[ChurnStats],
+    every_hours: float,
+    crawl_mode: str,
+    supports_incremental: bool,
+    last_full_at: Optional[datetime],
+    now: datetime,
+) -> CrawlPlan:
+    """Cadence and depth for one company; `every_hours`/`crawl_mode` are the configured ones."""
+    if stats is None or stats.intervals < MIN_INTERVALS or not stats.jobs:
+        return CrawlPlan(every_hours, crawl_mode, "no history")
+
+    rate = stats.rate
+    hours = every_hours if rate <= 0 else min(every_hours, max(MIN_EVERY_HOURS, TARGET_TURNOVER / rate * 24))
+    removed_per_crawl = stats.removed_per_day * hours / 24 / stats.jobs
+    full_due = last_full_at is None or now - last_full_at >= timedelta(days=FULL_EVERY_DAYS)
+    if not supports_incremental:
+        mode, why = "full", "no incremental crawl"
+    elif full_due:
+        mode, why = "full", "periodic full crawl"
+    elif removed_per_crawl > INCREMENTAL_MAX_REMOVED:
+        mode, why = "full", f"removed/crawl={removed_per_crawl:.1%}"
+    else:
+        mode, why = "incremental", f"removed/crawl={removed_per_crawl:.1%}"
+    return CrawlPlan(round(hours, 1), mode, f"churn={rate:.2%}/day {why}")
+
+
+class ChurnPlanner:
+    """Re-plans a set of schedules from one snapshot-history query."""
+
+    def __init__(
+        self,
+        fetch_history: Callable[[date], list[tuple]] = fetch_snapshot_churn,
+        plugins: Callable = load_plugin,
+        lookback_days: int = LOOKBACK_DAYS,
+    ):
+        self.fetch_history = fetch_history
+        self.plugins = plugins
+        self.lookback_days = lookback_days
+
+    def __call__(self, schedules: list, state, now: datetime) -> dict:
+        """Effective CompanySchedules by company, with the plan's cadence and crawl mode."""
+        history = churn_from_history(self.fetch_history((now - timedelta(days=self.lookback_days)).date()))
+        out = {}
+        for schedule in schedules:
+            plugin = self.plugins(schedule.company)
+            if plugin is None:
+                continue
+            last_full = state.get(schedule.company).get("last_full_at")
+            plan = plan_crawl(
+                history.get(plugin.company_name),
+                schedule.every_hours,
+                schedule.crawl_mode,
+                "incremental" in plugin.crawl_modes,
+                datetime.fromisoformat(last_full) if last_full else None,
+                now,
+            )
+            print(f"[PLAN] {schedule.company}: every {plan.every_hours:g}h {plan.crawl_mode} ({plan.reason})")
+            out[schedule.company] = replace(schedule, every_hours=plan.every_hours, crawl_mode=plan.crawl_mode)
+        return out
@@ -1,47 +1,15 @@
 import hashlib
 import json
+import os
+import threading
+from datetime import datetime, timezone
 from typing import Optional
 
+from backend.py.normalizers.gazetteer import GAZETTEER
+from backend.py.storage.detail_cache import cache_dir
 from backend.py.storage.neon import get_conn
 
-COUNTRY_NAME_TO_ISO2 = {
-    "UNITED STATES": "US",
-    "USA": "US",
-    "U.S.": "US",
-    "U.S.A.": "US",
-    "CANADA": "CA",
-    "MEXICO": "MX",
-    "GERMANY": "DE",
-    "FRANCE": "FR",
-    "UNITED KINGDOM": "GB",
-    "UK": "GB",
-    "IRELAND": "IE",
-    "NETHERLANDS": "NL",
-    "BELGIUM": "BE",
-    "SWITZERLAND": "CH",
-    "SPAIN": "ES",
-    "ITALY": "IT",
-    "POLAND": "PL",
-    "CZECH REPUBLIC": "CZ",
-    "CZECHIA": "CZ",
-    "ROMANIA": "RO",
-    "SWEDEN": "SE",
-    "NORWAY": "NO",
-    "DENMARK": "DK",
-    "FINLAND": "FI",
-    "ISRAEL": "IL",
-    "INDIA": "IN",
-    "SINGAPORE": "SG",
-    "TAIWAN": "TW",
-    "JAPAN": "JP",
-    "KOREA": "KR",
-    "SOUTH KOREA": "KR",
-    "CHINA": "CN",
-    "HONG KONG": "HK",
-    "AUSTRALIA": "AU",
-    "NEW ZEALAND": "NZ",
-    "BRAZIL": "BR",
-}
+_company_ids_lock = threading.Lock()
 
 
 def as_text(v):
@@ -62,13 +30,23 @@ def as_text(v):
 
 
 def normalize_country_iso2(v: Optional[str]) -> str:
+    """ISO-2 for a country name, alias or ISO code (see normalizers.gazetteer); "UN" if unknown."""
     s = as_text(v)
     if not s:
         return "UN"
-    s = s.strip()
-    if len(s) == 2 and s.isalpha():
-        return s.upper()
-    return COUNTRY_NAME_TO_ISO2.get(s.upper(), "UN")
+    return GAZETTEER.country(s) or "UN"
+
+
+def iso_utc_from_epoch(value: int | str | None) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str) and not value.strip().isdigit():
+        # Postings carried forward from the previous snapshot are already ISO text.
+        return as_text(value)
+    try:
+        return datetime.fromtimestamp(int(value), tz=timezone.utc).isoformat()
+    except Exception:
+        return None
 
 
 def get_company_id_by_name(name: str) -> str:
@@ -81,22 +59,50 @@ def get_company_id_by_name(name: str) -> str:
             return row[0]
 
 
+def ensure_company_id(name: str, careers_url: Optional[str] = None, source_type: str = "custom") -> str:
+    """Id of the company named `name`, registering it first if it is new."""
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO companies (name, careers_url, source_type)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (name) DO UPDATE
+                SET careers_url = COALESCE(companies.careers_url, EXCLUDED.careers_url)
+                RETURNING id
+                """,
+                (name, careers_url, source_type),
+            )
+            return cur.fetchone()[0]
+
+
+def cached_company_id(name: str) -> Optional[str]:
+    """The id last resolved for company `name` on this host (<cache dir>/company_ids.json)."""
+    try:
+        ids = json.loads((cache_dir() / "company_ids.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return ids.get(name)
+
+
+def remember_company_id(name: str, company_id) -> None:
+    """Keep `company_id` for cached_company_id(), so a run can start while the database is down."""
+    path = cache_dir() / "company_ids.json"
+    with _company_ids_lock:
+        try:
+            ids = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            ids = {}
+        if ids.get(name) == str(company_id):
+            return
+        ids[name] = str(company_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(ids, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+
 def stable_hash(company_id, job_key, snapshot_month, title, locations):
     payload = f"{company_id}|{job_key}|{snapshot_month}|{title}|{sorted(locations)}"
     return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-
-def dedup_rows_by_confidence(rows: list[tuple]) -> list[tuple]:
-    dedup = {}
-    for row in rows:
-        company_id = as_text(row[0]) or ""
-        job_key = as_text(row[1]) or ""
-        snapshot_date = row[3]
-        country_norm = normalize_country_iso2(row[10])
-        city_norm = as_text(row[8]) or ""
-        key = (company_id, job_key, snapshot_date, country_norm, city_norm)
-        conf = float(row[11] or 0.0)
-        prev = dedup.get(key)
-        if prev is None or conf > float(prev[11] or 0.0):
-            dedup[key] = row
-    return list(dedup.values())
@@ -1,12 +1,20 @@
 DEFAULT_COMPANIES = ["amazon", "apple", "google", "intel", "meta", "microsoft", "nvidia", "nokia"]
 
-PIPELINE_MODULES = {
-    "amazon": "backend.py.pipeline.ingest_amazon",
-    "apple": "backend.py.pipeline.ingest_apple",
-    "google": "backend.py.pipeline.ingest_google",
-    "intel": "backend.py.pipeline.ingest_intel",
-    "meta": "backend.py.pipeline.ingest_meta",
-    "microsoft": "backend.py.pipeline.ingest_microsoft",
-    "nvidia": "backend.py.pipeline.ingest_nvidia",
-    "nokia": "backend.py.pipeline.ingest_nokia",
+# Collector plugin registry: company key -> "module:CollectorPlugin subclass".
+# Plugins are imported lazily (see pipeline.engine.load_plugin). Workday sites (nvidia,
+# intel, ...) are not listed here: they come from the tenant registry in
+# collectors/workday_tenants.json.
+PIPELINE_PLUGINS = {
+    "amazon": "backend.py.pipeline.ingest_amazon:AmazonPlugin",
+    "apple": "backend.py.pipeline.ingest_apple:ApplePlugin",
+    "google": "backend.py.pipeline.ingest_google:GooglePlugin",
+    "meta": "backend.py.pipeline.ingest_meta:MetaPlugin",
+    "microsoft": "backend.py.pipeline.ingest_microsoft:MicrosoftPlugin",
+    "nokia": "backend.py.pipeline.ingest_nokia:NokiaPlugin",
 }
+
+# Scheduler cadence (pipeline.scheduler): hours between crawl starts and the UTC hours
+# [start, end) in which a crawl may start (start > end wraps past midnight).
+# Companies not listed in COMPANY_SCHEDULES use SCHEDULE_DEFAULT.
+SCHEDULE_DEFAULT = {"every_hours": 168, "window_utc": (2, 8), "crawl_mode": "full"}
+COMPANY_SCHEDULES: dict[str, dict] = {}
@@ -0,0 +1,459 @@
+import importlib
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+import psycopg2
+from dotenv import load_dotenv
+
+from backend.py.collectors.http import print_connection_stats, reset_session_stats
+from backend.py.collectors.ratelimit import print_host_limits, save_host_limits
+from backend.py.normalizers.geonames import shared_index
+from backend.py.normalizers.locations import (
+    LocationNormalizer,
+    ParsedLocation,
+    aliases_for,
+    infer_country,
+    learned_alias_source,
+)
+from backend.py.pipeline.common import (
+    as_text,
+    cached_company_id,
+    get_company_id_by_name,
+    normalize_country_iso2,
+    remember_company_id,
+    stable_hash,
+)
+from backend.py.pipeline.checkpoint import CompanyCheckpoint
+from backend.py.pipeline.config import PIPELINE_PLUGINS
+from backend.py.pipeline.writer import FactWriter
+from backend.py.storage.archive import ArchivePartition, ResponseArchive, archive_enabled, bind_session
+from backend.py.storage.detail_cache import DetailCache
+from backend.py.storage.spool import FactSpool, SpoolPartition, drain, print_drain_stats, spool_enabled
+from backend.py.storage.neon import (
+    fetch_location_aliases,
+    fetch_previous_snapshot_postings,
+    insert_location_aliases,
+    refresh_mv_country_month_counts,
+)
+
+CRAWL_MODES = ("full", "incremental")
+
+# location_aliases by source, read once per process and extended with what each run learns.
+_location_aliases: Optional[dict[str, dict[str, ParsedLocation]]] = None
+_location_aliases_lock = threading.Lock()
+
+
+def _run_location_aliases(company_key: str) -> dict[str, ParsedLocation]:
+    """A copy of the aliases that apply to `company_key`, for one run."""
+    global _location_aliases
+    with _location_aliases_lock:
+        if _location_aliases is None:
+            _location_aliases = fetch_location_aliases()
+        return aliases_for(_location_aliases, company_key)
+
+
+def _add_location_aliases(source: str, learned: dict[str, ParsedLocation]) -> None:
+    with _location_aliases_lock:
+        if _location_aliases is not None:
+            _location_aliases.setdefault(source, {}).update(learned)
+
+
+def reset_location_aliases() -> None:
+    """Re-read location_aliases on the next run, so a resident process sees manual fixes."""
+    global _location_aliases
+    with _location_aliases_lock:
+        _location_aliases = None
+
+
+@dataclass(slots=True)
+class Posting:
+    """A collector posting after field normalization; `locations` is non-empty."""
+
+    job_key: str
+    title: Optional[str]
+    posted_at: Optional[str]
+    locations: list[str]
+    detail_country: str = "UN"
+
+
+@dataclass
+class RunContext:
+    company_id: str
+    captured_at: datetime
+    snapshot_date: date
+    snapshot_month: date
+    crawl_mode: str = "full"
+    # Listing total reported by the site; plugins update it while fetching.
+    total: Optional[int] = None
+    # Previous snapshot postings by job_key; only loaded for incremental crawls.
+    known: dict[str, dict] = field(default_factory=dict)
+    # Plugin-owned state for the run (detail caches, crawl stats, ...).
+    state: dict = field(default_factory=dict)
+    # Set by ingest_weekly so an interrupted crawl can be resumed on the same snapshot_date.
+    checkpoint: Optional[CompanyCheckpoint] = None
+    # Raw posting keys already normalized in this run (by an earlier attempt, when resuming).
+    resolved: set[str] = field(default_factory=set)
+    # Memoized location parsing for the run.
+    locations: LocationNormalizer = field(default_factory=LocationNormalizer)
+
+
+class CollectorPlugin(ABC):
+    """
+    One company's collector, as seen by the shared pipeline engine.
+
+    A plugin only fetches raw postings and says how to read them; the engine does field
+    normalization, hashing, per-location parsing, de-duplication and batched writes.
+    The default `normalize` reads collector dicts shaped {job_key, title, locations,
+    posted_on} and infers the posting country from the part of the first location at
+    `country_position`. Subclasses must define `fetch` and `parse_location` (usually as a
+    staticmethod wrapping one of normalizers.locations' parsers).
+    """
+
+    key: str = ""
+    company_name: str = ""
+    session_name: str = ""
+    crawl_modes: tuple[str, ...] = ("full",)
+    country_position: int = -1
+    # Set to a reason string to keep a registered plugin out of scheduled runs.
+    skip_reason: Optional[str] = None
+
+    @abstractmethod
+    def fetch(self, ctx: RunContext) -> Iterable[dict]:
+        """
+        Crawl the listing and return (or yield, page by page) raw postings, setting
+        ctx.total to the site's reported total. Generators let the engine write rows
+        while later pages are still being fetched.
+        """
+
+    @abstractmethod
+    def parse_location(self, loc: str, detail_country: Optional[str]) -> ParsedLocation:
+        """One location string as (city_norm, region_norm, country_norm, confidence)."""
+
+    def raw_key(self, raw: dict) -> Optional[str]:
+        """Identity of a raw posting, used to skip postings already resolved before a resume."""
+        return as_text(raw.get("job_key"))
+
+    def posted_at(self, raw: dict) -> Optional[str]:
+        return as_text(raw.get("posted_on"))
+
+    def normalize(self, raw: dict, ctx: RunContext) -> Optional[Posting]:
+        job_key = as_text(raw.get("job_key"))
+        if not job_key:
+            return None
+        locs = raw.get("locations")
+        locs = [x for x in (as_text(v) for v in locs) if x] if isinstance(locs, list) else []
+        if not locs:
+            return None
+        return Posting(
+            job_key=job_key,
+            title=as_text(raw.get("title")),
+            posted_at=self.posted_at(raw),
+            locations=locs,
+            detail_country=normalize_country_iso2(infer_country(locs[0], self.country_position)),
+        )
+
+    def resolve_company_id(self) -> str:
+        return get_company_id_by_name(self.company_name)
+
+    def close(self, ctx: RunContext) -> None:
+        """Release per-run resources and print their stats; called after normalization."""
+
+
+def stream_with_total(
+    ctx: RunContext,
+    iter_postings: Callable[..., Iterator[dict]],
+    *args,
+    resume: Optional[str] = None,
+    **kwargs,
+) -> Iterator[dict]:
+    """
+    Run a collector generator that reports stats["total"], mirroring it into ctx.total.
+
+    With a checkpoint, the page or offset being yielded (stats["cursor"]) is saved; when
+    resuming, it is passed back as the `resume` keyword together with the resolved job
+    keys as `seen`, so the listing restarts at the page it stopped on.
+    """
+    cp = ctx.checkpoint
+    if cp is not None and resume and cp.get("cursor") is not None:
+        kwargs[resume] = cp.get("cursor")
+        kwargs["seen"] = set(ctx.resolved)
+    stats: dict = {}
+    for item in iter_postings(*args, stats=stats, **kwargs):
+        ctx.total = stats.get("total", ctx.total)
+        if cp is not None and "cursor" in stats:
+            cp.put("cursor", stats["cursor"])
+        yield item
+    ctx.total = stats.get("total", ctx.total)
+
+
+def checkpointed_listing(ctx: RunContext, crawl: Callable[[], tuple[int, list[dict]]]) -> list[dict]:
+    """
+    Run a listing crawl that returns (total, postings), setting ctx.total. With a
+    checkpoint the complete listing is saved, and a resumed run reuses it instead of
+    crawling again.
+    """
+    cp = ctx.checkpoint
+    if cp is not None:
+        saved = cp.load_items("listing")
+        if saved is not None:
+            ctx.total = cp.get("total", len(saved))
+            print("Resumed listing postings:", len(saved))
+            return saved
+    total, postings = crawl()
+    ctx.total = total
+    if cp is not None:
+        cp.put("total", total)
+        cp.save_items("listing", postings)
+    return postings
+
+
+def open_detail_cache(ctx: RunContext) -> DetailCache:
+    """The on-disk DetailCache for this run, closed (and reported) by close_detail_cache."""
+    cache = ctx.state.get("detail_cache")
+    if cache is None:
+        cache = ctx.state["detail_cache"] = DetailCache()
+    return cache
+
+
+def close_detail_cache(ctx: RunContext) -> None:
+    detail_cache = ctx.state.pop("detail_cache", None)
+    if detail_cache is None:
+        return
+    cache_stats = detail_cache.stats()
+    detail_cache.evict()
+    detail_cache.close()
+    print("Detail cache hits:", cache_stats["hits"])
+    print("Detail cache misses:", cache_stats["misses"])
+
+
+def load_plugin(company_key: str) -> Optional[CollectorPlugin]:
+    spec = PIPELINE_PLUGINS.get(company_key)
+    if not spec:
+        # Workday sites are configuration over one plugin (collectors.workday registry).
+        from backend.py.pipeline.workday import workday_plugin
+
+        return workday_plugin(company_key)
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def iter_rows(plugin: CollectorPlugin, post: Posting, ctx: RunContext) -> Iterator[tuple[tuple, tuple]]:
+    """
+    Expand one posting to job_location_facts rows, each paired with the part of its
+    ON CONFLICT key (company_id, job_key, snapshot_date, country_norm, COALESCE(city_norm, ''))
+    that varies within a run: (job_key, country_norm, city_norm or '').
+    """
+    company_id = as_text(ctx.company_id)
+    job_hash = stable_hash(company_id, post.job_key, ctx.snapshot_date.isoformat(), post.title or "", post.locations)
+    resolve = ctx.locations.resolve
+    parse_location = plugin.parse_location
+    for loc in post.locations:
+        r = resolve(parse_location, loc, post.detail_country)
+        # Column order matches storage.neon.upsert_job_location_facts.
+        row = (
+            company_id,
+            post.job_key,
+            ctx.snapshot_month,
+            ctx.snapshot_date,
+            post.title,
+            None,
+            None,
+            loc,
+            r.city_norm,
+            r.region_norm,
+            r.country_norm,
+            r.confidence,
+            post.posted_at,
+            job_hash,
+            ctx.captured_at,
+            r.geoname_id,
+            r.latitude,
+            r.longitude,
+        )
+        yield (post.job_key, r.country_norm, r.city_norm or ""), row
+
+
+def build_rows(plugin: CollectorPlugin, postings: Iterable[Optional[Posting]], ctx: RunContext) -> list[tuple]:
+    """In-memory variant of the streaming write path: the best-confidence row per key."""
+    best: dict[tuple, tuple] = {}
+    for post in postings:
+        if post is None:
+            continue
+        for key, row in iter_rows(plugin, post, ctx):
+            prev = best.get(key)
+            if prev is None or row[11] > prev[11]:
+                best[key] = row
+    return list(best.values())
+
+
+def _replay_checkpoint(plugin: CollectorPlugin, ctx: RunContext, writer: FactWriter) -> int:
+    """Feed a resumed run's committed rows and resolved postings back in; returns the posting count."""
+    cp = ctx.checkpoint
+    for key, conf in cp.written():
+        writer.seed(key, conf)
+    resumed = 0
+    for entry in cp.resolved():
+        ctx.resolved.add(entry["key"])
+        resumed += 1
+        if entry["posting"]:
+            for key, row in iter_rows(plugin, Posting(**entry["posting"]), ctx):
+                writer.offer(key, row)
+    if resumed:
+        print("Resumed postings:", resumed)
+    return resumed
+
+
+def _report_locations(plugin: CollectorPlugin, locations: LocationNormalizer) -> None:
+    source = learned_alias_source(plugin.key)
+    # Only rows the database kept go into the process cache, so a resident process
+    # resolves the same way as a fresh one reading location_aliases.
+    inserted = insert_location_aliases(locations.learned, source=source)
+    _add_location_aliases(source, {raw: locations.learned[raw] for raw in inserted})
+    print(
+        "Location cache hit rate:",
+        f"{locations.hit_rate:.3f}",
+        f"(hits={locations.hits} misses={locations.misses} alias_hits={locations.alias_hits})",
+    )
+    print("Location aliases learned:", len(inserted))
+    if locations.geo is not None:
+        resolved, looked_up = locations.geocoded
+        print(f"Geocoded locations: {resolved}/{looked_up}")
+
+
+def _resolve_company_id(plugin: CollectorPlugin) -> str:
+    """plugin.resolve_company_id(), or the id cached on this host while the database is unreachable."""
+    try:
+        company_id = plugin.resolve_company_id()
+    except psycopg2.OperationalError:
+        company_id = cached_company_id(plugin.company_name)
+        if company_id is None:
+            raise
+        print("Database unreachable: using the company id cached on this host")
+        return company_id
+    remember_company_id(plugin.company_name, company_id)
+    return company_id
+
+
+def run_plugin(
+    plugin: CollectorPlugin,
+    crawl_mode: str = "full",
+    checkpoint: Optional[CompanyCheckpoint] = None,
+    captured_at: Optional[datetime] = None,
+    refresh_views: bool = True,
+) -> int:
+    """
+    Run one company end to end; returns the number of distinct rows written.
+
+    Postings stream from the collector through normalization and de-duplication into a
+    FactWriter, which seals batches into the local spool from a background thread while the
+    crawl goes on; the spool is drained into the database once the crawl is done, and a
+    database outage leaves the rows spooled for the next drain (storage.spool).
+    With a checkpoint, resolved postings and committed rows are recorded as they happen;
+    a checkpoint left by an interrupted attempt is resumed on that attempt's snapshot_date,
+    replaying its postings instead of fetching them again. `captured_at` pins the snapshot
+    when the run is one unit of a larger one (pipeline.ingest_worker); such a run may also
+    pass refresh_views=False and refresh the trend MVs once when all of its units are done.
+    """
+    load_dotenv()
+
+    crawl_mode = crawl_mode if crawl_mode in plugin.crawl_modes else "full"
+    reset_session_stats(plugin.session_name)
+    captured_at = captured_at or datetime.utcnow()
+    snapshot_month = captured_at.date().replace(day=1)
+    saved = checkpoint.meta() if checkpoint is not None else {}
+    if saved:
+        captured_at = datetime.fromisoformat(saved["captured_at"])
+        snapshot_month = date.fromisoformat(saved["snapshot_month"])
+        crawl_mode = saved["crawl_mode"]
+        print("Resuming checkpoint from:", saved["captured_at"])
+    ctx = RunContext(
+        company_id=_resolve_company_id(plugin),
+        captured_at=captured_at,
+        snapshot_date=captured_at.date(),
+        snapshot_month=snapshot_month,
+        crawl_mode=crawl_mode,
+        checkpoint=checkpoint,
+        locations=LocationNormalizer(_run_location_aliases(plugin.key), geo=shared_index()),
+    )
+    if checkpoint is not None:
+        checkpoint.save_meta(
+            captured_at=captured_at.isoformat(),
+            snapshot_month=snapshot_month.isoformat(),
+            crawl_mode=crawl_mode,
+            status="running",
+        )
+    if ctx.crawl_mode == "incremental":
+        try:
+            ctx.known = fetch_previous_snapshot_postings(ctx.company_id, ctx.snapshot_date)
+        except psycopg2.OperationalError:
+            print("Previous snapshot unavailable (database unreachable): crawling in full")
+            ctx.crawl_mode = "full"
+    # Raw responses and normalized postings go to the local archive for pipeline.renormalize.
+    archive: Optional[ArchivePartition] = None
+    if archive_enabled():
+        archive = ResponseArchive().partition(plugin.key, ctx.snapshot_date)
+        bind_session(plugin.session_name, archive)
+
+    spool: Optional[SpoolPartition] = None
+    writer_args = {}
+    if spool_enabled():
+        spool = FactSpool().partition(plugin.key, ctx.snapshot_date)
+        writer_args = {"upsert": spool.write, "connect": None}
+
+    fetched = 0
+    try:
+        with FactWriter(on_commit=checkpoint.add_written if checkpoint is not None else None, **writer_args) as writer:
+            try:
+                if checkpoint is not None:
+                    fetched = _replay_checkpoint(plugin, ctx, writer)
+                for raw in plugin.fetch(ctx):
+                    if checkpoint is not None:
+                        raw_key = plugin.raw_key(raw)
+                        if raw_key in ctx.resolved:
+                            continue
+                    fetched += 1
+                    post = plugin.normalize(raw, ctx)
+                    if checkpoint is not None and raw_key:
+                        ctx.resolved.add(raw_key)
+                        checkpoint.add_resolved(raw_key, asdict(post) if post is not None else None)
+                    if post is None:
+                        continue
+                    if archive is not None:
+                        archive.add_posting(asdict(post))
+                    for key, row in iter_rows(plugin, post, ctx):
+                        writer.offer(key, row)
+            finally:
+                if archive is not None:
+                    bind_session(plugin.session_name, None)
+                plugin.close(ctx)
+                print(f"{plugin.company_name} total:", ctx.total if ctx.total is not None else fetched)
+                print("Fetched postings:", fetched)
+                print_connection_stats(plugin.session_name)
+                print_host_limits()
+                save_host_limits()
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    print("Upsert batches:", writer.batches, f"(rows sent={writer.rows_written} superseded={writer.superseded})")
+    print("Inserted/updated rows:", writer.unique_rows)
+    if spool is not None:
+        print_drain_stats(drain([spool]))
+    _report_locations(plugin, ctx.locations)
+    if refresh_views:
+        refresh_mv_country_month_counts()
+        print("Refreshed trend MVs (count + avg variants if present)")
+    if archive is not None:
+        archive.finish(
+            company_name=plugin.company_name,
+            captured_at=ctx.captured_at.isoformat(),
+            snapshot_month=ctx.snapshot_month.isoformat(),
+            crawl_mode=ctx.crawl_mode,
+        )
+        print("Archived responses:", archive.responses)
+    if checkpoint is not None:
+        checkpoint.save_meta(status="done")
+    return writer.unique_rows
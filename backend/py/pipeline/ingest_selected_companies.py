@@ -1,27 +1,20 @@
-import importlib
 import traceback
 
 from backend.py.pipeline.config import DEFAULT_COMPANIES as DEFAULT_ORDER
-from backend.py.pipeline.config import PIPELINE_MODULES
+from backend.py.pipeline.engine import load_plugin, run_plugin
 
 
 def run_one(company_key: str) -> bool:
-    mod_name = PIPELINE_MODULES.get(company_key)
-    if not mod_name:
+    plugin = load_plugin(company_key)
+    if plugin is None:
         print(f"[SKIP] {company_key}: pipeline not implemented yet")
         return False
-
-    mod = importlib.import_module(mod_name)
-    if not hasattr(mod, "main"):
-        print(f"[SKIP] {company_key}: module has no main()")
-        return False
-    if getattr(mod, "PIPELINE_STATUS", "ok") == "skip":
-        reason = getattr(mod, "PIPELINE_SKIP_REASON", "pipeline_skipped")
-        print(f"[SKIP] {company_key}: {reason}")
+    if plugin.skip_reason:
+        print(f"[SKIP] {company_key}: {plugin.skip_reason}")
         return False
 
     print(f"[RUN ] {company_key}")
-    mod.main()
+    run_plugin(plugin)
     print(f"[DONE] {company_key}")
     return True
 
@@ -1,17 +1,21 @@
 import argparse
 import contextlib
-import importlib
 import io
 import json
 import math
 import re
 import sys
+import threading
 import traceback
 from datetime import datetime, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
-from backend.py.pipeline.config import DEFAULT_COMPANIES, PIPELINE_MODULES
+from backend.py.pipeline.checkpoint import CompanyCheckpoint, RunCheckpoint, new_run_id
+from backend.py.pipeline.config import DEFAULT_COMPANIES
+from backend.py.pipeline.engine import CRAWL_MODES, load_plugin, run_plugin
+from backend.py.storage.lockfile import advisory_or_host_lock
+from backend.py.storage.spool import FactSpool, drain, print_drain_stats, spool_enabled
 
 COMPANY_NAME_MAP = {
     "amazon": "Amazon",
@@ -38,6 +42,57 @@ MIN_FETCH_RATIO_BY_COMPANY = {
 }
 
 
+class _ThreadRoutedStream:
+    """A stdout/stderr stand-in that sends each thread's writes to that thread's target."""
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    @property
+    def target(self):
+        return getattr(self._local, "target", None) or self.default
+
+    @contextlib.contextmanager
+    def route(self, target):
+        previous = getattr(self._local, "target", None)
+        self._local.target = target
+        try:
+            yield
+        finally:
+            self._local.target = previous
+
+    def write(self, s):
+        return self.target.write(s)
+
+    def flush(self):
+        self.target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+@contextlib.contextmanager
+def thread_routed_output():
+    """Let _run_one capture output per thread, so companies can run concurrently in one process."""
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadRoutedStream(stdout), _ThreadRoutedStream(stderr)
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+@contextlib.contextmanager
+def _capture_output(out, err):
+    if isinstance(sys.stdout, _ThreadRoutedStream) and isinstance(sys.stderr, _ThreadRoutedStream):
+        with sys.stdout.route(out), sys.stderr.route(err):
+            yield
+    else:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            yield
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -52,22 +107,54 @@ def _extract_int(pattern: str, text: str) -> int | None:
         return None
 
 
+def _extract_float(pattern: str, text: str) -> float | None:
+    m = re.search(pattern, text, flags=re.IGNORECASE)
+    if not m:
+        return None
+    try:
+        return float(m.group(1))
+    except Exception:
+        return None
+
+
 def _parse_metrics(text: str) -> dict:
     return {
         "source": (re.search(r"\bsource:\s*(.+)", text, flags=re.IGNORECASE) or [None, None])[1],
         "total": _extract_int(r"\btotal:\s*(\d+)", text),
         "fetched": _extract_int(r"Fetched postings:\s*(\d+)", text),
         "inserted_or_updated": _extract_int(r"Inserted/updated rows:\s*(\d+)", text),
+        "upsert_batches": _extract_int(r"Upsert batches:\s*(\d+)", text),
+        "location_cache_hit_rate": _extract_float(r"Location cache hit rate:\s*([0-9.]+)", text),
+        "location_aliases_learned": _extract_int(r"Location aliases learned:\s*(\d+)", text),
+        "geocoded_locations": _extract_int(r"Geocoded locations:\s*(\d+)", text),
+        "detail_cache_hits": _extract_int(r"Detail cache hits:\s*(\d+)", text),
+        "detail_cache_misses": _extract_int(r"Detail cache misses:\s*(\d+)", text),
+        "incremental_pages": _extract_int(r"Incremental pages fetched:\s*(\d+)", text),
+        "carried_forward": _extract_int(r"Carried forward postings:\s*(\d+)", text),
+        "removed": _extract_int(r"Removed postings:\s*(\d+)", text),
+        "http_requests": _extract_int(r"HTTP requests:\s*(\d+)", text),
+        "http_connections": _extract_int(r"HTTP connections opened:\s*(\d+)", text),
+        "connection_reuse_ratio": _extract_float(r"Connection reuse ratio:\s*([0-9.]+)", text),
+        "http_304_responses": _extract_int(r"HTTP 304 responses:\s*(\d+)", text),
+        "http_304_rate": _extract_float(r"HTTP 304 rate:\s*([0-9.]+)", text),
+        "http_bytes_saved": _extract_int(r"HTTP bytes saved:\s*(\d+)", text),
+        "http_retries": _extract_int(r"HTTP retries:\s*(\d+)", text),
+        "http_hedged": _extract_int(r"HTTP hedged requests:\s*(\d+)", text),
+        "http_hedge_win_rate": _extract_float(r"HTTP hedge win rate:\s*([0-9.]+)", text),
+        "retry_budget_exhausted": _extract_int(r"Retry budget exhausted:\s*(\d+)", text),
+        "spool_segments_loaded": _extract_int(r"Spool segments loaded:\s*(\d+)", text),
+        "spool_pending": _extract_int(r"Spool segments loaded:.*\bpending=(\d+)", text),
+        "spool_failed": _extract_int(r"Spool segments failed:\s*(\d+)", text),
     }
 
 
-def _fetch_country_topn(company_key: str, limit: int = 5) -> list[dict]:
+def _fetch_country_topn(company_key: str, limit: int = 5, company_name: str | None = None) -> list[dict]:
     try:
         from backend.py.storage.neon import get_conn
     except Exception:
         return []
 
-    company_name = COMPANY_NAME_MAP.get(company_key, company_key)
+    company_name = company_name or COMPANY_NAME_MAP.get(company_key, company_key)
     sql = """
         SELECT f.country_norm, COUNT(DISTINCT f.job_key) AS job_count
         FROM job_location_facts f
@@ -92,12 +179,19 @@ def _fetch_country_topn(company_key: str, limit: int = 5) -> list[dict]:
         return []
 
 
-def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
+def _run_one(
+    company_key: str,
+    enforce_quality_gate: bool = True,
+    crawl_mode: str = "full",
+    checkpoint: CompanyCheckpoint | None = None,
+    captured_at: datetime | None = None,
+    refresh_views: bool = True,
+) -> dict:
     started = _now_iso()
     t0 = datetime.now(timezone.utc)
     try:
-        mod_name = PIPELINE_MODULES.get(company_key)
-        if not mod_name:
+        plugin = load_plugin(company_key)
+        if plugin is None:
             return {
                 "company": company_key,
                 "status": "skip",
@@ -107,33 +201,42 @@ def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
                 "duration_sec": 0.0,
             }
 
-        mod = importlib.import_module(mod_name)
-        if not hasattr(mod, "main"):
+        if plugin.skip_reason:
             return {
                 "company": company_key,
                 "status": "skip",
-                "reason": "missing_main",
+                "reason": plugin.skip_reason,
                 "started_at": started,
                 "ended_at": _now_iso(),
                 "duration_sec": 0.0,
             }
 
-        pipeline_status = getattr(mod, "PIPELINE_STATUS", "ok")
-        if pipeline_status == "skip":
-            return {
-                "company": company_key,
-                "status": "skip",
-                "reason": getattr(mod, "PIPELINE_SKIP_REASON", "pipeline_skipped"),
-                "started_at": started,
-                "ended_at": _now_iso(),
-                "duration_sec": 0.0,
-            }
-
-        print(f"[RUN ] {company_key}")
-        out = io.StringIO()
-        err = io.StringIO()
-        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
-            mod.main()
+        # Plugins that cannot crawl incrementally always run a full crawl.
+        effective_mode = crawl_mode if crawl_mode in plugin.crawl_modes else "full"
+        # Held for the crawl so a cron run, the scheduler and queue workers never crawl
+        # the same company at once.
+        with advisory_or_host_lock(f"companyloc:ingest:{company_key}") as acquired:
+            if not acquired:
+                print(f"[SKIP] {company_key}: already running")
+                return {
+                    "company": company_key,
+                    "status": "skip",
+                    "reason": "already_running",
+                    "started_at": started,
+                    "ended_at": _now_iso(),
+                    "duration_sec": 0.0,
+                }
+            print(f"[RUN ] {company_key} (crawl_mode={effective_mode})")
+            out = io.StringIO()
+            err = io.StringIO()
+            with _capture_output(out, err):
+                run_plugin(
+                    plugin,
+                    crawl_mode=effective_mode,
+                    checkpoint=checkpoint,
+                    captured_at=captured_at,
+                    refresh_views=refresh_views,
+                )
 
         captured_out = out.getvalue()
         captured_err = err.getvalue()
@@ -168,6 +271,12 @@ def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
                     )
                 )
 
+        # Rows left in the spool never reached the snapshot, whatever the crawl fetched.
+        spool_pending = metrics.get("spool_pending") or 0
+        spool_failed = metrics.get("spool_failed") or 0
+        if spool_pending or spool_failed:
+            gate_failure_reasons.append(f"spool_not_loaded: pending={spool_pending} failed={spool_failed}")
+
         gate_failure = "; ".join(gate_failure_reasons) if gate_failure_reasons else None
 
         if gate_failure:
@@ -178,7 +287,7 @@ def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
                 "status": "fail",
                 "reason": gate_failure,
                 "metrics": metrics,
-                "country_top5": _fetch_country_topn(company_key),
+                "country_top5": _fetch_country_topn(company_key, company_name=plugin.company_name),
                 "started_at": started,
                 "ended_at": _now_iso(),
                 "duration_sec": round(dt, 3),
@@ -190,7 +299,7 @@ def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
             "company": company_key,
             "status": "ok",
             "metrics": metrics,
-            "country_top5": _fetch_country_topn(company_key),
+            "country_top5": _fetch_country_topn(company_key, company_name=plugin.company_name),
             "started_at": started,
             "ended_at": _now_iso(),
             "duration_sec": round(dt, 3),
@@ -210,6 +319,19 @@ def _run_one(company_key: str, enforce_quality_gate: bool = True) -> dict:
         }
 
 
+def _drain_spool(companies: list[str]) -> int:
+    """
+    Load rows spooled by earlier runs or failed companies; returns the segments not loaded
+    (left pending, or set aside as *.failed).
+    """
+    if not spool_enabled():
+        return 0
+    stats = drain(FactSpool().partitions(companies))
+    if stats["loaded"] or stats["duplicates"] or stats["corrupt"] or stats["failed"] or stats["pending"]:
+        print_drain_stats(stats)
+    return stats["pending"] + stats["failed"]
+
+
 def _write_run_log(run_result: dict, log_dir: Path) -> Path:
     log_dir.mkdir(parents=True, exist_ok=True)
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -230,6 +352,19 @@ def parse_args() -> argparse.Namespace:
         default="logs/ingest",
         help="Directory for run summary JSON logs.",
     )
+    p.add_argument(
+        "--crawl-mode",
+        choices=CRAWL_MODES,
+        default="full",
+        help="incremental: stop listing crawls at previously seen postings (companies that support it).",
+    )
+    p.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Continue an interrupted run from its checkpoints, on the same snapshot_date. "
+        "Companies and crawl mode come from that run.",
+    )
     p.add_argument(
         "--no-quality-gate",
         action="store_true",
@@ -242,32 +377,72 @@ def main() -> int:
     args = parse_args()
     load_dotenv()
 
-    companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+    run = RunCheckpoint(args.resume or new_run_id())
+    if args.resume:
+        if not run.exists():
+            print(f"No checkpoint for run {args.resume} under {run.path.parent}")
+            return 2
+        manifest = run.manifest()
+        companies = manifest["companies"]
+        crawl_mode = manifest["crawl_mode"]
+        run_started = manifest["run_started_at"]
+    else:
+        companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+        crawl_mode = args.crawl_mode
+        run_started = _now_iso()
     if not companies:
         print("No companies selected.")
         return 2
-
-    run_started = _now_iso()
-    results = [_run_one(company_key, enforce_quality_gate=not args.no_quality_gate) for company_key in companies]
+    run.save_manifest(companies=companies, crawl_mode=crawl_mode, run_started_at=run_started)
+    print(f"run_id: {run.run_id}")
+    _drain_spool(companies)
+
+    # Companies that finished in an earlier attempt keep their result; the rest pick up
+    # from their checkpoint.
+    done = run.manifest().get("results", {})
+    results = []
+    for company_key in companies:
+        result = done.get(company_key)
+        if result is None or result["status"] == "fail":
+            result = _run_one(
+                company_key,
+                enforce_quality_gate=not args.no_quality_gate,
+                crawl_mode=crawl_mode,
+                checkpoint=run.company(company_key),
+            )
+            done[company_key] = result
+            run.save_manifest(results=done)
+        else:
+            print(f"[KEEP] {company_key}: {result['status']} in an earlier attempt")
+        results.append(result)
+    spool_pending = _drain_spool(companies)
     ok = sum(1 for r in results if r["status"] == "ok")
     skip = sum(1 for r in results if r["status"] == "skip")
     fail = sum(1 for r in results if r["status"] == "fail")
-    exit_code = 1 if fail > 0 else 0
+    exit_code = 1 if fail > 0 or spool_pending else 0
 
     summary = {
+        "run_id": run.run_id,
+        "resumed": bool(args.resume),
         "run_started_at": run_started,
         "run_ended_at": _now_iso(),
         "companies": companies,
+        "crawl_mode": crawl_mode,
         "ok": ok,
         "skip": skip,
         "fail": fail,
         "exit_code": exit_code,
+        "spool_pending": spool_pending,
         "results": results,
     }
 
     log_path = _write_run_log(summary, Path(args.log_dir))
     print(f"finished: ok={ok} skip={skip} fail={fail} exit_code={exit_code}")
     print(f"log: {log_path}")
+    if fail or spool_pending:
+        print(f"resume with: --resume {run.run_id}")
+    else:
+        run.remove()
     return exit_code
 
 
@@ -0,0 +1,129 @@
+"""
+Concurrent ingestion of Workday tenants (collectors.workday registry).
+
+    python -m backend.py.pipeline.ingest_workday [--companies nvidia,intel] [--concurrency 8]
+
+Tenants are independent sites, so up to --concurrency of them crawl at once, each through
+ingest_weekly._run_one (per-company advisory lock, quality gate, metrics) with its output
+captured per thread. Requests are paced per host by the shared AIMD limiters of
+collectors.ratelimit: tenants on the same wdN.myworkdayjobs.com host share one limit, so
+adding tenants adds concurrency across hosts without raising the load on any one of
+them. Every tenant of a run lands on the same snapshot_date, and the trend materialized
+views are refreshed once when all tenants are done rather than by each of them. Without
+--companies, every tenant marked scheduled in the registry runs.
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from backend.py.collectors.workday import workday_tenants
+from backend.py.pipeline.engine import CRAWL_MODES
+from backend.py.pipeline.ingest_weekly import _drain_spool, _now_iso, _run_one, _write_run_log, thread_routed_output
+from backend.py.storage.neon import refresh_mv_country_month_counts
+
+DEFAULT_CONCURRENCY = 8
+
+
+def scheduled_tenants() -> list[str]:
+    return [key for key, tenant in workday_tenants().items() if tenant.scheduled]
+
+
+def run_tenants(
+    companies: list[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    crawl_mode: str = "full",
+    enforce_quality_gate: bool = True,
+    captured_at: Optional[datetime] = None,
+    run=_run_one,
+) -> list[dict]:
+    """Results in `companies` order."""
+    captured_at = captured_at or datetime.utcnow()
+    with thread_routed_output(), ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="workday") as pool:
+        futures = [
+            pool.submit(
+                run,
+                company_key,
+                enforce_quality_gate=enforce_quality_gate,
+                crawl_mode=crawl_mode,
+                captured_at=captured_at,
+                refresh_views=False,
+            )
+            for company_key in companies
+        ]
+        results = [f.result() for f in futures]
+    if any(r["status"] == "ok" for r in results):
+        try:
+            refresh_mv_country_month_counts()
+            print("Refreshed trend MVs (count + avg variants if present)")
+        except Exception as e:  # noqa: BLE001
+            print(f"[FAIL] trend MV refresh: {type(e).__name__}: {e}", file=sys.stderr)
+    return results
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run ingestion for Workday tenants concurrently.")
+    p.add_argument("--companies", default=None, help="Comma-separated tenant keys (default: scheduled tenants).")
+    p.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Tenants crawled at once.")
+    p.add_argument("--crawl-mode", choices=CRAWL_MODES, default="full")
+    p.add_argument("--log-dir", default="logs/ingest", help="Directory for run summary JSON logs.")
+    p.add_argument("--no-quality-gate", action="store_true", help="Disable minimum fetched-postings quality gate.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+
+    if args.companies is None:
+        companies = scheduled_tenants()
+    else:
+        companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+    unknown = [c for c in companies if c not in workday_tenants()]
+    if unknown:
+        print(f"Unknown Workday tenants: {','.join(unknown)}")
+        return 2
+    if not companies:
+        print("No companies selected.")
+        return 2
+
+    run_started = _now_iso()
+    t0 = time.monotonic()
+    _drain_spool(companies)
+    results = run_tenants(
+        companies,
+        concurrency=args.concurrency,
+        crawl_mode=args.crawl_mode,
+        enforce_quality_gate=not args.no_quality_gate,
+    )
+    spool_pending = _drain_spool(companies)
+    fail = sum(1 for r in results if r["status"] == "fail")
+    summary = {
+        "run_started_at": run_started,
+        "run_ended_at": _now_iso(),
+        "companies": companies,
+        "crawl_mode": args.crawl_mode,
+        "concurrency": args.concurrency,
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "skip": sum(1 for r in results if r["status"] == "skip"),
+        "fail": fail,
+        "exit_code": 1 if fail or spool_pending else 0,
+        "spool_pending": spool_pending,
+        "results": results,
+    }
+    log_path = _write_run_log(summary, Path(args.log_dir))
+    print(
+        f"finished: tenants={len(results)} ok={summary['ok']} skip={summary['skip']} fail={fail} "
+        f"({time.monotonic() - t0:.1f}s)"
+    )
+    print(f"summary: {log_path}")
+    return summary["exit_code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
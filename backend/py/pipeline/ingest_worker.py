@@ -0,0 +1,206 @@
+"""
+Distributed ingestion over the crawl work queue (storage.work_queue).
+
+    python -m backend.py.pipeline.ingest_worker enqueue [--companies amazon,apple] [--crawl-mode full]
+    python -m backend.py.pipeline.ingest_worker work [--run-id RUN_ID] [--wait]
+    python -m backend.py.pipeline.ingest_worker status RUN_ID
+
+`enqueue` queues one unit per company under a new run_id and pins the run's captured_at,
+so every unit lands on the same snapshot_date whichever node runs it. Any number of
+`work` processes, on any number of nodes, then claim units until none are left; each
+unit's lease is renewed by a heartbeat thread while it runs, and units of a worker that
+died are picked up again once its lease expires.
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from backend.py.pipeline.checkpoint import RunCheckpoint, new_run_id
+from backend.py.pipeline.config import DEFAULT_COMPANIES
+from backend.py.pipeline.engine import CRAWL_MODES
+from backend.py.pipeline.ingest_weekly import _drain_spool, _run_one
+from backend.py.storage.work_queue import DEFAULT_LEASE_SEC, DEFAULT_MAX_ATTEMPTS, WorkQueue, WorkUnit
+
+DEFAULT_POLL_SEC = 30.0
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_company_unit(unit: WorkUnit) -> dict:
+    """Crawl one company; the local checkpoint lets a retry on this node resume it."""
+    checkpoint = RunCheckpoint(unit.run_id).company(unit.company_key)
+    result = _run_one(
+        unit.company_key,
+        enforce_quality_gate=unit.payload.get("quality_gate", True),
+        crawl_mode=unit.crawl_mode,
+        checkpoint=checkpoint,
+        captured_at=datetime.fromisoformat(unit.payload["captured_at"]),
+    )
+    if result["status"] != "fail":
+        checkpoint.remove()
+    return result
+
+
+# Handlers by unit_kind. Collector plugins crawl a company as a whole today; listing
+# shards and detail batches get a handler once a plugin can run part of its crawl.
+UNIT_HANDLERS: dict[str, Callable[[WorkUnit], dict]] = {
+    "company": run_company_unit,
+}
+
+
+class _Heartbeat:
+    """Renews a unit's lease every `interval` seconds until stopped."""
+
+    def __init__(self, queue: WorkQueue, unit: WorkUnit, owner: str, interval: float):
+        self.queue = queue
+        self.unit = unit
+        self.owner = owner
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{unit.id}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                held = self.queue.heartbeat(self.unit, self.owner)
+            except Exception as e:  # noqa: BLE001
+                # A database blip; the lease survives until it expires, so keep trying.
+                print(f"[BEAT] unit {self.unit.id}: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            if not held and not self.lost:
+                self.lost = True
+                print(f"[BEAT] unit {self.unit.id}: lease lost, another worker may rerun it", file=sys.stderr)
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: WorkQueue,
+        owner: Optional[str] = None,
+        heartbeat_sec: Optional[float] = None,
+        handlers: Optional[dict[str, Callable[[WorkUnit], dict]]] = None,
+    ):
+        self.queue = queue
+        self.owner = owner or worker_id()
+        self.heartbeat_sec = heartbeat_sec or queue.lease_sec / 3
+        self.handlers = handlers if handlers is not None else UNIT_HANDLERS
+        self.results: list[dict] = []
+
+    def run_once(self, run_id: Optional[str] = None) -> Optional[dict]:
+        """Claim and run one unit; None when nothing is claimable."""
+        unit = self.queue.claim(self.owner, run_id)
+        if unit is None:
+            return None
+        print(f"[UNIT] {unit.id} {unit.company_key} {unit.unit_kind}{':' + unit.unit_key if unit.unit_key else ''} "
+              f"(run_id={unit.run_id} attempt={unit.attempts})")
+        handler = self.handlers.get(unit.unit_kind)
+        with _Heartbeat(self.queue, unit, self.owner, self.heartbeat_sec):
+            try:
+                if handler is None:
+                    raise RuntimeError(f"no handler for unit kind {unit.unit_kind!r}")
+                result = handler(unit)
+            except Exception as e:  # noqa: BLE001
+                result = {"company": unit.company_key, "status": "fail",
+                          "error_type": type(e).__name__, "error_message": str(e)}
+        if result["status"] == "fail":
+            error = result.get("reason") or f"{result.get('error_type')}: {result.get('error_message')}"
+            held = self.queue.fail(unit, self.owner, error, result)
+        else:
+            held = self.queue.complete(unit, self.owner, result)
+        if not held:
+            print(f"[UNIT] {unit.id}: lease was reclaimed before the result was saved")
+        self.results.append(result)
+        return result
+
+    def run(
+        self,
+        run_id: Optional[str] = None,
+        wait: bool = False,
+        poll_sec: float = DEFAULT_POLL_SEC,
+        stop: Optional[threading.Event] = None,
+    ) -> list[dict]:
+        """Work until the queue is empty, or with `wait`, until `stop` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.run_once(run_id) is None:
+                if not wait:
+                    break
+                stop.wait(poll_sec)
+        return self.results
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Distributed weekly ingestion over the Postgres work queue.")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    enq = sub.add_parser("enqueue", help="Queue a run; prints its run_id.")
+    enq.add_argument("--companies", default=",".join(DEFAULT_COMPANIES), help="Comma-separated company keys.")
+    enq.add_argument("--crawl-mode", choices=CRAWL_MODES, default="full")
+    enq.add_argument("--run-id", default=None, help="Run id (default: current UTC timestamp).")
+    enq.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Claims per unit before it fails.")
+    enq.add_argument("--no-quality-gate", action="store_true", help="Disable minimum fetched-postings quality gate.")
+
+    work = sub.add_parser("work", help="Claim and run units.")
+    work.add_argument("--run-id", default=None, help="Only claim units of this run.")
+    work.add_argument("--wait", action="store_true", help="Keep polling for new units instead of exiting when idle.")
+    work.add_argument("--poll-sec", type=float, default=DEFAULT_POLL_SEC)
+    work.add_argument("--lease-sec", type=float, default=DEFAULT_LEASE_SEC, help="Lease length; renewed every third.")
+
+    st = sub.add_parser("status", help="Unit counts by status for a run.")
+    st.add_argument("run_id")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+
+    if args.command == "enqueue":
+        run_id = args.run_id or new_run_id()
+        companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+        payload = {"captured_at": datetime.utcnow().isoformat(), "quality_gate": not args.no_quality_gate}
+        added = WorkQueue().enqueue(
+            run_id,
+            [(company, "company", "", payload) for company in companies],
+            crawl_mode=args.crawl_mode,
+            max_attempts=args.max_attempts,
+        )
+        print(f"run_id: {run_id}")
+        print(f"queued units: {added}")
+        return 0
+
+    if args.command == "status":
+        counts = WorkQueue().status(args.run_id)
+        print(" ".join(f"{s}={counts.get(s, 0)}" for s in ("pending", "leased", "done", "failed")))
+        return 1 if counts.get("failed") else 0
+
+    worker = Worker(WorkQueue(lease_sec=args.lease_sec))
+    print(f"worker: {worker.owner}")
+    t0 = time.monotonic()
+    results = worker.run(args.run_id, wait=args.wait, poll_sec=args.poll_sec)
+    _drain_spool([r["company"] for r in results])
+    fail = sum(1 for r in results if r["status"] == "fail")
+    print(f"finished: units={len(results)} fail={fail} ({time.monotonic() - t0:.1f}s)")
+    return 1 if fail else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Drain the local fact spool into job_location_facts.
+
+    python -m backend.py.pipeline.load_spool [--companies meta,google] [--attempts 5]
+
+Runs load their own spool partition when the crawl finishes and ingest_weekly drains
+leftovers before and after each run; this entry point is for loading after a database
+outage without starting a crawl.
+"""
+import argparse
+import sys
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from backend.py.storage.neon import refresh_mv_country_month_counts
+from backend.py.storage.spool import DEFAULT_LOAD_ATTEMPTS, FactSpool, drain, print_drain_stats
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Load spooled job_location_facts rows into the database.")
+    p.add_argument("--companies", default=None, help="Comma-separated company keys (default: all spooled).")
+    p.add_argument("--spool-dir", default=None, help="Spool root (default: COMPANYLOC_SPOOL_DIR).")
+    p.add_argument("--attempts", type=int, default=DEFAULT_LOAD_ATTEMPTS, help="Tries per segment on transient errors.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+
+    companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()] if args.companies else None
+    parts = list(FactSpool(args.spool_dir).partitions(companies))
+    if not parts:
+        print("Spool is empty.")
+        return 0
+    print(f"Partitions: {len(parts)}")
+    stats = drain(parts, attempts=args.attempts)
+    print_drain_stats(stats)
+    if stats["loaded"]:
+        refresh_mv_country_month_counts()
+    return 1 if stats["pending"] or stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
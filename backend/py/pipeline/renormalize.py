@@ -0,0 +1,141 @@
+"""
+Re-apply the current location normalizers to archived snapshots, without network access.
+
+    python -m backend.py.pipeline.renormalize --since 2026-07-01 [--until 2026-10-19] \
+        [--companies meta,google] [--workers 8] [--dry-run]
+
+Each finished archive partition (company, snapshot_date; see storage.archive) in the
+range is handled by a worker process: its postings go through the plugin's
+parse_location, the gazetteer, location_aliases and the GeoNames index exactly as in a
+live run, and when the resulting rows differ from the stored ones the company's
+job_location_facts for that snapshot_date are replaced in one transaction.
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from backend.py.normalizers.geonames import shared_index
+from backend.py.normalizers.locations import LocationNormalizer, ParsedLocation, aliases_for
+from backend.py.pipeline.common import get_company_id_by_name
+from backend.py.pipeline.config import DEFAULT_COMPANIES
+from backend.py.pipeline.engine import Posting, RunContext, build_rows, load_plugin
+from backend.py.storage.archive import ResponseArchive
+from backend.py.storage.neon import (
+    fetch_location_aliases,
+    fetch_snapshot_location_rows,
+    refresh_mv_country_month_counts,
+    replace_job_location_facts,
+)
+
+
+def _comparable(row: tuple) -> tuple:
+    # Same fields and order as storage.neon.fetch_snapshot_location_rows.
+    return (row[1], row[7], row[8], row[9], row[10], round(float(row[11] or 0.0), 4), row[15])
+
+
+def renormalize_partition(
+    archive_root: str,
+    company: str,
+    snapshot_date: str,
+    aliases: dict[str, dict[str, ParsedLocation]],
+    dry_run: bool = False,
+) -> dict:
+    """Rebuild one partition's rows; runs in a worker process."""
+    load_dotenv()
+    plugin = load_plugin(company)
+    if plugin is None:
+        raise RuntimeError(f"no pipeline plugin for {company}")
+    part = ResponseArchive(archive_root).partition(company, date.fromisoformat(snapshot_date))
+    manifest = part.manifest()
+    ctx = RunContext(
+        company_id=get_company_id_by_name(plugin.company_name),
+        captured_at=datetime.fromisoformat(manifest["captured_at"]),
+        snapshot_date=part.snapshot_date,
+        snapshot_month=date.fromisoformat(manifest["snapshot_month"]),
+        crawl_mode=manifest.get("crawl_mode", "full"),
+        locations=LocationNormalizer(aliases_for(aliases, company), geo=shared_index()),
+    )
+    postings = [Posting(**p) for p in part.postings()]
+    rows = build_rows(plugin, postings, ctx)
+
+    new = {_comparable(r) for r in rows}
+    old = {(*r[:5], round(r[5], 4), r[6]) for r in fetch_snapshot_location_rows(ctx.company_id, ctx.snapshot_date)}
+    changed = len(new ^ old)
+    if changed and not dry_run:
+        replace_job_location_facts(ctx.company_id, ctx.snapshot_date, rows)
+    return {
+        "company": company,
+        "snapshot_date": snapshot_date,
+        "postings": len(postings),
+        "rows": len(rows),
+        "changed": changed,
+        "written": bool(changed and not dry_run),
+    }
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Re-normalize archived snapshots into job_location_facts.")
+    p.add_argument("--since", type=date.fromisoformat, required=True, help="First snapshot_date (YYYY-MM-DD).")
+    p.add_argument("--until", type=date.fromisoformat, default=None, help="Last snapshot_date (default: today).")
+    p.add_argument(
+        "--companies",
+        default=",".join(DEFAULT_COMPANIES),
+        help="Comma-separated company keys, e.g. nvidia,nokia",
+    )
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    p.add_argument("--archive-dir", default=None, help="Archive root (default: COMPANYLOC_ARCHIVE_DIR).")
+    p.add_argument("--dry-run", action="store_true", help="Report changed rows without writing.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+
+    archive = ResponseArchive(args.archive_dir)
+    companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+    parts = list(archive.partitions(since=args.since, until=args.until or date.today(), companies=companies))
+    if not parts:
+        print("No archived snapshots in range.")
+        return 0
+    print(f"Partitions: {len(parts)}")
+
+    aliases = fetch_location_aliases()
+    failed = 0
+    written = 0
+    changed_rows = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(
+                renormalize_partition, str(archive.root), p.company, p.snapshot_date.isoformat(), aliases, args.dry_run
+            ): p
+            for p in parts
+        }
+        for fut in as_completed(futures):
+            p = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:  # noqa: BLE001
+                failed += 1
+                print(f"[FAIL] {p.company} {p.snapshot_date}: {e}")
+                continue
+            written += res["written"]
+            changed_rows += res["changed"]
+            status = "WRITE" if res["written"] else ("DIFF " if res["changed"] else "SAME ")
+            print(
+                f"[{status}] {res['company']} {res['snapshot_date']}: postings={res['postings']} "
+                f"rows={res['rows']} changed={res['changed']}"
+            )
+
+    if written:
+        refresh_mv_country_month_counts()
+    print(f"finished: partitions={len(parts)} rewritten={written} changed_rows={changed_rows} failed={failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Resident ingestion scheduler, in place of the weekly cron.
+
+    python -m backend.py.pipeline.scheduler [--companies amazon,apple] [--stagger-sec 300] [--once]
+        [--fixed-cadence]
+
+Only one scheduler runs per deployment: it holds a lockfile on its host and a Postgres
+advisory lock across hosts, and every company crawl also takes a per-company advisory
+lock (see ingest_weekly._run_one), so an overrunning crawl is never started twice.
+
+Each company runs on its own cadence and UTC start window (config.COMPANY_SCHEDULES);
+unless --fixed-cadence is given, pipeline.churn shortens the cadence and picks full or
+incremental crawls from each company's snapshot history.
+Companies run one at a time; starts are at least --stagger-sec apart and each company's
+earliest start is offset into its window by a stable per-company amount, so the crawls do
+not all hit the database and the network when a window opens. HTTP sessions (pooled
+connections, bootstrap tokens, the HTTP cache), the GeoNames index and database
+connections stay open between runs. Last start and result per company are kept in
+<cache dir>/scheduler_state.json.
+"""
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from backend.py.pipeline.churn import ChurnPlanner
+from backend.py.pipeline.config import COMPANY_SCHEDULES, DEFAULT_COMPANIES, SCHEDULE_DEFAULT
+from backend.py.pipeline.engine import reset_location_aliases
+from backend.py.pipeline.ingest_weekly import _drain_spool, _run_one
+from backend.py.storage.detail_cache import cache_dir
+from backend.py.storage.lockfile import LockfileHeldError, advisory_or_host_lock, lockfile
+from backend.py.storage.neon import reuse_connections
+
+DEFAULT_STAGGER_SEC = 300.0
+DEFAULT_POLL_SEC = 60.0
+# Failed runs, and runs skipped because the company was already crawling, are retried this soon.
+RETRY_HOURS = 2.0
+# A company counts as due slightly early, so a fixed cadence does not drift later each cycle.
+DUE_SLACK = 0.05
+SCHEDULER_LOCK = "companyloc:scheduler"
+# Plans are recomputed after every run and at least this often.
+PLAN_TTL_HOURS = 6.0
+
+
+# Raised by lockfile() when another scheduler holds this host's lock.
+SchedulerLockedError = LockfileHeldError
+
+
+@dataclass(frozen=True)
+class CompanySchedule:
+    company: str
+    every_hours: float = 168.0
+    window_utc: tuple[int, int] = (0, 24)
+    crawl_mode: str = "full"
+
+    def window_sec(self) -> int:
+        start, end = self.window_utc
+        return ((end - start) % 24 or 24) * 3600
+
+    def since_window_start(self, when: datetime) -> Optional[float]:
+        """Seconds since the start window opened, or None outside it."""
+        sec = when.hour * 3600 + when.minute * 60 + when.second
+        opened = (sec - self.window_utc[0] * 3600) % 86400
+        return opened if opened < self.window_sec() else None
+
+
+def load_schedules(companies: list[str]) -> list[CompanySchedule]:
+    out = []
+    for company in companies:
+        cfg = {**SCHEDULE_DEFAULT, **COMPANY_SCHEDULES.get(company, {})}
+        out.append(CompanySchedule(company, float(cfg["every_hours"]), tuple(cfg["window_utc"]), cfg["crawl_mode"]))
+    return out
+
+
+def start_offset_sec(company: str, spread_sec: float) -> float:
+    if spread_sec < 1:
+        return 0.0
+    return float(int(hashlib.sha1(company.encode("utf-8")).hexdigest(), 16) % int(spread_sec))
+
+
+class SchedulerState:
+    """Last start, finish and result per company, in a JSON file replaced atomically."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else cache_dir() / "scheduler_state.json"
+        try:
+            self._data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    def get(self, company: str) -> dict:
+        return dict(self._data.get(company) or {})
+
+    def started_at(self, company: str) -> Optional[datetime]:
+        value = self.get(company).get("started_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def record(self, company: str, **fields) -> None:
+        self._data[company] = {**self.get(company), **fields}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._data, indent=2, sort_keys=True, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def run_company(schedule: CompanySchedule) -> dict:
+    reset_location_aliases()
+    _drain_spool([schedule.company])
+    return _run_one(schedule.company, crawl_mode=schedule.crawl_mode)
+
+
+class Scheduler:
+    def __init__(
+        self,
+        schedules: list[CompanySchedule],
+        state: SchedulerState,
+        run: Callable[[CompanySchedule], dict] = run_company,
+        stagger_sec: float = DEFAULT_STAGGER_SEC,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        planner: Optional[Callable[[list[CompanySchedule], SchedulerState, datetime], dict]] = None,
+    ):
+        self.schedules = schedules
+        self.state = state
+        self.run = run
+        self.stagger_sec = stagger_sec
+        self.clock = clock
+        self.planner = planner
+        self.plans: dict[str, CompanySchedule] = {}
+        self._planned_at: Optional[datetime] = None
+        self._last_start: Optional[datetime] = None
+
+    def _replan(self, now: datetime) -> None:
+        if self.planner is None:
+            return
+        if self._planned_at is not None and now - self._planned_at < timedelta(hours=PLAN_TTL_HOURS):
+            return
+        try:
+            self.plans = self.planner(self.schedules, self.state, now)
+        except Exception as e:  # noqa: BLE001
+            # Keep the previous plans (or the configured schedules) until the history is readable.
+            print(f"[PLAN] skipped: {type(e).__name__}: {e}")
+        self._planned_at = now
+
+    def _offset(self, schedule: CompanySchedule) -> float:
+        # Spread the companies over the first part of their window, at most half of it.
+        spread = min(self.stagger_sec * len(self.schedules), schedule.window_sec() / 2)
+        return start_offset_sec(schedule.company, spread)
+
+    def due(self, now: datetime) -> list[CompanySchedule]:
+        """Companies that may start now; never-run ones first, then the longest waiting."""
+        ready = []
+        for schedule in (self.plans.get(s.company, s) for s in self.schedules):
+            opened = schedule.since_window_start(now)
+            if opened is None or opened < self._offset(schedule):
+                continue
+            rec = self.state.get(schedule.company)
+            last = self.state.started_at(schedule.company)
+            if last is not None:
+                # "running" here means an earlier scheduler died mid-run.
+                retry = rec.get("status") in ("fail", "running") or rec.get("reason") == "already_running"
+                wait_hours = RETRY_HOURS if retry else schedule.every_hours * (1 - DUE_SLACK)
+                if now - last < timedelta(hours=wait_hours):
+                    continue
+            ready.append((last or datetime.min, schedule))
+        ready.sort(key=lambda x: x[0])
+        return [s for _, s in ready]
+
+    def run_due(self, now: Optional[datetime] = None) -> Optional[dict]:
+        """Run the first due company unless the last start was under stagger_sec ago."""
+        now = now or self.clock()
+        if self._last_start is not None and (now - self._last_start).total_seconds() < self.stagger_sec:
+            return None
+        self._replan(now)
+        due = self.due(now)
+        if not due:
+            return None
+        schedule = due[0]
+        self._last_start = now
+        self.state.record(schedule.company, started_at=now.isoformat(), status="running", reason=None,
+                          crawl_mode=schedule.crawl_mode)
+        try:
+            result = self.run(schedule)
+        except Exception as e:  # noqa: BLE001
+            result = {"company": schedule.company, "status": "fail", "error_type": type(e).__name__,
+                      "error_message": str(e)}
+        finished = {"finished_at": self.clock().isoformat()}
+        if result["status"] == "ok" and schedule.crawl_mode == "full":
+            finished["last_full_at"] = now.isoformat()
+        self.state.record(
+            schedule.company,
+            status=result["status"],
+            reason=result.get("reason") or result.get("error_message"),
+            **finished,
+        )
+        self._planned_at = None  # the new snapshot changes the company's churn
+        return result
+
+    def run_forever(self, stop: threading.Event, poll_sec: float = DEFAULT_POLL_SEC) -> None:
+        while not stop.is_set():
+            if self.run_due() is None:
+                stop.wait(poll_sec)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run ingestion continuously on per-company cadences.")
+    p.add_argument("--companies", default=",".join(DEFAULT_COMPANIES), help="Comma-separated company keys.")
+    p.add_argument("--stagger-sec", type=float, default=DEFAULT_STAGGER_SEC, help="Minimum gap between starts.")
+    p.add_argument("--poll-sec", type=float, default=DEFAULT_POLL_SEC, help="Idle wait between schedule checks.")
+    p.add_argument("--state", default=None, help="State file (default: <cache dir>/scheduler_state.json).")
+    p.add_argument("--once", action="store_true", help="Run the companies due now, back to back, then exit.")
+    p.add_argument("--fixed-cadence", action="store_true", help="Use the configured cadence and crawl mode as is.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    load_dotenv()
+
+    companies = [x.strip().lower() for x in args.companies.split(",") if x.strip()]
+    if not companies:
+        print("No companies selected.")
+        return 2
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    try:
+        with lockfile(cache_dir() / "scheduler.lock"), advisory_or_host_lock(SCHEDULER_LOCK) as acquired:
+            if not acquired:
+                print("Another scheduler holds the database lock.")
+                return 2
+            reuse_connections()
+            scheduler = Scheduler(
+                load_schedules(companies),
+                SchedulerState(args.state),
+                stagger_sec=0.0 if args.once else args.stagger_sec,
+                planner=None if args.fixed_cadence else ChurnPlanner(),
+            )
+            print(f"scheduler: pid={os.getpid()} companies={','.join(companies)}")
+            if not args.once:
+                scheduler.run_forever(stop, args.poll_sec)
+                return 0
+            fail = 0
+            while not stop.is_set():
+                result = scheduler.run_due()
+                if result is None:
+                    break
+                fail += result["status"] == "fail"
+            return 1 if fail else 0
+    except SchedulerLockedError as e:
+        print(e)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
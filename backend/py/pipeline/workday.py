@@ -0,0 +1,88 @@
+from typing import Callable, Iterable, Optional
+
+from backend.py.collectors.facets import print_partition_stats
+from backend.py.collectors.workday import WorkdayClient, WorkdayTenant, workday_client, workday_tenants
+from backend.py.normalizers.locations import ParsedLocation, parse_country_first, parse_workday_location
+from backend.py.pipeline.common import as_text, ensure_company_id, normalize_country_iso2
+from backend.py.pipeline.engine import (
+    CollectorPlugin,
+    Posting,
+    RunContext,
+    checkpointed_listing,
+    close_detail_cache,
+    open_detail_cache,
+)
+
+
+# WorkdayTenant.location_parser -> location parser. Both parse country-first strings:
+# "workday" the ISO-2 list format ("US, CA, Santa Clara", "Germany, Munich") with the
+# detail-page country as fallback, "country_first" spelled-out or ISO-3 countries
+# ("USA, California, Santa Clara", "DEU, Berlin").
+LOCATION_PARSERS: dict[str, Callable[[str, Optional[str]], ParsedLocation]] = {
+    "workday": parse_workday_location,
+    "country_first": parse_country_first,
+}
+
+
+class WorkdayPlugin(CollectorPlugin):
+    """
+    Plugin for one Workday tenant of the collectors.workday registry. Listing rows only
+    carry a location summary, so `normalize` resolves each posting's locations (and
+    detail-page country) through the client, reusing parsed detail payloads from the
+    on-disk DetailCache. Tenants new to the database get their companies row on first run.
+    """
+
+    def __init__(self, tenant: WorkdayTenant, client: Optional[WorkdayClient] = None):
+        if tenant.location_parser not in LOCATION_PARSERS:
+            raise ValueError(f"{tenant.key}: unknown location_parser {tenant.location_parser!r}")
+        self.tenant = tenant
+        self.client = client or workday_client(tenant.key)
+        self.key = tenant.key
+        self.company_name = tenant.company_name
+        self.session_name = self.client.session_name
+        self._parse_location = LOCATION_PARSERS[tenant.location_parser]
+
+    def parse_location(self, loc: str, detail_country: Optional[str]) -> ParsedLocation:
+        return self._parse_location(loc, detail_country)
+
+    def resolve_company_id(self) -> str:
+        return ensure_company_id(self.company_name, f"{self.tenant.base}/{self.tenant.site}", source_type="workday")
+
+    def fetch(self, ctx: RunContext) -> Iterable[dict]:
+        postings = checkpointed_listing(ctx, self._crawl)
+        # Multi-location details rarely change week to week; reuse parsed payloads by externalPath.
+        open_detail_cache(ctx)
+        return postings
+
+    def _crawl(self) -> tuple[int, list[dict]]:
+        crawl_stats: dict = {}
+        total, postings = self.client.fetch_all_jobs(limit=20, stats=crawl_stats)
+        print_partition_stats(crawl_stats)
+        return total, postings
+
+    def raw_key(self, raw: dict) -> Optional[str]:
+        return as_text(raw.get("externalPath"))
+
+    def normalize(self, raw: dict, ctx: RunContext) -> Optional[Posting]:
+        job_key = as_text(raw.get("externalPath"))
+        if not job_key:
+            return None
+        locs, detail_country = self.client.get_effective_locations_for_job(raw, cache=ctx.state["detail_cache"])
+        locs = [x for x in (as_text(v) for v in locs) if x] if isinstance(locs, list) else []
+        if not locs:
+            return None
+        return Posting(
+            job_key=job_key,
+            title=as_text(raw.get("title")),
+            posted_at=None,
+            locations=locs,
+            detail_country=normalize_country_iso2(detail_country),
+        )
+
+    def close(self, ctx: RunContext) -> None:
+        close_detail_cache(ctx)
+
+
+def workday_plugin(key: str) -> Optional[WorkdayPlugin]:
+    tenant = workday_tenants().get(key)
+    return WorkdayPlugin(tenant) if tenant is not None else None
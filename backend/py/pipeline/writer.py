@@ -0,0 +1,134 @@
+import queue
+import threading
+from typing import Callable
+
+from backend.py.storage.neon import get_conn, upsert_job_location_facts
+
+WRITE_BATCH_SIZE = 2000
+# Batches waiting for the writer thread; once full, the crawl blocks instead of buffering.
+WRITE_MAX_PENDING = 4
+
+_STOP = object()
+
+
+class FactWriter:
+    """
+    Batched, background upsert of job_location_facts rows.
+
+    Rows are offered with their ON CONFLICT key (job_key, country_norm, city_norm or '').
+    Only the best-confidence row per key is kept: a row that does not beat what was already
+    offered is dropped, and a better one replaces the pending row or, if that row was
+    already written, is upserted again in a later batch. A batch therefore never holds the
+    same key twice, and the final table state matches a single deduplicated upsert.
+
+    Batches are committed one by one on a single connection from a writer thread, so
+    writes overlap with fetching and a crash keeps everything flushed before it.
+    `on_commit` receives the (key, confidence) pairs of each committed batch, and `seed`
+    restores them on a resumed run so committed rows are not written again.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = WRITE_BATCH_SIZE,
+        max_pending: int = WRITE_MAX_PENDING,
+        upsert: Callable = upsert_job_location_facts,
+        connect: Callable | None = get_conn,
+        on_commit: Callable[[list[tuple[tuple, float]]], None] | None = None,
+    ):
+        self.batch_size = batch_size
+        self._upsert = upsert
+        self._connect = connect
+        self._on_commit = on_commit
+        self._best: dict[tuple, float] = {}
+        self._pending: dict[tuple, tuple] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._error: BaseException | None = None
+        self._closed = False
+        self.batches = 0
+        self.rows_written = 0
+        self.superseded = 0
+        self._thread = threading.Thread(target=self._run, name="fact-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def unique_rows(self) -> int:
+        return len(self._best)
+
+    def seed(self, key: tuple, conf: float) -> None:
+        """Record a row already committed by an earlier attempt at this run."""
+        prev = self._best.get(key)
+        if prev is None or conf > prev:
+            self._best[key] = conf
+
+    def offer(self, key: tuple, row: tuple) -> bool:
+        """Queue `row` unless a row with the same key and at least its confidence was offered."""
+        self._raise_if_failed()
+        conf = row[11]
+        prev = self._best.get(key)
+        if prev is not None:
+            if conf <= prev:
+                return False
+            self.superseded += 1
+        self._best[key] = conf
+        self._pending[key] = row
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        batch = list(self._pending.items())
+        self._pending = {}
+        self._queue.put(batch)
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        """Flush, wait for the writer thread and re-raise its error, if any."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._error is None:
+            self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_if_failed()
+
+    def __enter__(self) -> "FactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # On a crawl error, still write what was accepted so far, then let the error win.
+        try:
+            self.close()
+        except Exception:  # noqa: BLE001
+            if exc_type is None:
+                raise
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("fact writer failed") from self._error
+
+    def _run(self) -> None:
+        conn = None
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is _STOP:
+                    return
+                if self._error is not None:
+                    continue  # keep draining so producers never block on a dead writer
+                try:
+                    if conn is None and self._connect is not None:
+                        conn = self._connect()
+                    self._upsert([row for _, row in batch], conn=conn)
+                    self.batches += 1
+                    self.rows_written += len(batch)
+                    if self._on_commit is not None:
+                        self._on_commit([(key, row[11]) for key, row in batch])
+                except BaseException as e:  # noqa: BLE001
+                    self._error = e
+        finally:
+            if conn is not None:
+                conn.close()
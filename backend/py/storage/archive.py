@@ -0,0 +1,260 @@
+"""
+Local archive of raw collector responses and of the postings each run normalized.
+
+    <archive dir>/objects/<sha[:2]>/<sha256>.gz    content-addressed, gzip-compressed blobs
+    <archive dir>/<company>/<snapshot_date>/
+        responses.jsonl    one line per HTTP response: session, method, url, status,
+                           content type, size and the body's sha256
+        postings.jsonl     postings as the plugin normalized them (while the run is going)
+        manifest.json      written when the run finishes; points at the postings blob
+
+The archive dir is COMPANYLOC_ARCHIVE_DIR or <cache dir>/archive, and
+COMPANYLOC_ARCHIVE=off turns archiving off. Bodies that do not change between runs
+(most job pages week to week) are stored once. Bodies are archived as the collector reads
+them, so a streamed response the collector stops reading early (Meta job pages past their
+JSON-LD block) is archived up to that point and marked truncated. pipeline.renormalize replays the
+archived postings through the current location normalizers without network access.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from requests.adapters import BaseAdapter
+
+from backend.py.collectors.http_cache import BodyTee
+from backend.py.storage.detail_cache import cache_dir
+
+
+def archive_dir() -> Path:
+    return Path(os.environ.get("COMPANYLOC_ARCHIVE_DIR") or cache_dir() / "archive")
+
+
+def archive_enabled() -> bool:
+    return (os.environ.get("COMPANYLOC_ARCHIVE") or "on").strip().lower() not in ("off", "0", "false", "no")
+
+
+class ResponseArchive:
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root is not None else archive_dir()
+
+    def blob_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / f"{sha}.gz"
+
+    def put_blob(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(gzip.compress(data, compresslevel=6))
+            os.replace(tmp, path)
+        return sha
+
+    def blob_writer(self) -> "BlobWriter":
+        return BlobWriter(self)
+
+    def get_blob(self, sha: str) -> bytes:
+        return gzip.decompress(self.blob_path(sha).read_bytes())
+
+    def partition(self, company: str, snapshot_date: date) -> "ArchivePartition":
+        return ArchivePartition(self, company, snapshot_date)
+
+    def partitions(
+        self,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        companies: Optional[Iterable[str]] = None,
+    ) -> Iterator["ArchivePartition"]:
+        """Finished partitions with since <= snapshot_date <= until, by company then date."""
+        wanted = set(companies) if companies else None
+        if not self.root.exists():
+            return
+        for company_dir in sorted(p for p in self.root.iterdir() if p.is_dir() and p.name != "objects"):
+            if wanted is not None and company_dir.name not in wanted:
+                continue
+            for day_dir in sorted(company_dir.iterdir()):
+                try:
+                    day = date.fromisoformat(day_dir.name)
+                except ValueError:
+                    continue
+                if (since and day < since) or (until and day > until):
+                    continue
+                part = ArchivePartition(self, company_dir.name, day)
+                if part.manifest() is not None:
+                    yield part
+
+
+class BlobWriter:
+    """A blob written chunk by chunk: gzip into a temp file, renamed to its sha256 on commit()."""
+
+    def __init__(self, archive: ResponseArchive):
+        self.archive = archive
+        self.size = 0
+        self._sha = hashlib.sha256()
+        tmp_dir = archive.root / "objects"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp = tmp_dir / f".{os.getpid()}.{threading.get_ident()}.{id(self)}.tmp"
+        self._gz = gzip.open(self._tmp, "wb", compresslevel=6)
+
+    def write(self, chunk: bytes) -> None:
+        self._sha.update(chunk)
+        self._gz.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        self._gz.close()
+        sha = self._sha.hexdigest()
+        path = self.archive.blob_path(sha)
+        if path.exists():
+            self._tmp.unlink(missing_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp, path)
+        return sha
+
+    def discard(self) -> None:
+        self._gz.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+class ArchivePartition:
+    """One company's archive for one snapshot_date; safe to write from several threads."""
+
+    def __init__(self, archive: ResponseArchive, company: str, snapshot_date: date):
+        self.archive = archive
+        self.company = company
+        self.snapshot_date = snapshot_date
+        self.path = archive.root / company / snapshot_date.isoformat()
+        self.responses = 0
+        self._lock = threading.Lock()
+
+    def _append(self, name: str, record: dict) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock, open(self.path / name, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def add_response(self, session: str, method: str, url: str, status: int, content_type: Optional[str],
+                     body: bytes) -> None:
+        self._add_response_record(session, method, url, status, content_type, len(body), self.archive.put_blob(body))
+
+    def _add_response_record(self, session: str, method: str, url: str, status: int,
+                             content_type: Optional[str], size: int, sha: str, truncated: bool = False) -> None:
+        record = {
+            "session": session,
+            "method": method,
+            "url": url,
+            "status": status,
+            "content_type": content_type,
+            "bytes": size,
+            "sha256": sha,
+            "fetched_at": time.time(),
+        }
+        if truncated:
+            record["truncated"] = True
+        self._append("responses.jsonl", record)
+        with self._lock:
+            self.responses += 1
+
+    def add_posting(self, posting: dict) -> None:
+        self._append("postings.jsonl", posting)
+
+    def manifest(self) -> Optional[dict]:
+        try:
+            return json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def finish(self, **fields) -> dict:
+        """Move the postings into a blob and write the manifest; the partition is then replayable."""
+        pending = self.path / "postings.jsonl"
+        data = pending.read_bytes() if pending.exists() else b""
+        manifest = {**fields, "company": self.company, "snapshot_date": self.snapshot_date.isoformat(),
+                    "postings": self.archive.put_blob(data)}
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / "manifest.json.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, self.path / "manifest.json")
+        pending.unlink(missing_ok=True)
+        return manifest
+
+    def postings(self) -> Iterator[dict]:
+        manifest = self.manifest()
+        if manifest is None:
+            return
+        for line in self.archive.get_blob(manifest["postings"]).decode("utf-8").splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+_bound_lock = threading.Lock()
+_bound: dict[str, ArchivePartition] = {}
+
+
+def bind_session(name: str, partition: Optional[ArchivePartition]) -> None:
+    """Archive collector session `name`'s responses into `partition` (None stops archiving)."""
+    with _bound_lock:
+        if partition is None:
+            _bound.pop(name, None)
+        else:
+            _bound[name] = partition
+
+
+class _ArchiveSink:
+    """BodyTee sink: streams a response body into a blob and records it when the body is closed."""
+
+    def __init__(self, partition: ArchivePartition, session: str, request, resp):
+        self.partition = partition
+        self.record = (session, request.method, request.url, resp.status_code,
+                       resp.headers.get("Content-Type"))
+        self.blob = partition.archive.blob_writer()
+
+    def write(self, chunk: bytes) -> None:
+        self.blob.write(chunk)
+
+    def close(self, complete: bool) -> None:
+        if not complete and self.blob.size == 0:
+            self.blob.discard()  # closed unread: nothing to archive
+            return
+        sha = self.blob.commit()
+        self.partition._add_response_record(*self.record, self.blob.size, sha, truncated=not complete)
+
+    def abort(self) -> None:
+        self.blob.discard()
+
+
+class ArchivingAdapter(BaseAdapter):
+    """
+    Outermost session adapter: while the session is bound to a partition, successful
+    response bodies (after any 304 has been answered from the HTTP cache) are archived
+    as the caller reads them.
+    """
+
+    def __init__(self, name: str, inner: BaseAdapter):
+        super().__init__()
+        self.name = name
+        self.inner = inner
+
+    @property
+    def poolmanager(self):
+        return self.inner.poolmanager
+
+    def send(self, request, **kwargs):
+        resp = self.inner.send(request, **kwargs)
+        partition = _bound.get(self.name)
+        if partition is None or resp.status_code >= 400 or request.method == "HEAD":
+            return resp
+        resp.raw = BodyTee(resp.raw, _ArchiveSink(partition, self.name, request, resp))
+        return resp
+
+    def build_response(self, req, resp):
+        return self.inner.build_response(req, resp)
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".cache"
+DEFAULT_TTL_SEC = 21 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def cache_dir() -> Path:
+    return Path(os.environ.get("COMPANYLOC_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def listing_fingerprint(*fields) -> str:
+    """
+    Hash of the listing fields that, when changed, invalidate a cached detail payload.
+    Callers should leave out volatile fields such as "Posted 3 Days Ago".
+    """
+    payload = json.dumps([f if isinstance(f, (str, int, float)) or f is None else str(f) for f in fields])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class DetailCache:
+    """
+    On-disk cache of parsed job-detail payloads, keyed by (namespace, key).
+
+    Entries are only served while younger than `ttl_sec` and while the listing
+    fingerprint matches, so changed postings are re-fetched.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path) if path else cache_dir() / "detail_cache.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_sec = float(ttl_sec)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS detail_cache (
+              namespace TEXT NOT NULL,
+              key TEXT NOT NULL,
+              fingerprint TEXT NOT NULL,
+              payload TEXT NOT NULL,
+              fetched_at REAL NOT NULL,
+              PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_detail_cache_fetched_at ON detail_cache (fetched_at)")
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str, fingerprint: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, payload, fetched_at FROM detail_cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or row[0] != fingerprint or time.time() - row[2] > self.ttl_sec:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[1])
+
+    def put(self, namespace: str, key: str, fingerprint: str, payload: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO detail_cache (namespace, key, fingerprint, payload, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE SET
+                  fingerprint = excluded.fingerprint,
+                  payload = excluded.payload,
+                  fetched_at = excluded.fetched_at
+                """,
+                (namespace, key, fingerprint, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the oldest ones beyond `max_entries`."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM detail_cache WHERE fetched_at < ?", (time.time() - self.ttl_sec,))
+            removed = cur.rowcount
+            cur = self._conn.execute(
+                """
+                DELETE FROM detail_cache WHERE rowid IN (
+                  SELECT rowid FROM detail_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
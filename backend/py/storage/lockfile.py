@@ -0,0 +1,66 @@
+"""
+Host-local exclusive locks on files, for the scheduler's one-per-host lock and for
+per-company crawl locks while the database (and its advisory locks) is unreachable.
+"""
+import os
+import sys
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import psycopg2
+
+from backend.py.storage.detail_cache import cache_dir
+from backend.py.storage.neon import advisory_lock
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockfileHeldError(RuntimeError):
+    pass
+
+
+@contextmanager
+def lockfile(path: Path) -> Iterator[None]:
+    """Exclusive lock on `path` for this process; raises LockfileHeldError if held."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+")
+    try:
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError as e:
+            raise LockfileHeldError(f"{path} is held by another process") from e
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        yield
+    finally:
+        f.close()  # releases the lock
+
+
+@contextmanager
+def advisory_or_host_lock(name: str) -> Iterator[bool]:
+    """
+    neon.advisory_lock(name), or, while the database is unreachable, a lockfile for `name`
+    under <cache dir>/locks, so crawls go on into the spool instead of failing. Yields
+    False when the lock is held elsewhere; the fallback only excludes runs on this host.
+    """
+    with ExitStack() as stack:
+        try:
+            acquired = stack.enter_context(advisory_lock(name))
+        except psycopg2.OperationalError as e:
+            print(f"[LOCK] {name}: database unreachable ({type(e).__name__}), using a host lockfile", file=sys.stderr)
+            try:
+                stack.enter_context(lockfile(cache_dir() / "locks" / f"{name.replace(':', '_')}.lock"))
+                acquired = True
+            except LockfileHeldError:
+                acquired = False
+        yield acquired
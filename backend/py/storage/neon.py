@@ -1,16 +1,166 @@
 import json
 import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import execute_values
 
-def get_conn():
-    url = os.environ.get("NEON_DATABASE_URL")
+# Idle connections older than this are pinged before reuse (Neon drops idle sessions).
+REUSE_PING_AFTER_SEC = 60.0
+# A held advisory lock's session is pinged this often, so it never sits idle long enough to be dropped.
+LOCK_KEEPALIVE_SEC = 30.0
+
+_reuse = False
+_local = threading.local()
+
+
+def _connect(direct: bool = False):
+    """
+    A new connection to NEON_DATABASE_URL; with `direct`, to NEON_DIRECT_DATABASE_URL when
+    set, for session state (advisory locks) that a transaction pooler would not keep.
+    """
+    url = (os.environ.get("NEON_DIRECT_DATABASE_URL") if direct else None) or os.environ.get("NEON_DATABASE_URL")
     if not url:
         raise RuntimeError("NEON_DATABASE_URL is not set")
     return psycopg2.connect(url)
 
-def upsert_job_location_facts(rows):
+
+def _alive(conn) -> bool:
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_conn():
+    """
+    A connection for one `with get_conn() as conn:` transaction. After reuse_connections(),
+    each thread keeps one long-lived connection instead of opening a new one per call.
+    """
+    if not _reuse:
+        return _connect()
+    conn = getattr(_local, "conn", None)
+    now = time.monotonic()
+    if (
+        conn is None
+        or conn.closed
+        or conn.info.transaction_status != TRANSACTION_STATUS_IDLE
+        or (now - _local.used_at > REUSE_PING_AFTER_SEC and not _alive(conn))
+    ):
+        if conn is not None and not conn.closed:
+            conn.close()
+        conn = _local.conn = _connect()
+    _local.used_at = now
+    return conn
+
+
+def reuse_connections(enabled: bool = True) -> None:
+    """Keep connections open between calls; for resident processes (pipeline.scheduler)."""
+    global _reuse
+    _reuse = enabled
+
+
+class _LockKeepalive:
+    """Pings a lock session every `interval` seconds and reports if the lock is gone."""
+
+    def __init__(self, conn, name: str, interval: float):
+        self.conn = conn
+        self.name = name
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lock-keepalive-{name}", daemon=True)
+
+    def __enter__(self) -> "_LockKeepalive":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval) and not self.lost:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                        "AND pid = pg_backend_pid()"
+                    )
+                    held = cur.fetchone()[0] > 0
+            except psycopg2.Error as e:
+                held = False
+                print(f"[LOCK] {self.name}: keepalive failed: {type(e).__name__}: {e}", file=sys.stderr)
+            if not held:
+                self.lost = True
+                print(f"[LOCK] {self.name}: lock lost, another runner may start", file=sys.stderr)
+
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[bool]:
+    """
+    Try to take the session-level advisory lock `name` on a dedicated connection and hold
+    it for the block; yields False, without waiting, when another session holds it.
+
+    The session is pinged every LOCK_KEEPALIVE_SEC while the lock is held, so an idle
+    timeout never ends it (and the lock with it) mid-crawl. Session locks need a session:
+    behind a transaction pooler, set NEON_DIRECT_DATABASE_URL to a direct connection.
+    """
+    conn = _connect(direct=True)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+            acquired = bool(cur.fetchone()[0])
+        if not acquired:
+            yield False
+            return
+        with _LockKeepalive(conn, name, LOCK_KEEPALIVE_SEC):
+            yield True
+    finally:
+        conn.close()  # ends the session, releasing the lock
+
+
+UPSERT_FACTS_SQL = """
+    INSERT INTO job_location_facts (
+      company_id, job_key, snapshot_month, snapshot_date, title,
+      city_raw, country_raw, location_raw,
+      city_norm, region_norm, country_norm,
+      location_confidence, posted_at, job_hash, captured_at,
+      geoname_id, latitude, longitude
+    ) VALUES %s
+    ON CONFLICT (company_id, job_key, snapshot_date, country_norm, COALESCE(city_norm, ''))
+    DO UPDATE SET
+      title = EXCLUDED.title,
+      snapshot_month = EXCLUDED.snapshot_month,
+      city_raw = EXCLUDED.city_raw,
+      country_raw = EXCLUDED.country_raw,
+      location_raw = EXCLUDED.location_raw,
+      region_norm = EXCLUDED.region_norm,
+      location_confidence = EXCLUDED.location_confidence,
+      posted_at = EXCLUDED.posted_at,
+      job_hash = EXCLUDED.job_hash,
+      captured_at = EXCLUDED.captured_at,
+      geoname_id = EXCLUDED.geoname_id,
+      latitude = EXCLUDED.latitude,
+      longitude = EXCLUDED.longitude,
+      updated_at = now();
+    """
+
+
+def upsert_job_location_facts(rows, conn=None):
+    """
+    Upsert fact rows in one transaction. Pass `conn` to reuse an open connection
+    (the batch is committed on it); otherwise a connection is opened for the call.
+    """
     if not rows:
         return
 
@@ -19,6 +169,7 @@ def upsert_job_location_facts(rows):
         "city_raw", "country_raw", "location_raw",
         "city_norm", "region_norm", "country_norm",
         "location_confidence", "posted_at", "job_hash", "captured_at",
+        "geoname_id", "latitude", "longitude",
     ]
 
     offenders = []
@@ -46,30 +197,14 @@ def upsert_job_location_facts(rows):
         if len(offenders) > 10:
             print(f"  ... and {len(offenders) - 10} more", file=sys.stderr)
 
-    sql = """
-    INSERT INTO job_location_facts (
-      company_id, job_key, snapshot_month, snapshot_date, title,
-      city_raw, country_raw, location_raw,
-      city_norm, region_norm, country_norm,
-      location_confidence, posted_at, job_hash, captured_at
-    ) VALUES %s
-    ON CONFLICT (company_id, job_key, snapshot_date, country_norm, COALESCE(city_norm, ''))
-    DO UPDATE SET
-      title = EXCLUDED.title,
-      snapshot_month = EXCLUDED.snapshot_month,
-      city_raw = EXCLUDED.city_raw,
-      country_raw = EXCLUDED.country_raw,
-      location_raw = EXCLUDED.location_raw,
-      region_norm = EXCLUDED.region_norm,
-      location_confidence = EXCLUDED.location_confidence,
-      posted_at = EXCLUDED.posted_at,
-      job_hash = EXCLUDED.job_hash,
-      captured_at = EXCLUDED.captured_at,
-      updated_at = now();
-    """
+    if conn is not None:
+        with conn:
+            with conn.cursor() as cur:
+                execute_values(cur, UPSERT_FACTS_SQL, safe_rows, page_size=500)
+        return
     with get_conn() as conn:
         with conn.cursor() as cur:
-            execute_values(cur, sql, safe_rows, page_size=500)
+            execute_values(cur, UPSERT_FACTS_SQL, safe_rows, page_size=500)
 
 
 def refresh_mv_country_month_counts():
@@ -93,3 +228,177 @@ def refresh_mv_country_month_counts():
         except psycopg2.Error as e:
             # Keep ingestion robust before migrations are fully applied.
             print(f"[refresh_mv_country_month_counts] skipped {mv_name}: {e}", file=sys.stderr)
+
+
+def fetch_previous_snapshot_postings(company_id, before_date) -> dict[str, dict]:
+    """
+    Postings from the latest snapshot strictly before `before_date`, keyed by job_key,
+    shaped like collector output ({job_key, title, locations, posted_on}).
+    """
+    sql = """
+    SELECT job_key, title, location_raw, posted_at
+    FROM job_location_facts
+    WHERE company_id = %s
+      AND snapshot_date = (
+        SELECT MAX(snapshot_date)
+        FROM job_location_facts
+        WHERE company_id = %s AND snapshot_date < %s
+      )
+    ORDER BY job_key, id
+    """
+    out: dict[str, dict] = {}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (company_id, company_id, before_date))
+            for job_key, title, location_raw, posted_at in cur.fetchall():
+                item = out.get(job_key)
+                if item is None:
+                    item = {"job_key": job_key, "title": title, "locations": [], "posted_on": posted_at}
+                    out[job_key] = item
+                if location_raw and location_raw not in item["locations"]:
+                    item["locations"].append(location_raw)
+    return out
+
+
+def fetch_location_aliases() -> dict[str, dict[str, tuple]]:
+    """location_aliases as source -> raw_text -> (city_norm, region_norm, country_norm, confidence)."""
+    sql = "SELECT source, raw_text, city_norm, region_norm, country_norm, confidence FROM location_aliases"
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                rows = cur.fetchall()
+    except psycopg2.Error as e:
+        # Normalization still works from the built-in gazetteer.
+        print(f"[fetch_location_aliases] skipped: {e}", file=sys.stderr)
+        return {}
+    out: dict[str, dict[str, tuple]] = {}
+    for source, raw, city, region, country, conf in rows:
+        out.setdefault(source, {})[raw] = (city, region, country, float(conf))
+    return out
+
+
+def insert_location_aliases(aliases: dict[str, tuple], source: str = "pipeline") -> list[str]:
+    """
+    Add newly resolved aliases under `source`; rows this source already has for a raw_text
+    are kept. Returns the raw_text of the rows actually inserted.
+    """
+    if not aliases:
+        return []
+    rows = [(raw, city, region, country, conf, source) for raw, (city, region, country, conf) in aliases.items()]
+    sql = """
+    INSERT INTO location_aliases (raw_text, city_norm, region_norm, country_norm, confidence, source)
+    VALUES %s
+    ON CONFLICT (source, raw_text) DO NOTHING
+    RETURNING raw_text
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                inserted = execute_values(cur, sql, rows, page_size=500, fetch=True)
+    except psycopg2.Error as e:
+        print(f"[insert_location_aliases] skipped: {e}", file=sys.stderr)
+        return []
+    return [r[0] for r in inserted]
+
+
+def fetch_snapshot_location_rows(company_id, snapshot_date) -> set[tuple]:
+    """
+    One company's facts for a snapshot_date as (job_key, location_raw, city_norm, region_norm,
+    country_norm, location_confidence, geoname_id) tuples, for comparing with re-normalized rows.
+    """
+    sql = """
+    SELECT job_key, location_raw, city_norm, region_norm, country_norm, location_confidence, geoname_id
+    FROM job_location_facts
+    WHERE company_id = %s AND snapshot_date = %s
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (company_id, snapshot_date))
+            return {(*r[:5], float(r[5] or 0.0), r[6]) for r in cur.fetchall()}
+
+
+def replace_job_location_facts(company_id, snapshot_date, rows) -> None:
+    """Swap one company's facts for a snapshot_date for `rows` in a single transaction."""
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM job_location_facts WHERE company_id = %s AND snapshot_date = %s",
+                (company_id, snapshot_date),
+            )
+            execute_values(cur, UPSERT_FACTS_SQL, rows, page_size=500)
+
+
+def load_spool_segment(segment_id: str, rows) -> bool:
+    """
+    Upsert one spool segment's rows and record `segment_id` in spool_loads, in one
+    transaction. Returns False, writing nothing, when the segment was already loaded.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            # The primary key also serializes concurrent loaders of the same segment.
+            cur.execute(
+                "INSERT INTO spool_loads (segment_id, row_count) VALUES (%s, %s) "
+                "ON CONFLICT (segment_id) DO NOTHING RETURNING segment_id",
+                (segment_id, len(rows)),
+            )
+            if cur.fetchone() is None:
+                return False
+            if rows:
+                execute_values(cur, UPSERT_FACTS_SQL, rows, page_size=500)
+    return True
+
+
+def fetch_snapshot_churn(since) -> list[tuple]:
+    """
+    Posting turnover between consecutive snapshots since `since`, as
+    (company name, snapshot_date, previous snapshot_date, jobs, added, removed) rows;
+    added/removed count distinct job_keys that appeared in / disappeared from the snapshot.
+    """
+    sql = """
+    WITH s AS (
+      SELECT DISTINCT company_id, snapshot_date, job_key
+      FROM job_location_facts
+      WHERE snapshot_date >= %s
+    ),
+    d AS (
+      SELECT company_id, snapshot_date,
+             LAG(snapshot_date) OVER w AS prev_date,
+             LEAD(snapshot_date) OVER w AS next_date
+      FROM (SELECT DISTINCT company_id, snapshot_date FROM s) x
+      WINDOW w AS (PARTITION BY company_id ORDER BY snapshot_date)
+    ),
+    j AS (
+      SELECT company_id, snapshot_date, job_key,
+             LAG(snapshot_date) OVER w AS prev_seen,
+             LEAD(snapshot_date) OVER w AS next_seen
+      FROM s
+      WINDOW w AS (PARTITION BY company_id, job_key ORDER BY snapshot_date)
+    ),
+    added AS (
+      SELECT company_id, snapshot_date, COUNT(*) AS jobs,
+             COUNT(*) FILTER (WHERE j.prev_seen IS DISTINCT FROM d.prev_date) AS added
+      FROM j JOIN d USING (company_id, snapshot_date)
+      GROUP BY company_id, snapshot_date
+    ),
+    removed AS (
+      -- Postings missing from the next snapshot, counted against that snapshot.
+      SELECT company_id, d.next_date AS snapshot_date,
+             COUNT(*) FILTER (WHERE j.next_seen IS DISTINCT FROM d.next_date) AS removed
+      FROM j JOIN d USING (company_id, snapshot_date)
+      WHERE d.next_date IS NOT NULL
+      GROUP BY company_id, d.next_date
+    )
+    SELECT c.name, a.snapshot_date, d.prev_date, a.jobs, a.added, r.removed
+    FROM added a
+    JOIN d USING (company_id, snapshot_date)
+    JOIN removed r USING (company_id, snapshot_date)
+    JOIN companies c ON c.id = a.company_id
+    WHERE d.prev_date IS NOT NULL
+    ORDER BY c.name, a.snapshot_date
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (since,))
+            return [(name, day, prev, int(jobs), int(added), int(removed))
+                    for name, day, prev, jobs, added, removed in cur.fetchall()]
@@ -0,0 +1,236 @@
+"""
+Local write-ahead spool for job_location_facts rows.
+
+    <spool dir>/<company>/<snapshot_date>/<seq>.seg      sealed segments, loaded in name order
+    <spool dir>/<company>/<snapshot_date>/<seq>.loaded   segments the loader has committed
+    <spool dir>/<company>/<snapshot_date>/<seq>.failed   segments the database rejected (bad rows)
+
+A segment is one FactWriter batch: a 16-byte header (magic, row count, CRC-32 of the
+payload) followed by the zlib-compressed JSON rows. It is written to a temp file, fsynced
+and renamed, so a sealed segment is always complete. The spool dir is
+COMPANYLOC_SPOOL_DIR or <cache dir>/spool, and COMPANYLOC_SPOOL=off makes runs upsert
+straight into the database again.
+
+`drain` loads sealed segments with storage.neon.load_spool_segment, which records each
+segment id in spool_loads in the same transaction as its rows (migration 0005), so a
+segment is applied exactly once even when a crash lands between the commit and the
+local rename, or two loaders race.
+"""
+import json
+import os
+import struct
+import time
+import uuid
+import zlib
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+import psycopg2
+
+from backend.py.storage.detail_cache import cache_dir
+from backend.py.storage.neon import load_spool_segment
+
+SEGMENT_MAGIC = b"CLSPOOL1"
+_HEADER = struct.Struct("<8sII")
+DEFAULT_LOAD_ATTEMPTS = 5
+DEFAULT_BACKOFF_SEC = 2.0
+MAX_BACKOFF_SEC = 60.0
+
+
+class SpoolCorruptError(Exception):
+    pass
+
+
+def spool_dir() -> Path:
+    return Path(os.environ.get("COMPANYLOC_SPOOL_DIR") or cache_dir() / "spool")
+
+
+def spool_enabled() -> bool:
+    return (os.environ.get("COMPANYLOC_SPOOL") or "on").strip().lower() not in ("off", "0", "false", "no")
+
+
+def encode_segment(rows: list[tuple]) -> bytes:
+    payload = zlib.compress(json.dumps([list(r) for r in rows], ensure_ascii=False, default=str).encode("utf-8"), 6)
+    return _HEADER.pack(SEGMENT_MAGIC, len(rows), zlib.crc32(payload)) + payload
+
+
+def decode_segment(data: bytes) -> list[tuple]:
+    if len(data) < _HEADER.size:
+        raise SpoolCorruptError("segment shorter than its header")
+    magic, count, crc = _HEADER.unpack_from(data)
+    payload = data[_HEADER.size:]
+    if magic != SEGMENT_MAGIC or zlib.crc32(payload) != crc:
+        raise SpoolCorruptError("bad segment magic or checksum")
+    rows = [tuple(r) for r in json.loads(zlib.decompress(payload))]
+    if len(rows) != count:
+        raise SpoolCorruptError(f"segment holds {len(rows)} rows, header says {count}")
+    return rows
+
+
+class SpoolPartition:
+    """One company's spooled rows for one snapshot_date."""
+
+    def __init__(self, root: Path, company: str, snapshot_date: date):
+        self.company = company
+        self.snapshot_date = snapshot_date
+        self.path = root / company / snapshot_date.isoformat()
+        self.segments_written = 0
+        self.rows_written = 0
+
+    def segment_id(self, path: Path) -> str:
+        return f"{self.company}/{self.snapshot_date.isoformat()}/{path.stem}"
+
+    def write(self, rows: list[tuple], conn=None) -> Path:
+        """
+        Seal `rows` as a new segment. Takes the arguments of upsert_job_location_facts so it
+        can stand in as FactWriter's upsert; `conn` is unused.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Time-ordered names keep later batches (confidence upgrades) loading after earlier ones,
+        # across resumed attempts too.
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        path = self.path / f"{name}.seg"
+        tmp = self.path / f"{name}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode_segment(rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.segments_written += 1
+        self.rows_written += len(rows)
+        return path
+
+    def pending(self) -> list[Path]:
+        if not self.path.exists():
+            return []
+        return sorted(self.path.glob("*.seg"))
+
+    def mark_loaded(self, path: Path) -> None:
+        os.replace(path, path.with_suffix(".loaded"))
+
+    def mark_corrupt(self, path: Path) -> None:
+        """Move an unreadable segment aside; it stays in the partition for inspection."""
+        os.replace(path, path.with_suffix(".corrupt"))
+
+    def mark_failed(self, path: Path) -> None:
+        """Move a segment the database rejected aside; it stays in the partition for inspection."""
+        os.replace(path, path.with_suffix(".failed"))
+
+    def cleanup(self) -> None:
+        """Drop loaded segments and, once nothing is pending, the partition directory."""
+        if not self.path.exists():
+            return
+        for p in self.path.glob("*.loaded"):
+            p.unlink(missing_ok=True)
+        for p in self.path.glob("*.tmp"):
+            p.unlink(missing_ok=True)  # never sealed; FactWriter resends on the next attempt
+        try:
+            self.path.rmdir()
+            self.path.parent.rmdir()
+        except OSError:
+            pass
+
+
+class FactSpool:
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root is not None else spool_dir()
+
+    def partition(self, company: str, snapshot_date: date) -> SpoolPartition:
+        return SpoolPartition(self.root, company, snapshot_date)
+
+    def partitions(self, companies: Optional[Iterable[str]] = None) -> Iterator[SpoolPartition]:
+        """Partitions with sealed segments waiting to be loaded, by company then date."""
+        wanted = set(companies) if companies else None
+        if not self.root.exists():
+            return
+        for company_dir in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            if wanted is not None and company_dir.name not in wanted:
+                continue
+            for day_dir in sorted(company_dir.iterdir()):
+                try:
+                    day = date.fromisoformat(day_dir.name)
+                except ValueError:
+                    continue
+                part = SpoolPartition(self.root, company_dir.name, day)
+                if part.pending():
+                    yield part
+
+
+def _is_transient(e: BaseException) -> bool:
+    return isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError, ConnectionError, TimeoutError))
+
+
+def _is_bad_data(e: BaseException) -> bool:
+    """Errors caused by the segment's own rows, which no retry or later drain can fix."""
+    return isinstance(e, (psycopg2.DataError, psycopg2.IntegrityError))
+
+
+def drain(
+    partitions: Iterable[SpoolPartition],
+    load: Callable[[str, list[tuple]], bool] = load_spool_segment,
+    *,
+    attempts: int = DEFAULT_LOAD_ATTEMPTS,
+    backoff_sec: float = DEFAULT_BACKOFF_SEC,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict:
+    """
+    Load sealed segments in order, retrying transient database errors with exponential
+    backoff. Segments that fail their checksum are renamed *.corrupt, and segments whose rows
+    the database rejects (DataError, IntegrityError) are renamed *.failed; both are skipped,
+    so one bad file does not block every later drain. When a segment still fails otherwise,
+    draining stops and the rest stays spooled for the next drain. Returns counts of loaded,
+    already-loaded (duplicate), corrupt, failed and pending segments.
+    """
+    stats = {"loaded": 0, "duplicates": 0, "corrupt": 0, "failed": 0, "rows": 0, "pending": 0, "error": None}
+    parts = list(partitions)
+    for i, part in enumerate(parts):
+        segments = part.pending()
+        for j, path in enumerate(segments):
+            try:
+                rows = decode_segment(path.read_bytes())
+            except SpoolCorruptError:
+                part.mark_corrupt(path)
+                stats["corrupt"] += 1
+                continue
+            applied = None
+            for attempt in range(1, attempts + 1):
+                try:
+                    applied = load(part.segment_id(path), rows)
+                    break
+                except Exception as e:  # noqa: BLE001
+                    if _is_bad_data(e):
+                        stats["error"] = f"{type(e).__name__}: {e}"
+                        break
+                    if attempt == attempts or not _is_transient(e):
+                        stats["error"] = f"{type(e).__name__}: {e}"
+                        stats["pending"] = len(segments) - j + sum(len(p.pending()) for p in parts[i + 1:])
+                        return stats
+                    sleep(min(MAX_BACKOFF_SEC, backoff_sec * 2 ** (attempt - 1)))
+            if applied is None:
+                part.mark_failed(path)
+                stats["failed"] += 1
+                continue
+            part.mark_loaded(path)
+            if applied:
+                stats["loaded"] += 1
+                stats["rows"] += len(rows)
+            else:
+                stats["duplicates"] += 1
+        part.cleanup()
+    return stats
+
+
+def print_drain_stats(stats: dict) -> None:
+    print(
+        "Spool segments loaded:", stats["loaded"],
+        f"(rows={stats['rows']} duplicates={stats['duplicates']} pending={stats['pending']})",
+    )
+    if stats.get("corrupt"):
+        print("Spool segments corrupt:", stats["corrupt"], "(renamed *.corrupt, not loaded)")
+    if stats.get("failed"):
+        print("Spool segments failed:", stats["failed"], "(renamed *.failed, not loaded)")
+    if stats["pending"]:
+        print("Spool load deferred:", stats["error"])
+    elif stats["error"]:
+        print("Spool load error:", stats["error"])
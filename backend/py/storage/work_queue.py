@@ -0,0 +1,143 @@
+"""
+Postgres-backed crawl work queue (crawl_work_units, migration 0006).
+
+A unit is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never
+block on or double-claim a row, and is leased to its worker until `lease_expires_at`.
+Workers extend the lease with heartbeats while the unit runs; a unit whose lease runs
+out (worker crashed, node lost) becomes claimable again, up to `max_attempts` claims.
+Completing or failing a unit only succeeds for the worker still holding its lease.
+"""
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from psycopg2.extras import Json, execute_values
+
+from backend.py.storage.neon import get_conn
+
+DEFAULT_LEASE_SEC = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class WorkUnit:
+    id: int
+    run_id: str
+    company_key: str
+    unit_kind: str = "company"
+    unit_key: str = ""
+    crawl_mode: str = "full"
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+
+
+_CLAIM_SQL = """
+WITH next AS (
+  SELECT id
+  FROM crawl_work_units
+  WHERE (status = 'pending' OR (status = 'leased' AND lease_expires_at < now()))
+    AND attempts < max_attempts
+    AND (%(run_id)s::text IS NULL OR run_id = %(run_id)s)
+  ORDER BY id
+  LIMIT 1
+  FOR UPDATE SKIP LOCKED
+)
+UPDATE crawl_work_units u
+SET status = 'leased',
+    lease_owner = %(owner)s,
+    lease_expires_at = now() + make_interval(secs => %(lease_sec)s),
+    heartbeat_at = now(),
+    attempts = u.attempts + 1,
+    updated_at = now()
+FROM next
+WHERE u.id = next.id
+RETURNING u.id, u.run_id, u.company_key, u.unit_kind, u.unit_key, u.crawl_mode, u.payload, u.attempts
+"""
+
+
+class WorkQueue:
+    def __init__(self, lease_sec: float = DEFAULT_LEASE_SEC):
+        self.lease_sec = lease_sec
+
+    def enqueue(
+        self,
+        run_id: str,
+        units: Iterable[tuple[str, str, str, dict]],
+        crawl_mode: str = "full",
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> int:
+        """Add (company_key, unit_kind, unit_key, payload) units; units already queued for the run are kept."""
+        rows = [(run_id, company, kind, key, crawl_mode, Json(payload), max_attempts)
+                for company, kind, key, payload in units]
+        if not rows:
+            return 0
+        sql = """
+        INSERT INTO crawl_work_units (run_id, company_key, unit_kind, unit_key, crawl_mode, payload, max_attempts)
+        VALUES %s
+        ON CONFLICT (run_id, company_key, unit_kind, unit_key) DO NOTHING
+        RETURNING id
+        """
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                return len(execute_values(cur, sql, rows, page_size=500, fetch=True))
+
+    def claim(self, owner: str, run_id: Optional[str] = None) -> Optional[WorkUnit]:
+        """Lease the oldest claimable unit (of `run_id`, if given) to `owner`; None when there is none."""
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_CLAIM_SQL, {"run_id": run_id, "owner": owner, "lease_sec": self.lease_sec})
+                row = cur.fetchone()
+        return WorkUnit(*row) if row else None
+
+    def heartbeat(self, unit: WorkUnit, owner: str) -> bool:
+        """Extend the lease; False if `owner` no longer holds it."""
+        sql = """
+        UPDATE crawl_work_units
+        SET lease_expires_at = now() + make_interval(secs => %s), heartbeat_at = now()
+        WHERE id = %s AND status = 'leased' AND lease_owner = %s
+        """
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (self.lease_sec, unit.id, owner))
+                return cur.rowcount == 1
+
+    def complete(self, unit: WorkUnit, owner: str, result: dict) -> bool:
+        sql = """
+        UPDATE crawl_work_units
+        SET status = 'done', result = %s, error = NULL, lease_expires_at = NULL, updated_at = now()
+        WHERE id = %s AND status = 'leased' AND lease_owner = %s
+        """
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (Json(result), unit.id, owner))
+                return cur.rowcount == 1
+
+    def fail(self, unit: WorkUnit, owner: str, error: str, result: Optional[dict] = None) -> bool:
+        """Release a failed unit: back to pending while attempts remain, else failed."""
+        sql = """
+        UPDATE crawl_work_units
+        SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+            error = %s, result = %s, lease_owner = NULL, lease_expires_at = NULL, updated_at = now()
+        WHERE id = %s AND status = 'leased' AND lease_owner = %s
+        """
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (error, Json(result) if result is not None else None, unit.id, owner))
+                return cur.rowcount == 1
+
+    def status(self, run_id: str) -> dict[str, int]:
+        """Unit counts by status for a run; expired leases count as pending, or failed when out of attempts."""
+        sql = """
+        SELECT CASE
+                 WHEN status = 'leased' AND lease_expires_at < now() AND attempts >= max_attempts THEN 'failed'
+                 WHEN status = 'leased' AND lease_expires_at < now() THEN 'pending'
+                 ELSE status
+               END,
+               COUNT(*)
+        FROM crawl_work_units
+        WHERE run_id = %s
+        GROUP BY 1
+        """
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (run_id,))
+                return {s: int(n) for s, n in cur.fetchall()}
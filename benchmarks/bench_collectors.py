@@ -0,0 +1,103 @@
+"""
+Offline collector benchmark over a recorded HTTP corpus.
+
+    # once, with network: record every request the collectors make
+    python -m benchmarks.bench_collectors --record --collectors nvidia,nokia
+
+    # any time after, no network: replay with latency and throttling injected
+    python -m benchmarks.bench_collectors --collectors nvidia,nokia --workers 1,4,8 \
+        --latency-ms 80 --rate-429 0.02
+
+The corpus directory is COLLECTOR_HTTP_CORPUS (default .cache/http_corpus) or --corpus.
+Request keys do not depend on the worker count, so one recording replays for every
+pagination/concurrency setting. A request missing from the corpus fails the run.
+"""
+import argparse
+import os
+import sys
+import time
+
+from backend.py.collectors import amazon, apple, google, intel, meta, microsoft, nokia, nvidia
+from backend.py.collectors.http import connection_stats, reset_all_sessions
+from backend.py.collectors.replay import Corpus, ReplayServer
+
+# name -> (session name, run(workers) -> (total, postings, ...), takes a worker count)
+COLLECTORS = {
+    "nvidia": (nvidia.SESSION_NAME, lambda w: nvidia.fetch_all_nvidia_jobs(workers=w), True),
+    "intel": (intel.SESSION_NAME, lambda w: intel.fetch_all_intel_jobs(workers=w), True),
+    "amazon": (amazon.SESSION_NAME, lambda w: amazon.fetch_all_amazon_jobs(workers=w), True),
+    "nokia": (nokia.SESSION_NAME, lambda w: nokia.fetch_all_nokia_jobs(workers=w), True),
+    "apple": (apple.SESSION_NAME, lambda w: apple.fetch_all_apple_jobs(), False),
+    "google": (google.SESSION_NAME, lambda w: google.fetch_all_google_jobs(), False),
+    "microsoft": (microsoft.SESSION_NAME, lambda w: microsoft.fetch_all_microsoft_jobs(), False),
+    "meta": (meta.SESSION_NAME, lambda w: meta.fetch_all_meta_jobs(), False),
+}
+
+
+def _run(name: str, workers: int | None) -> tuple[int, int, float]:
+    t0 = time.perf_counter()
+    total, postings = COLLECTORS[name][1](workers)[:2]
+    return total, len(postings), time.perf_counter() - t0
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--collectors", default="nokia", help="Comma-separated: " + ",".join(COLLECTORS))
+    p.add_argument("--workers", default="1,4", help="Comma-separated worker counts to compare.")
+    p.add_argument("--corpus", default=None)
+    p.add_argument("--record", action="store_true", help="Fetch live and record the corpus.")
+    p.add_argument("--latency-ms", type=float, default=50.0)
+    p.add_argument("--jitter-ms", type=float, default=10.0)
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args()
+
+    names = [x.strip() for x in args.collectors.split(",") if x.strip()]
+    unknown = [x for x in names if x not in COLLECTORS]
+    if unknown:
+        print("unknown collectors:", ", ".join(unknown))
+        return 2
+    worker_counts = [int(x) for x in args.workers.split(",") if x.strip()]
+    if args.corpus:
+        os.environ["COLLECTOR_HTTP_CORPUS"] = args.corpus
+
+    if args.record:
+        os.environ["COLLECTOR_HTTP_MODE"] = "record"
+        for name in names:
+            reset_all_sessions()
+            total, n, seconds = _run(name, max(worker_counts))
+            print(f"recorded {name}: total={total} postings={n} {seconds:.1f}s")
+        return 0
+
+    srv = ReplayServer(
+        Corpus(),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        seed=args.seed,
+    ).start()
+    os.environ["COLLECTOR_HTTP_MODE"] = "replay"
+    os.environ["COLLECTOR_HTTP_REPLAY_URL"] = srv.base_url
+    print(f"corpus={srv.corpus.root} latency={args.latency_ms}ms±{args.jitter_ms} rate_429={args.rate_429}")
+    try:
+        for name in names:
+            session_name, _, sharded = COLLECTORS[name]
+            for workers in worker_counts if sharded else [None]:
+                reset_all_sessions()
+                before = dict(srv.counts)
+                total, n, seconds = _run(name, workers)
+                counts = {k: srv.counts[k] - before[k] for k in srv.counts}
+                conn = connection_stats(session_name)
+                print(
+                    f"{name:<10} workers={workers or '-':<3} total={total:<6} postings={n:<6} "
+                    f"{seconds:7.2f}s requests={counts['requests']} throttled={counts['throttled']} "
+                    f"missing={counts['missing']} connections={conn['connections']}"
+                )
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Row building and best-confidence de-duplication over synthetic fact rows.
+
+    python -m benchmarks.bench_dedup [--rows 1000000] [--distinct-locations 5000]
+
+Two comparisons:
+
+  build:  the pre-engine path (parse every location, then as_text / normalize_country_iso2
+          on each row) against engine.iter_rows, which reuses one memoized
+          ResolvedLocation per (location, posting country).
+  dedup:  the removed common.dedup_rows_by_confidence (re-normalizes the key and calls
+          float() twice per comparison) against the single-pass dict of tuples used by
+          engine.build_rows / FactWriter, a columnar variant (key and confidence columns,
+          hash group-by max) and a sort + group-by variant.
+
+Every dedup variant must return the same rows; the run fails otherwise.
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from datetime import date, datetime
+
+from backend.py.normalizers.locations import parse_country_last
+from backend.py.pipeline.common import as_text, normalize_country_iso2
+from backend.py.pipeline.engine import Posting, RunContext, iter_rows
+from tests.support import ExamplePlugin
+
+CITIES = ["Zurich", "London", "Austin", "Munich", "Bangalore", "Toronto", "Sydney", "Paris", "Remote"]
+COUNTRIES = ["Switzerland", "UK", "Texas", "Germany", "India", "ON", "Australia", "France", "USA"]
+
+
+class _Plugin(ExamplePlugin):
+    parse_location = staticmethod(parse_country_last)
+
+
+def _postings(n_rows: int, n_locations: int, seed: int = 7) -> list[Posting]:
+    rng = random.Random(seed)
+    locations = [f"{rng.choice(CITIES)} {i % 97}, {rng.choice(COUNTRIES)}" for i in range(n_locations)]
+    posts, rows = [], 0
+    while rows < n_rows:
+        locs = rng.sample(locations, rng.randint(1, 4))
+        posts.append(Posting(job_key=str(len(posts) // 8), title="Engineer", posted_at=None, locations=locs))
+        rows += len(locs)
+    return posts
+
+
+def _ctx() -> RunContext:
+    return RunContext(
+        company_id="c-1",
+        captured_at=datetime(2026, 10, 19),
+        snapshot_date=date(2026, 10, 19),
+        snapshot_month=date(2026, 10, 1),
+    )
+
+
+def legacy_rows(posts: list[Posting], ctx: RunContext) -> list[tuple]:
+    rows = []
+    for post in posts:
+        for loc in post.locations:
+            city, region, country, conf = parse_country_last(loc, post.detail_country)
+            rows.append((
+                ctx.company_id, post.job_key, ctx.snapshot_month, ctx.snapshot_date, post.title, None, None, loc,
+                as_text(city), as_text(region), normalize_country_iso2(country), float(conf or 0.0),
+                post.posted_at, "h", ctx.captured_at,
+            ))
+    return rows
+
+
+def engine_rows(posts: list[Posting], ctx: RunContext) -> list[tuple[tuple, tuple]]:
+    plugin = _Plugin()
+    return [pair for post in posts for pair in iter_rows(plugin, post, ctx)]
+
+
+def legacy_dedup(rows: list[tuple]) -> list[tuple]:
+    dedup = {}
+    for row in rows:
+        company_id = as_text(row[0]) or ""
+        job_key = as_text(row[1]) or ""
+        snapshot_date = row[3]
+        country_norm = normalize_country_iso2(row[10])
+        city_norm = as_text(row[8]) or ""
+        key = (company_id, job_key, snapshot_date, country_norm, city_norm)
+        conf = float(row[11] or 0.0)
+        prev = dedup.get(key)
+        if prev is None or conf > float(prev[11] or 0.0):
+            dedup[key] = row
+    return list(dedup.values())
+
+
+def dict_dedup(pairs: list[tuple[tuple, tuple]]) -> list[tuple]:
+    best: dict[tuple, tuple] = {}
+    for key, row in pairs:
+        prev = best.get(key)
+        if prev is None or row[11] > prev[11]:
+            best[key] = row
+    return list(best.values())
+
+
+def columnar_dedup(pairs: list[tuple[tuple, tuple]]) -> list[tuple]:
+    keys = [k for k, _ in pairs]
+    conf = array("d", (r[11] for _, r in pairs))
+    best: dict[tuple, int] = {}
+    for i, key in enumerate(keys):
+        j = best.setdefault(key, i)
+        if conf[i] > conf[j]:
+            best[key] = i
+    return [pairs[i][1] for i in best.values()]
+
+
+def sort_dedup(pairs: list[tuple[tuple, tuple]]) -> list[tuple]:
+    order = sorted(range(len(pairs)), key=lambda i: (pairs[i][0], -pairs[i][1][11], i))
+    out, prev = [], None
+    for i in order:
+        if pairs[i][0] != prev:
+            prev = pairs[i][0]
+            out.append(pairs[i][1])
+    return out
+
+
+def _timed(label: str, fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    print(f"  {label:<28} {time.perf_counter() - t0:7.3f}s")
+    return out
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--distinct-locations", type=int, default=5000)
+    args = p.parse_args()
+
+    posts = _postings(args.rows, args.distinct_locations)
+    print(f"postings={len(posts)} rows~{args.rows} distinct_locations={args.distinct_locations}")
+
+    print("build:")
+    rows = _timed("legacy (normalize per row)", legacy_rows, posts, _ctx())
+    ctx = _ctx()
+    pairs = _timed("engine.iter_rows (memoized)", engine_rows, posts, ctx)
+    print(f"  location cache hit rate      {ctx.locations.hit_rate:.3f}")
+
+    print("dedup:")
+    expected = {(r[1], r[10], r[8] or ""): r[7] for r in _timed("legacy dedup_rows_by_conf.", legacy_dedup, rows)}
+    results = {
+        "dict of tuples (engine)": _timed("dict of tuples (engine)", dict_dedup, pairs),
+        "columnar hash group-by": _timed("columnar hash group-by", columnar_dedup, pairs),
+        "sort + group-by": _timed("sort + group-by", sort_dedup, pairs),
+    }
+    for label, out in results.items():
+        got = {(r[1], r[10], r[8] or ""): r[7] for r in out}
+        if got != expected:
+            print(f"{label}: result differs from legacy dedup")
+            return 1
+    print(f"unique rows={len(expected)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
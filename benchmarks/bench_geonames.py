@@ -0,0 +1,91 @@
+"""
+Benchmark for the offline GeoNames index.
+
+    python -m benchmarks.bench_geonames [--cities cities15000.txt] [--synthetic 200000] [--lookups 200000]
+
+Without --cities, a synthetic dump of --synthetic populated places is generated. Reports
+build time, index size and lookups per second for exact, one-edit fuzzy and memoized
+lookups (LocationNormalizer.geocode, which is what the pipeline calls per location row).
+"""
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from backend.py.normalizers.geonames import GeoIndex, build_index
+from backend.py.normalizers.locations import LocationNormalizer
+
+
+def _synthetic_dump(path: Path, n: int, seed: int = 7) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    countries = ["US", "DE", "IN", "GB", "FR", "CN", "BR", "JP"]
+    names = []
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))).title()
+            country = rng.choice(countries)
+            names.append((name, country))
+            f.write(
+                "\t".join([
+                    str(1_000_000 + i), name, name, "", f"{rng.uniform(-60, 60):.5f}", f"{rng.uniform(-180, 180):.5f}",
+                    "P", "PPL", country, "", f"{rng.randint(1, 40):02d}", "", "", "", str(rng.randint(15_000, 9_000_000)),
+                ])
+                + "\n"
+            )
+    return names
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(len(name))
+    return name[:i] + name[i + 1:]
+
+
+def _rate(fn, queries) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return len(queries) / (time.perf_counter() - t0)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=Path, default=None)
+    p.add_argument("--synthetic", type=int, default=200_000)
+    p.add_argument("--lookups", type=int, default=200_000)
+    args = p.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        cities = args.cities
+        if cities is None:
+            cities = Path(tmp) / "cities.txt"
+            names = _synthetic_dump(cities, args.synthetic)
+        else:
+            with open(cities, encoding="utf-8") as f:
+                names = [(fields[1], fields[8]) for fields in (line.split("\t") for line in f) if len(fields) > 8]
+
+        t0 = time.perf_counter()
+        stats = build_index(cities, Path(tmp) / "geo.idx")
+        print(f"build: {time.perf_counter() - t0:.1f}s " + " ".join(f"{k}={v}" for k, v in stats.items()))
+
+        index = GeoIndex(Path(tmp) / "geo.idx")
+        sample = [rng.choice(names) for _ in range(args.lookups)]
+        exact = [(name, country) for name, country in sample]
+        fuzzy = [(_typo(name, rng), country) for name, country in sample[: max(1, args.lookups // 10)]]
+        # Postings repeat a few thousand distinct locations many times over.
+        hot = sample[:2000]
+        memo = [(name, None, country) for name, country in (rng.choice(hot) for _ in range(args.lookups))]
+        normalizer = LocationNormalizer(geo=index)
+
+        print(f"exact:    {_rate(index.lookup, exact):>12,.0f} lookups/s")
+        print(f"fuzzy:    {_rate(index.lookup, fuzzy):>12,.0f} lookups/s")
+        print(f"memoized: {_rate(normalizer.geocode, memo):>12,.0f} lookups/s")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for the Google careers results-page parser.
+
+    python -m benchmarks.bench_google_parser [page.html ...] [--repeat N]
+
+Without arguments it runs over benchmarks/fixtures/google/*.html. Pass saved results
+pages to benchmark against real markup. The regex-per-card parser that the single-pass
+extractor replaced is kept here as the baseline, and both outputs must match.
+"""
+import argparse
+import html
+import re
+import sys
+import time
+from pathlib import Path
+
+from backend.py.collectors.google import _extract_job_cards
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "google"
+
+
+def _legacy_clean_text(raw: str | None) -> str:
+    if not raw:
+        return ""
+    text = re.sub(r"<[^>]+>", " ", raw)
+    text = html.unescape(text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def legacy_extract_job_cards(html_text: str) -> list[dict]:
+    out: list[dict] = []
+    parts = re.split(r'<li class="lLd3Je"[^>]*>', html_text)
+    if len(parts) <= 1:
+        return out
+
+    for part in parts[1:]:
+        card = part.split("</li>", 1)[0]
+
+        id_match = re.search(r'jsdata="Aiqs8c;(\d+);', card)
+        href_match = re.search(r'href="(jobs/results/[^"]+)"', card)
+        title_match = re.search(r'<h3 class="QJPWVe">(.*?)</h3>', card, flags=re.S)
+
+        if not id_match and not href_match:
+            continue
+
+        job_key = id_match.group(1) if id_match else _legacy_clean_text(href_match.group(1))
+        title = _legacy_clean_text(title_match.group(1) if title_match else "")
+
+        location_bits = re.findall(r'<span class="r0wTof[^"]*">(.*?)</span>', card, flags=re.S)
+        location_joined = "; ".join(
+            _legacy_clean_text(x).lstrip(";").strip() for x in location_bits if _legacy_clean_text(x)
+        )
+        locations = [x.strip() for x in location_joined.split(";") if x.strip()]
+
+        seen = set()
+        uniq_locations = []
+        for loc in locations:
+            if loc in seen:
+                continue
+            seen.add(loc)
+            uniq_locations.append(loc)
+
+        out.append({"job_key": str(job_key).strip(), "title": title, "locations": uniq_locations, "posted_on": None})
+
+    return out
+
+
+def _time(fn, pages: list[str], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("pages", nargs="*", help="Saved Google results pages (HTML).")
+    p.add_argument("--repeat", type=int, default=200)
+    args = p.parse_args()
+
+    paths = [Path(x) for x in args.pages] or sorted(FIXTURE_DIR.glob("*.html"))
+    pages = [path.read_text(encoding="utf-8") for path in paths]
+    if not pages:
+        print("no pages to benchmark")
+        return 2
+
+    for path, page in zip(paths, pages):
+        if legacy_extract_job_cards(page) != _extract_job_cards(page):
+            print(f"output mismatch: {path}")
+            return 1
+
+    cards = sum(len(_extract_job_cards(page)) for page in pages)
+    legacy = _time(legacy_extract_job_cards, pages, args.repeat)
+    single = _time(_extract_job_cards, pages, args.repeat)
+    n = len(pages) * args.repeat
+    print(f"pages={len(pages)} cards={cards} repeat={args.repeat}")
+    print(f"legacy regex-per-card: {legacy / n * 1e6:9.1f} us/page")
+    print(f"single-pass extractor: {single / n * 1e6:9.1f} us/page")
+    print(f"speedup: {legacy / single:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
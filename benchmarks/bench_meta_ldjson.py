@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for Meta job-detail JSON-LD extraction.
+
+    python -m benchmarks.bench_meta_ldjson [page.html ...] [--repeat N]
+
+Without arguments it runs over benchmarks/fixtures/meta/*.html. The legacy extractor
+(decode the whole page, unicode_escape the blob, complexjson) is kept as the baseline.
+The streaming reader is fed the page in READ_CHUNK pieces, the way iter_content would
+deliver it, and the bytes it consumed before stopping are reported.
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import requests
+
+from backend.py.collectors.meta import READ_CHUNK, _parse_ld_json, _read_ld_json_block
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "meta"
+
+
+def legacy_extract_ld_json(body: bytes) -> dict | None:
+    html = body.decode("utf-8")
+    marker = '<script type="application/ld+json"'
+    start = html.find(marker)
+    if start == -1:
+        return None
+    open_end = html.find(">", start)
+    if open_end == -1:
+        return None
+    close = html.find("</script>", open_end)
+    if close == -1:
+        return None
+
+    raw = html[open_end + 1 : close]
+    try:
+        unescaped = raw.encode("utf-8").decode("unicode_escape")
+        data = requests.models.complexjson.loads(unescaped)
+        if isinstance(data, dict):
+            return data
+    except Exception:
+        return None
+    return None
+
+
+class _Chunks:
+    """Serve a page in READ_CHUNK pieces and count what the reader pulled."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.read = 0
+
+    def __iter__(self):
+        for i in range(0, len(self.body), READ_CHUNK):
+            chunk = self.body[i : i + READ_CHUNK]
+            self.read += len(chunk)
+            yield chunk
+
+
+def streaming_extract_ld_json(body: bytes) -> dict | None:
+    raw = _read_ld_json_block(_Chunks(body))
+    return _parse_ld_json(raw) if raw is not None else None
+
+
+def _time(fn, pages: list[bytes], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("pages", nargs="*", help="Saved Meta job-detail pages (HTML).")
+    p.add_argument("--repeat", type=int, default=500)
+    args = p.parse_args()
+    # The legacy path feeds "\\/" to unicode_escape, which warns on every page.
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    paths = [Path(x) for x in args.pages] or sorted(FIXTURE_DIR.glob("*.html"))
+    pages = [path.read_bytes() for path in paths]
+    if not pages:
+        print("no pages to benchmark")
+        return 2
+
+    total_bytes = 0
+    read_bytes = 0
+    for path, page in zip(paths, pages):
+        new = streaming_extract_ld_json(page)
+        if new is None:
+            print(f"no JSON-LD block: {path}")
+            return 1
+        old = legacy_extract_ld_json(page)
+        if old is not None and old.get("title") != new.get("title"):
+            # Expected on pages with non-ASCII text: unicode_escape mangles UTF-8.
+            print(f"legacy title differs: {path}: {old.get('title')!r} -> {new.get('title')!r}")
+        chunks = _Chunks(page)
+        _read_ld_json_block(chunks)
+        total_bytes += len(page)
+        read_bytes += chunks.read
+
+    legacy = _time(legacy_extract_ld_json, pages, args.repeat)
+    streaming = _time(streaming_extract_ld_json, pages, args.repeat)
+    n = len(pages) * args.repeat
+    print(f"pages={len(pages)} repeat={args.repeat}")
+    print(f"bytes read: {read_bytes} of {total_bytes} ({read_bytes / total_bytes:.1%})")
+    print(f"legacy unicode_escape: {legacy / n * 1e6:9.1f} us/page")
+    print(f"streaming extractor:   {streaming / n * 1e6:9.1f} us/page")
+    print(f"speedup: {legacy / streaming:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+-- 0004_job_location_geo.sql
+-- Canonical GeoNames place per fact row (filled when the offline index is built).
+
+BEGIN;
+
+ALTER TABLE job_location_facts
+  ADD COLUMN IF NOT EXISTS geoname_id BIGINT,
+  ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS ix_job_loc_facts_geoname_id
+  ON job_location_facts (geoname_id);
+
+COMMIT;
@@ -0,0 +1,15 @@
+-- 0005_spool_loads.sql
+-- Spool segments already loaded into job_location_facts (exactly-once marker per segment).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS spool_loads (
+    segment_id text PRIMARY KEY,
+    row_count integer NOT NULL,
+    loaded_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_spool_loads_loaded_at
+  ON spool_loads (loaded_at);
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- 0006_crawl_work_queue.sql
+-- Crawl work units shared by ingest_worker processes on any number of nodes.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS crawl_work_units (
+    id bigserial PRIMARY KEY,
+    run_id text NOT NULL,
+    company_key text NOT NULL,
+    -- company | shard | detail_batch; unit_key names the shard or batch within the company.
+    unit_kind text NOT NULL DEFAULT 'company',
+    unit_key text NOT NULL DEFAULT '',
+    crawl_mode text NOT NULL DEFAULT 'full',
+    payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+    status text NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'leased', 'done', 'failed')),
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 3,
+    lease_owner text,
+    lease_expires_at timestamptz,
+    heartbeat_at timestamptz,
+    result jsonb,
+    error text,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (run_id, company_key, unit_kind, unit_key)
+);
+
+-- Claim scans: pending units, and leased units whose lease has run out.
+CREATE INDEX IF NOT EXISTS ix_crawl_work_units_claimable
+  ON crawl_work_units (status, lease_expires_at, id)
+  WHERE status IN ('pending', 'leased');
+
+CREATE INDEX IF NOT EXISTS ix_crawl_work_units_run_id
+  ON crawl_work_units (run_id);
+
+COMMIT;
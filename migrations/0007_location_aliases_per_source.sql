@@ -0,0 +1,13 @@
+-- 0007_location_aliases_per_source.sql
+-- Learned aliases are kept per company (source 'pipeline:<company>'), so the same raw_text
+-- may carry one row per source instead of one row overall.
+
+BEGIN;
+
+ALTER TABLE location_aliases
+  DROP CONSTRAINT IF EXISTS location_aliases_raw_text_key;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_location_aliases_source_raw_text
+  ON location_aliases (source, raw_text);
+
+COMMIT;
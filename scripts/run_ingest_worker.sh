@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Run a queue worker on this node; start as many as the node can take.
+PROJECT_ROOT="${1:-$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)}"
+shift || true
+
+cd "$PROJECT_ROOT"
+
+if [[ -x ".venv/bin/python" ]]; then
+  exec .venv/bin/python -u -m backend.py.pipeline.ingest_worker work "$@"
+fi
+
+exec python3 -u -m backend.py.pipeline.ingest_worker work "$@"
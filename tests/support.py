@@ -0,0 +1,52 @@
+"""Shared stubs for tests that run collector plugins through the pipeline engine."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from backend.py.normalizers.locations import parse_city_first
+from backend.py.pipeline import engine
+from backend.py.pipeline.engine import CollectorPlugin
+
+
+class ExamplePlugin(CollectorPlugin):
+    """A collector for company "Example" that yields `postings` (raw dicts in the engine's shape)."""
+
+    key = "example"
+    company_name = "Example"
+    session_name = "example"
+    parse_location = staticmethod(parse_city_first)
+    postings: list[dict] = []
+
+    def fetch(self, ctx):
+        yield from self.postings
+
+
+def isolate_env(test: unittest.TestCase, **env: str) -> str:
+    """
+    Point the cache dir, and the spool and archive under it, at a temp dir for `test` and
+    set `env` on top, both undone at cleanup; returns the temp dir.
+    """
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    _start(test, mock.patch.dict(os.environ, {"COMPANYLOC_CACHE_DIR": tmp.name}))
+    for name in ("COMPANYLOC_SPOOL_DIR", "COMPANYLOC_ARCHIVE_DIR"):
+        os.environ.pop(name, None)
+    os.environ.update(env)
+    return tmp.name
+
+
+def stub_database(test: unittest.TestCase) -> None:
+    """Keep run_plugin's company lookup, alias table and MV refresh off the database for `test`."""
+    _start(test, mock.patch.multiple(
+        engine,
+        get_company_id_by_name=lambda name: "c-1",
+        refresh_mv_country_month_counts=lambda: None,
+        _location_aliases={},
+        insert_location_aliases=lambda aliases, source: list(aliases),
+    ))
+
+
+def _start(test: unittest.TestCase, patcher) -> None:
+    patcher.start()
+    test.addCleanup(patcher.stop)
@@ -0,0 +1,137 @@
+import contextlib
+import io
+import json
+import threading
+import unittest
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from backend.py.collectors.http import request_with_retry, reset_all_sessions
+from backend.py.collectors.ratelimit import reset_host_limiters
+from backend.py.pipeline import engine, renormalize
+from backend.py.pipeline.engine import run_plugin
+from backend.py.pipeline.writer import FactWriter
+from backend.py.storage.archive import ResponseArchive, bind_session
+from tests.support import ExamplePlugin, isolate_env, stub_database
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"jobs": ["Zurich, Switzerland"]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class _Plugin(ExamplePlugin):
+    postings = [{"job_key": "1", "title": "Engineer", "locations": ["Zurich, Switzerland", "Lndn, UK"]}]
+
+
+class ArchiveTests(unittest.TestCase):
+    def setUp(self):
+        isolate_env(self, COLLECTOR_HTTP_CACHE="off", COMPANYLOC_SPOOL="off")
+        self.archive = ResponseArchive()
+
+    def test_responses_are_content_addressed(self):
+        origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{origin.server_address[1]}/jobs"
+        part = self.archive.partition("example", date(2026, 10, 19))
+        try:
+            bind_session("archive-test", part)
+            for page in (1, 2):
+                resp = request_with_retry("archive-test", "GET", f"{url}?page={page}", stream=True)
+                self.assertEqual(resp.raw.read(), b'{"jobs": ["Zurich, Switzerland"]}')
+        finally:
+            bind_session("archive-test", None)
+            reset_all_sessions()
+            reset_host_limiters()
+            origin.shutdown()
+            origin.server_close()
+
+        lines = (part.path / "responses.jsonl").read_text().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(len(list((self.archive.root / "objects").rglob("*.gz"))), 1)
+
+    def test_streamed_body_abandoned_early_is_archived_as_read(self):
+        origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        part = self.archive.partition("example", date(2026, 10, 19))
+        try:
+            bind_session("archive-test", part)
+            resp = request_with_retry("archive-test", "GET", f"http://127.0.0.1:{origin.server_address[1]}/jobs",
+                                      stream=True)
+            self.assertEqual(resp.raw.read(9), b'{"jobs": ')
+            resp.close()
+        finally:
+            bind_session("archive-test", None)
+            reset_all_sessions()
+            reset_host_limiters()
+            origin.shutdown()
+            origin.server_close()
+
+        record = json.loads((part.path / "responses.jsonl").read_text())
+        self.assertEqual((record["bytes"], record["truncated"]), (9, True))
+        self.assertEqual(self.archive.get_blob(record["sha256"]), b'{"jobs": ')
+
+    def test_body_closed_unread_is_not_archived(self):
+        origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=origin.serve_forever, daemon=True).start()
+        part = self.archive.partition("example", date(2026, 10, 19))
+        try:
+            bind_session("archive-test", part)
+            request_with_retry("archive-test", "GET", f"http://127.0.0.1:{origin.server_address[1]}/jobs",
+                               stream=True).close()
+        finally:
+            bind_session("archive-test", None)
+            reset_all_sessions()
+            reset_host_limiters()
+            origin.shutdown()
+            origin.server_close()
+
+        self.assertFalse((part.path / "responses.jsonl").exists())
+        self.assertEqual(part.responses, 0)
+
+    def test_run_archives_postings_and_renormalize_rewrites_changed_rows(self):
+        stub_database(self)
+
+        def writer(**kw):
+            return FactWriter(batch_size=10, upsert=lambda rows, conn=None: None, connect=None, **kw)
+
+        clock = mock.Mock(utcnow=lambda: datetime(2026, 10, 19, 3, 0))
+        with mock.patch.object(engine, "FactWriter", writer), mock.patch.object(engine, "datetime", clock), \
+                contextlib.redirect_stdout(io.StringIO()):
+            run_plugin(_Plugin())
+
+        (part,) = self.archive.partitions(since=date(2026, 10, 1), companies=["example"])
+        self.assertEqual(part.manifest()["captured_at"], "2026-10-19T03:00:00")
+        self.assertEqual([p["job_key"] for p in part.postings()], ["1"])
+
+        replaced = []
+        stored = {("1", "Zurich, Switzerland", "Zurich", None, "CH", 0.9, None)}
+        with mock.patch.multiple(
+            renormalize,
+            load_plugin=lambda key: _Plugin(),
+            get_company_id_by_name=lambda name: "c-1",
+            shared_index=lambda: None,
+            fetch_snapshot_location_rows=lambda company_id, day: stored,
+            replace_job_location_facts=lambda company_id, day, rows: replaced.append(rows),
+        ):
+            res = renormalize.renormalize_partition(str(self.archive.root), "example", "2026-10-19", {
+                "manual": {"Lndn, UK": ("London", None, "GB", 1.0)},
+            })
+
+        self.assertEqual((res["postings"], res["rows"], res["changed"], res["written"]), (1, 2, 1, True))
+        self.assertEqual(sorted(r[8] for r in replaced[0]), ["London", "Zurich"])
+
+
+if __name__ == "__main__":
+    unittest.main()
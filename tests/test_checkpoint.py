@@ -0,0 +1,105 @@
+import contextlib
+import io
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from backend.py.pipeline import engine
+from backend.py.pipeline.checkpoint import RunCheckpoint
+from backend.py.pipeline.engine import RunContext, run_plugin, stream_with_total
+from backend.py.pipeline.writer import FactWriter
+from tests.support import ExamplePlugin, isolate_env, stub_database
+
+POSTINGS = [{"job_key": str(i), "title": f"Job {i}", "locations": [f"City {i}, Switzerland"]} for i in range(6)]
+
+
+class _Plugin(ExamplePlugin):
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.normalized: list[str] = []
+
+    def fetch(self, ctx):
+        for i, raw in enumerate(POSTINGS):
+            if i == self.fail_after:
+                raise ConnectionError("transient")
+            yield raw
+
+    def normalize(self, raw, ctx):
+        self.normalized.append(raw["job_key"])
+        return super().normalize(raw, ctx)
+
+
+class CheckpointResumeTests(unittest.TestCase):
+    def setUp(self):
+        tmp = isolate_env(self, COMPANYLOC_ARCHIVE="off", COMPANYLOC_SPOOL="off")
+        stub_database(self)
+        self.run_cp = RunCheckpoint("20261019T000000Z", root=tmp)
+        self.upserted: list[tuple] = []
+        self.clock = [datetime(2026, 10, 19, 23, 59), datetime(2026, 10, 20, 9, 0)]
+        patcher = mock.patch.object(
+            engine, "FactWriter", lambda **kw: FactWriter(batch_size=1, upsert=self._upsert, connect=None, **kw)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upsert(self, rows, conn=None):
+        self.upserted.extend(rows)
+
+    def _run(self, plugin):
+        clock = mock.Mock(utcnow=lambda: self.clock.pop(0), fromisoformat=datetime.fromisoformat)
+        with mock.patch.object(engine, "datetime", clock):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return run_plugin(plugin, checkpoint=self.run_cp.company("example"))
+
+    def test_resume_skips_resolved_postings_and_committed_rows(self):
+        first = _Plugin(fail_after=4)
+        with self.assertRaises(ConnectionError):
+            self._run(first)
+        self.assertEqual(first.normalized, ["0", "1", "2", "3"])
+        self.assertEqual(len(self.upserted), 4)
+
+        second = _Plugin()
+        self.assertEqual(self._run(second), 6)
+        self.assertEqual(second.normalized, ["4", "5"])
+        self.assertEqual([r[1] for r in self.upserted], ["0", "1", "2", "3", "4", "5"])
+        # The resumed attempt writes on the interrupted attempt's snapshot_date.
+        self.assertEqual({r[3].isoformat() for r in self.upserted}, {"2026-10-19"})
+        self.assertEqual(self.run_cp.company("example").meta()["status"], "done")
+
+    def test_pinned_captured_at_sets_the_snapshot_month(self):
+        # A queue unit enqueued on Oct 31 and run on Nov 1 stays in October.
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_plugin(_Plugin(), captured_at=datetime(2026, 10, 31, 23, 50))
+        self.assertEqual({(r[2].isoformat(), r[3].isoformat()) for r in self.upserted}, {("2026-10-01", "2026-10-31")})
+
+    def test_stream_resumes_at_saved_cursor(self):
+        calls = []
+
+        def iter_pages(stats, start_page=1, seen=()):
+            calls.append((start_page, set(seen)))
+            for page in range(start_page, 4):
+                stats["cursor"] = page
+                yield {"job_key": f"p{page}"}
+
+        cp = self.run_cp.company("pages")
+        ctx = RunContext(company_id="c-1", captured_at=None, snapshot_date=None, snapshot_month=None, checkpoint=cp)
+        stream = stream_with_total(ctx, iter_pages, resume="start_page")
+        next(stream)
+        next(stream)  # interrupted while on page 2
+
+        ctx = RunContext(company_id="c-1", captured_at=None, snapshot_date=None, snapshot_month=None, checkpoint=cp)
+        ctx.resolved = {"p1", "p2"}
+        self.assertEqual([p["job_key"] for p in stream_with_total(ctx, iter_pages, resume="start_page")], ["p2", "p3"])
+        self.assertEqual(calls[-1], (2, {"p1", "p2"}))
+
+    def test_partial_listing_is_not_reused(self):
+        cp = self.run_cp.company("listing")
+        items = cp.tee_items("sitemap_urls", iter(["a", "b", "c"]))
+        next(items)
+        self.assertIsNone(cp.load_items("sitemap_urls"))
+        self.assertEqual(cp.save_items("sitemap_urls", ["a", "b"]), ["a", "b"])
+        self.assertEqual(cp.load_items("sitemap_urls"), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
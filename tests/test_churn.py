@@ -0,0 +1,77 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from backend.py.pipeline.churn import ChurnPlanner, churn_from_history, plan_crawl
+from backend.py.pipeline.scheduler import CompanySchedule, Scheduler, SchedulerState
+
+
+def _history(name, jobs, added, removed, weeks=4, step_days=7):
+    start = date(2026, 9, 1)
+    return [(name, start + timedelta(days=step_days * (i + 1)), start + timedelta(days=step_days * i), jobs, added,
+             removed) for i in range(weeks)]
+
+
+class _Plugin:
+    def __init__(self, name, modes=("full", "incremental")):
+        self.company_name = name
+        self.crawl_modes = modes
+
+
+NOW = datetime(2026, 10, 19, 3, 0)
+
+
+class ChurnTests(unittest.TestCase):
+    def test_churn_rate_from_consecutive_snapshots(self):
+        stats = churn_from_history(_history("Apple", 1000, 70, 140))["Apple"]
+        self.assertEqual((stats.intervals, stats.days, stats.jobs), (4, 28, 1000))
+        self.assertAlmostEqual(stats.added_per_day, 10.0)
+        self.assertAlmostEqual(stats.removed_per_day, 20.0)
+        self.assertAlmostEqual(stats.rate, 0.015)
+
+    def test_high_churn_crawls_more_often_low_churn_keeps_configured_cadence(self):
+        busy = churn_from_history(_history("A", 1000, 700, 700))["A"]  # 10%/day
+        calm = churn_from_history(_history("B", 1000, 7, 7))["B"]  # 0.1%/day
+        recent_full = NOW - timedelta(days=3)
+        self.assertEqual(plan_crawl(busy, 168, "full", True, recent_full, NOW).every_hours, 24.0)
+        self.assertEqual(plan_crawl(calm, 168, "full", True, recent_full, NOW).every_hours, 168)
+        mid = churn_from_history(_history("C", 1000, 70, 70))["C"]  # 1%/day -> 3 days
+        self.assertEqual(plan_crawl(mid, 168, "full", True, recent_full, NOW).every_hours, 72.0)
+
+    def test_crawl_depth(self):
+        calm = churn_from_history(_history("B", 1000, 7, 7))["B"]
+        purge = churn_from_history(_history("D", 1000, 0, 1400))["D"]  # 20%/day removed
+        recent_full = NOW - timedelta(days=3)
+        self.assertEqual(plan_crawl(calm, 168, "full", True, recent_full, NOW).crawl_mode, "incremental")
+        self.assertEqual(plan_crawl(calm, 168, "full", False, recent_full, NOW).crawl_mode, "full")
+        self.assertEqual(plan_crawl(calm, 168, "full", True, NOW - timedelta(days=30), NOW).crawl_mode, "full")
+        self.assertEqual(plan_crawl(calm, 168, "full", True, None, NOW).crawl_mode, "full")
+        self.assertEqual(plan_crawl(purge, 168, "full", True, recent_full, NOW).crawl_mode, "full")
+
+    def test_too_little_history_keeps_configuration(self):
+        short = churn_from_history(_history("A", 1000, 700, 700, weeks=1))["A"]
+        self.assertEqual(plan_crawl(short, 168, "full", True, None, NOW).reason, "no history")
+        self.assertEqual(plan_crawl(None, 168, "incremental", True, None, NOW).crawl_mode, "incremental")
+
+    def test_scheduler_uses_plans(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state = SchedulerState(Path(tmp) / "state.json")
+            last_full = (NOW - timedelta(days=9)).isoformat()
+            state.record("apple", started_at=(NOW - timedelta(days=2)).isoformat(), status="ok", last_full_at=last_full)
+            planner = ChurnPlanner(
+                fetch_history=lambda since: _history("Apple", 1000, 200, 40),
+                plugins=lambda key: _Plugin("Apple"),
+            )
+            ran = []
+            sched = Scheduler([CompanySchedule("apple")], state, run=lambda s: ran.append(s) or {"status": "ok"},
+                              stagger_sec=0.0, planner=planner)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sched.run_due(NOW)
+            self.assertEqual([(s.every_hours, s.crawl_mode) for s in ran], [(42.0, "incremental")])
+            self.assertEqual(state.get("apple")["last_full_at"], last_full)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from backend.py.storage.detail_cache import DetailCache, listing_fingerprint
+
+
+class DetailCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DetailCache(Path(self.tmp.name) / "cache.sqlite3")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_hit_requires_matching_fingerprint(self):
+        fp = listing_fingerprint("Engineer", "2 Locations")
+        self.cache.put("workday:nvidia", "/job/1", fp, {"country": "US", "locations": ["US, CA, Santa Clara"]})
+
+        self.assertEqual(self.cache.get("workday:nvidia", "/job/1", fp)["country"], "US")
+        self.assertIsNone(self.cache.get("workday:nvidia", "/job/1", listing_fingerprint("Engineer", "3 Locations")))
+        self.assertIsNone(self.cache.get("workday:intel", "/job/1", fp))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_evict_expired_and_overflow(self):
+        for i in range(5):
+            self.cache.put("ns", f"/job/{i}", "fp", {"locations": [str(i)]})
+        self.cache.max_entries = 3
+        self.assertEqual(self.cache.evict(), 2)
+
+        self.cache.ttl_sec = -1
+        self.assertIsNone(self.cache.get("ns", "/job/4", "fp"))
+        self.assertEqual(self.cache.evict(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
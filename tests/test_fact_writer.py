@@ -0,0 +1,59 @@
+import threading
+import unittest
+
+from backend.py.pipeline.writer import FactWriter
+
+
+def _row(job_key: str, city: str, conf: float, loc: str = "") -> tuple:
+    return ("c-1", job_key, None, None, "t", None, None, loc or city, city, None, "US", conf, None, "h", None)
+
+
+class FactWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.batches: list[list[tuple]] = []
+        self.threads: set[str] = set()
+
+    def _upsert(self, rows, conn=None):
+        self.threads.add(threading.current_thread().name)
+        self.batches.append(list(rows))
+
+    def test_batches_never_repeat_a_key_and_best_row_wins(self):
+        with FactWriter(batch_size=2, upsert=self._upsert, connect=None) as w:
+            self.assertTrue(w.offer(("1", "US", "A"), _row("1", "A", 0.5, "first")))
+            self.assertFalse(w.offer(("1", "US", "A"), _row("1", "A", 0.5, "tie")))
+            self.assertTrue(w.offer(("1", "US", "A"), _row("1", "A", 0.9, "pending-upgrade")))
+            self.assertTrue(w.offer(("2", "US", "B"), _row("2", "B", 0.7)))  # flushes batch 1
+            self.assertTrue(w.offer(("1", "US", "A"), _row("1", "A", 0.95, "late-upgrade")))
+            self.assertFalse(w.offer(("2", "US", "B"), _row("2", "B", 0.1)))
+
+        self.assertEqual(self.threads, {"fact-writer"})
+        for batch in self.batches:
+            keys = [(r[1], r[8]) for r in batch]
+            self.assertEqual(len(keys), len(set(keys)))
+        final = {}
+        for batch in self.batches:
+            for r in batch:
+                final[(r[1], r[8])] = r  # later upserts overwrite, like ON CONFLICT DO UPDATE
+        self.assertEqual(final[("1", "A")][7], "late-upgrade")
+        self.assertEqual(final[("2", "B")][11], 0.7)
+        self.assertEqual((w.unique_rows, w.superseded, w.batches), (2, 2, 2))
+
+    def test_flushes_accepted_rows_when_crawl_fails(self):
+        with self.assertRaises(ValueError):
+            with FactWriter(batch_size=100, upsert=self._upsert, connect=None) as w:
+                w.offer(("1", "US", "A"), _row("1", "A", 0.5))
+                raise ValueError("crawl died")
+        self.assertEqual(len(self.batches), 1)
+
+    def test_writer_error_surfaces(self):
+        def boom(rows, conn=None):
+            raise RuntimeError("db down")
+
+        w = FactWriter(batch_size=1, upsert=boom, connect=None)
+        w.offer(("1", "US", "A"), _row("1", "A", 0.5))
+        with self.assertRaises(RuntimeError):
+            w.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from backend.py.normalizers.geonames import GeoIndex, build_index, within_one_edit
+from backend.py.normalizers.locations import LocationNormalizer, parse_workday_location
+from backend.py.pipeline.engine import Posting, RunContext, iter_rows
+from tests.support import ExamplePlugin
+
+CITIES = [
+    # geonameid, name, asciiname, alternates, lat, lon, class, code, country, cc2, admin1, ..., population
+    ["5393015", "Santa Clara", "Santa Clara", "Santa Klara", "37.35411", "-121.95524", "P", "PPLA2", "US", "", "CA",
+     "085", "", "", "127647"],
+    ["3530597", "Santa Clara", "Santa Clara", "", "22.4", "-79.96", "P", "PPLA", "CU", "", "16", "", "", "", "250512"],
+    ["2867714", "Munich", "Munich", "München,Muenchen", "48.13743", "11.57549", "P", "PPLA", "DE", "", "02", "091",
+     "", "", "1260391"],
+    ["4717560", "Springfield", "Springfield", "", "39.80172", "-89.64371", "P", "PPLA", "US", "", "IL", "", "", "",
+     "116565"],
+    ["4951788", "Springfield", "Springfield", "", "42.10148", "-72.58981", "P", "PPLA2", "US", "", "MA", "", "", "",
+     "155929"],
+]
+ADMIN1 = ["US.CA\tCalifornia", "US.IL\tIllinois", "US.MA\tMassachusetts", "DE.02\tBavaria"]
+
+
+class GeoIndexTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        root = Path(cls.tmp.name)
+        (root / "cities.txt").write_text("".join("\t".join(c) + "\n" for c in CITIES), encoding="utf-8")
+        (root / "admin1.txt").write_text("\n".join(ADMIN1) + "\n", encoding="utf-8")
+        build_index(root / "cities.txt", root / "geo.idx", admin1=root / "admin1.txt")
+        cls.index = GeoIndex(root / "geo.idx")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.index.close()
+        cls.tmp.cleanup()
+
+    def test_exact_lookup_by_alternate_name_and_country(self):
+        self.assertEqual(self.index.lookup("MÜNCHEN").geoname_id, 2867714)
+        self.assertEqual(self.index.lookup("Santa Clara").country, "CU")  # most populous
+        place = self.index.lookup("Santa Clara", country="US")
+        self.assertEqual((place.geoname_id, place.admin1_code, place.admin1_name), (5393015, "CA", "California"))
+        self.assertAlmostEqual(place.latitude, 37.354, places=3)
+
+    def test_region_breaks_ties(self):
+        self.assertEqual(self.index.lookup("Springfield", "US").admin1_code, "MA")
+        self.assertEqual(self.index.lookup("Springfield", "US", "IL").geoname_id, 4717560)
+        self.assertEqual(self.index.lookup("Springfield", "US", "Illinois").geoname_id, 4717560)
+
+    def test_fuzzy_lookup_allows_one_edit(self):
+        self.assertEqual(self.index.lookup("Muncih").geoname_id, 2867714)
+        self.assertEqual(self.index.lookup("Santa Clra", country="US").geoname_id, 5393015)
+        self.assertIsNone(self.index.lookup("Mnchn"))
+        self.assertIsNone(self.index.lookup("Munich", country="FR"))
+        self.assertTrue(within_one_edit("seattle", "seatle"))
+        self.assertFalse(within_one_edit("seattle", "seatlte1"))
+
+    def test_rows_carry_geoname_columns(self):
+        class Plugin(ExamplePlugin):
+            parse_location = staticmethod(parse_workday_location)
+
+        ctx = RunContext(
+            company_id="c-1",
+            captured_at=datetime(2026, 10, 19),
+            snapshot_date=date(2026, 10, 19),
+            snapshot_month=date(2026, 10, 1),
+            locations=LocationNormalizer(geo=self.index),
+        )
+        post = Posting(job_key="j", title="t", posted_at=None, locations=["US, CA, Santa Clara", "Remote"])
+        rows = [row for _, row in iter_rows(Plugin(), post, ctx)]
+        self.assertEqual(rows[0][15], 5393015)
+        self.assertAlmostEqual(rows[0][16], 37.354, places=3)
+        self.assertEqual(rows[1][15:], (None, None, None))
+        self.assertEqual(ctx.locations.geocoded, (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.py.collectors import google
+from backend.py.collectors.google import _clean_text, _extract_job_cards
+from benchmarks.bench_google_parser import FIXTURE_DIR, legacy_extract_job_cards
+
+
+class GoogleParserTests(unittest.TestCase):
+    def test_matches_legacy_parser_on_fixtures(self):
+        pages = sorted(Path(FIXTURE_DIR).glob("*.html"))
+        self.assertTrue(pages)
+        for path in pages:
+            page = path.read_text(encoding="utf-8")
+            self.assertEqual(_extract_job_cards(page), legacy_extract_job_cards(page))
+
+    def test_card_fields(self):
+        page = (
+            '<li class="lLd3Je"><div jsdata="Aiqs8c;123;$0"><h3 class="QJPWVe">Eng &amp; <b>Lead</b></h3>'
+            '<span class="r0wTof ">Zürich, Switzerland</span><span class="r0wTof p3oCrc">; London, UK; Zürich, Switzerland</span>'
+            "</div></li>"
+            '<li class="lLd3Je"><a href="jobs/results/456-pm">x</a>'
+        )
+        self.assertEqual(
+            _extract_job_cards(page),
+            [
+                {
+                    "job_key": "123",
+                    "title": "Eng & Lead",
+                    "locations": ["Zürich, Switzerland", "London, UK"],
+                    "posted_on": None,
+                },
+                {"job_key": "jobs/results/456-pm", "title": "", "locations": [], "posted_on": None},
+            ],
+        )
+        self.assertEqual(_clean_text("  a\n\tb  "), "a b")
+
+    def test_existence_probe_resolves_href_keys(self):
+        urls = []
+        with mock.patch.object(google, "request_with_retry", lambda session, method, url, **kw: urls.append(url)):
+            self.assertTrue(google.google_job_exists("123"))
+            self.assertTrue(google.google_job_exists("jobs/results/456-pm?q=x"))
+        self.assertEqual(
+            urls,
+            [
+                "https://www.google.com/about/careers/applications/jobs/results/123",
+                "https://www.google.com/about/careers/applications/jobs/results/456-pm?q=x",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
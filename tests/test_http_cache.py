@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from backend.py.collectors import microsoft
+from backend.py.collectors.http import connection_stats, request_with_retry, reset_all_sessions
+from backend.py.collectors.ratelimit import reset_host_limiters
+
+PAGE = ("<html>" + "Zürich " * 2000 + "</html>").encode("utf-8")
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+    seen: list = []
+    tokens = 0
+
+    def do_GET(self):
+        type(self).seen.append(self.headers.get("If-None-Match"))
+        if self.path == "/plain":
+            self._send(200, [], b"no validators")
+        elif self.path == "/careers" and self.headers.get("If-None-Match") != self.etag:
+            # Same validator on every page, as for a templated page, but a new token each time.
+            type(self).tokens += 1
+            page = f'<meta name="_csrf" content="tok-{self.tokens}">'.encode()
+            self._send(200, [("ETag", self.etag), ("Content-Type", "text/html")], page)
+        elif self.headers.get("If-None-Match") == self.etag:
+            self._send(304, [("ETag", self.etag)], b"")
+        else:
+            self._send(200, [("ETag", self.etag), ("Content-Type", "text/html")], PAGE)
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class ConditionalCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"COMPANYLOC_CACHE_DIR": self.tmp.name, "COLLECTOR_HTTP_MODE": "off"})
+        self.env.start()
+        os.environ.pop("COLLECTOR_HTTP_CACHE", None)
+        reset_all_sessions()
+        _Origin.seen = []
+        _Origin.tokens = 0
+        self.origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.origin.server_address[1]}"
+
+    def tearDown(self):
+        reset_all_sessions()
+        reset_host_limiters()
+        self.origin.shutdown()
+        self.origin.server_close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_304_is_served_from_cache_across_sessions(self):
+        first = request_with_retry("test", "GET", f"{self.base}/job/1")
+        self.assertEqual(first.content, PAGE)
+        reset_all_sessions()  # a new run reopens the on-disk cache
+
+        again = request_with_retry("test", "GET", f"{self.base}/job/1", stream=True)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(b"".join(again.iter_content(1024)), PAGE)
+        self.assertEqual(again.headers["Content-Type"], "text/html")
+        self.assertEqual(_Origin.seen, [None, '"v1"'])
+
+        st = connection_stats("test")
+        self.assertEqual((st["requests"], st["not_modified"], st["bytes_saved"]), (1, 1, len(PAGE)))
+        self.assertEqual(st["not_modified_rate"], 1.0)
+
+    def test_streamed_bodies_are_stored_as_read_and_only_when_complete(self):
+        resp = request_with_retry("test", "GET", f"{self.base}/job/1", stream=True)
+        resp.raw.read(100, decode_content=True)
+        resp.close()  # abandoned after the first chunk: nothing stored
+
+        resp = request_with_retry("test", "GET", f"{self.base}/job/1", stream=True)
+        self.assertEqual(b"".join(resp.iter_content(1024)), PAGE)
+        self.assertEqual(request_with_retry("test", "GET", f"{self.base}/job/1").content, PAGE)
+        self.assertEqual(_Origin.seen, [None, None, '"v1"'])
+        self.assertEqual(connection_stats("test")["not_modified"], 1)
+
+    def test_responses_without_validators_are_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(request_with_retry("test", "GET", f"{self.base}/plain").content, b"no validators")
+        self.assertEqual(_Origin.seen, [None, None])
+        self.assertEqual(connection_stats("test")["not_modified"], 0)
+
+    def test_token_bootstrap_bypasses_cache_and_refresh_gets_a_fresh_token(self):
+        with mock.patch.object(microsoft, "CAREERS_URL", f"{self.base}/careers"):
+            self.assertEqual(microsoft._bootstrap_session()[0], "tok-1")
+            reset_all_sessions()  # a later run must not get the stored page back on a 304
+            self.assertEqual(microsoft._bootstrap_session()[0], "tok-2")
+            self.assertEqual(microsoft._bootstrap_session(refresh=True)[0], "tok-3")
+        self.assertEqual(_Origin.seen, [None, None, None])
+        self.assertEqual(connection_stats(microsoft.SESSION_NAME)["not_modified"], 0)
+
+    def test_disabled_by_env(self):
+        with mock.patch.dict(os.environ, {"COLLECTOR_HTTP_CACHE": "off"}):
+            reset_all_sessions()
+            for _ in range(2):
+                request_with_retry("test", "GET", f"{self.base}/job/1").close()
+        self.assertEqual(_Origin.seen, [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
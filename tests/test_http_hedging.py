@@ -0,0 +1,119 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from backend.py.collectors import http, ratelimit
+from backend.py.collectors.http import (
+    RetryBudget,
+    RetryPolicy,
+    configure_session,
+    connection_stats,
+    request_with_retry,
+    reset_all_sessions,
+)
+from backend.py.collectors.ratelimit import AimdPolicy, HostLimiter, reset_host_limiters
+from backend.py.storage.archive import ResponseArchive, bind_session
+from tests.support import isolate_env
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits: dict = {}
+
+    def do_GET(self):
+        n = _Origin.hits[self.path] = _Origin.hits.get(self.path, 0) + 1
+        if self.path == "/down":
+            self._send(503, b"down")
+            return
+        if self.path == "/stall" and n == 1:
+            time.sleep(1.0)
+        self._send(200, f"answer {n}".encode())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class HedgingTests(unittest.TestCase):
+    def setUp(self):
+        isolate_env(self, COLLECTOR_HTTP_CACHE="off")
+        _Origin.hits = {}
+        self.origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.origin.server_address[1]}"
+        fast = AimdPolicy(initial_rate=1000.0, max_rate=1000.0, initial_concurrency=8.0, jitter=0.0)
+        limiter = ratelimit._limiters["127.0.0.1"] = HostLimiter("127.0.0.1", fast)
+        for _ in range(ratelimit.LATENCY_MIN_SAMPLES):
+            limiter.acquire()
+            limiter.release(200, 0.01)
+        configure_session("hedge-test", policy=RetryPolicy(max_retries=3, base_backoff=0.0, jitter=0.0))
+
+    def tearDown(self):
+        reset_all_sessions()
+        reset_host_limiters()
+        self.origin.shutdown()
+        self.origin.server_close()
+
+    def test_duplicate_answers_a_stalled_request(self):
+        t0 = time.monotonic()
+        resp = request_with_retry("hedge-test", "GET", f"{self.base}/stall")
+        self.assertLess(time.monotonic() - t0, 0.8)
+        self.assertEqual(resp.text, "answer 2")
+        st = connection_stats("hedge-test")
+        self.assertEqual((st["hedges"], st["hedge_wins"], st["hedge_win_rate"]), (1, 1, 1.0))
+
+    def test_losing_response_is_not_archived(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            part = ResponseArchive(tmp).partition("example", date(2026, 10, 19))
+            bind_session("hedge-test", part)
+            try:
+                self.assertEqual(request_with_retry("hedge-test", "GET", f"{self.base}/stall").text, "answer 2")
+                time.sleep(1.2)  # the stalled primary arrives and is closed as the loser
+            finally:
+                bind_session("hedge-test", None)
+            records = [json.loads(line) for line in (part.path / "responses.jsonl").read_text().splitlines()]
+        self.assertEqual([(r["bytes"], r.get("truncated")) for r in records], [(len(b"answer 2"), None)])
+
+    def test_no_hedge_without_a_free_host_slot(self):
+        ratelimit._limiters["127.0.0.1"].concurrency = 1.0  # the primary holds the only slot
+        resp = request_with_retry("hedge-test", "GET", f"{self.base}/stall")
+        self.assertEqual(resp.text, "answer 1")
+        self.assertEqual(_Origin.hits["/stall"], 1)
+        st = connection_stats("hedge-test")
+        self.assertEqual((st["hedges"], st["retry_budget_exhausted"]), (0, 0))
+
+    def test_retry_budget_stops_amplification(self):
+        http._budgets["hedge-test"] = RetryBudget(ratio=0.0, min_extra=1)
+        with self.assertRaises(requests.HTTPError):
+            request_with_retry("hedge-test", "GET", f"{self.base}/down", hedge=False)
+        self.assertEqual(_Origin.hits["/down"], 2)
+        st = connection_stats("hedge-test")
+        self.assertEqual((st["retries"], st["retry_budget_exhausted"]), (1, 1))
+
+
+class RetryBudgetTests(unittest.TestCase):
+    def test_budget_grows_with_requests(self):
+        budget = RetryBudget(ratio=0.5, min_extra=1)
+        self.assertTrue(budget.spend("retries"))
+        self.assertFalse(budget.spend("hedges"))
+        for _ in range(4):
+            budget.count("requests")
+        self.assertTrue(budget.spend("hedges"))
+        self.assertTrue(budget.spend("retries"))
+        self.assertFalse(budget.spend("retries"))
+        self.assertEqual(budget.counts["exhausted"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
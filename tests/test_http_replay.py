@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from backend.py.collectors.http import get_session, reset_all_sessions
+from backend.py.collectors.replay import Corpus, ReplayServer, stop_replay_server
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        payload = json.dumps({"echo": json.loads(body), "city": "Zürich"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", "sid=abc")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class RecordReplayTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.origin = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.origin.server_address[1]}/api/jobs"
+
+    def tearDown(self):
+        reset_all_sessions()
+        stop_replay_server()
+        self.origin.server_close()
+        self.tmp.cleanup()
+
+    def _env(self, mode, **extra):
+        env = {"COLLECTOR_HTTP_MODE": mode, "COLLECTOR_HTTP_CORPUS": self.tmp.name, **extra}
+        reset_all_sessions()
+        return mock.patch.dict(os.environ, env)
+
+    def test_replay_serves_recorded_response_without_origin(self):
+        with self._env("record"):
+            live = get_session("test").post(self.url, json={"offset": 20}, stream=True)
+            self.assertEqual(live.raw.read(), json.dumps({"echo": {"offset": 20}, "city": "Zürich"}).encode())
+        self.origin.shutdown()
+
+        with self._env("replay"):
+            resp = get_session("test").post(self.url, json={"offset": 20})
+            self.assertEqual(resp.json(), {"echo": {"offset": 20}, "city": "Zürich"})
+            self.assertEqual(resp.url, self.url)
+            self.assertEqual(get_session("test").cookies.get("sid"), "abc")
+
+            missing = get_session("test").post(self.url, json={"offset": 40})
+            self.assertEqual(missing.status_code, 501)
+
+    def test_injected_throttling(self):
+        srv = ReplayServer(Corpus(self.tmp.name), rate_429=1.0, seed=1).start()
+        try:
+            with self._env("replay", COLLECTOR_HTTP_REPLAY_URL=srv.base_url):
+                resp = get_session("test").get(self.url)
+            self.assertEqual(resp.status_code, 429)
+            self.assertEqual(resp.headers["Retry-After"], "1")
+            self.assertEqual(srv.counts["throttled"], 1)
+        finally:
+            srv.shutdown()
+            srv.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
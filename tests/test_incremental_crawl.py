@@ -0,0 +1,45 @@
+import unittest
+
+from backend.py.collectors.incremental import crawl_incremental
+
+
+def _listing(keys, page_size=3):
+    def fetch_page(idx):
+        chunk = keys[idx * page_size : (idx + 1) * page_size]
+        return len(keys), [{"job_key": k, "title": k} for k in chunk]
+
+    return fetch_page
+
+
+class IncrementalCrawlTests(unittest.TestCase):
+    def test_stops_on_known_run_and_carries_forward(self):
+        known = {k: {"job_key": k, "title": "old"} for k in ["k1", "k2", "k3", "k4", "k5", "k6", "k7"]}
+        live = ["n1", "n2", "k1", "k2", "k3", "k4", "k5", "k6", "k7"]
+
+        total, postings, stats = crawl_incremental(_listing(live), known, known_run=3)
+
+        self.assertEqual(total, 9)
+        self.assertEqual(stats["pages"], 2)
+        self.assertTrue(stats["stopped_on_known"])
+        self.assertEqual(stats["existence_checks"], 0)
+        self.assertEqual(sorted(p["job_key"] for p in postings), sorted(live))
+
+    def test_probes_only_when_total_shows_removals(self):
+        known = {k: {"job_key": k} for k in ["k1", "k2", "k3", "k4", "gone"]}
+        live = ["n1", "k1", "k2", "k3", "k4"]
+        probed = []
+
+        def exists(k):
+            probed.append(k)
+            return k != "gone"
+
+        _, postings, stats = crawl_incremental(_listing(live, 2), known, exists=exists, known_run=2)
+
+        self.assertEqual(stats["removed"], 1)
+        self.assertIn("gone", probed)
+        self.assertNotIn("gone", [p["job_key"] for p in postings])
+        self.assertEqual(len(postings), len(live))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import contextlib
+import io
+import threading
+import unittest
+
+from backend.py.pipeline.ingest_worker import Worker
+from backend.py.storage.work_queue import WorkUnit
+
+
+class _Queue:
+    """In-memory stand-in for WorkQueue with the same lease rules."""
+
+    lease_sec = 0.05
+
+    def __init__(self, companies, max_attempts=2):
+        self.units = {i: {"unit": WorkUnit(i, "r1", c, payload={"captured_at": "2026-10-19T03:00:00"}),
+                          "status": "pending", "owner": None, "attempts": 0}
+                      for i, c in enumerate(companies, 1)}
+        self.max_attempts = max_attempts
+        self.beats = 0
+        self.lock = threading.Lock()
+
+    def claim(self, owner, run_id=None):
+        with self.lock:
+            for u in self.units.values():
+                if u["status"] == "pending" and u["attempts"] < self.max_attempts:
+                    u.update(status="leased", owner=owner, attempts=u["attempts"] + 1)
+                    u["unit"].attempts = u["attempts"]
+                    return u["unit"]
+        return None
+
+    def heartbeat(self, unit, owner):
+        with self.lock:
+            self.beats += 1
+            return self.units[unit.id]["owner"] == owner
+
+    def _release(self, unit, owner, status):
+        u = self.units[unit.id]
+        if u["status"] != "leased" or u["owner"] != owner:
+            return False
+        u.update(status=status, owner=None)
+        return True
+
+    def complete(self, unit, owner, result):
+        return self._release(unit, owner, "done")
+
+    def fail(self, unit, owner, error, result=None):
+        u = self.units[unit.id]
+        return self._release(unit, owner, "pending" if u["attempts"] < self.max_attempts else "failed")
+
+
+class WorkerTests(unittest.TestCase):
+    def test_runs_units_until_queue_is_empty_and_retries_failures(self):
+        queue = _Queue(["apple", "meta"])
+        calls = []
+
+        def handler(unit):
+            calls.append(unit.company_key)
+            if unit.company_key == "meta":
+                raise ConnectionError("listing down")
+            return {"company": unit.company_key, "status": "ok"}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = Worker(queue, owner="w1", handlers={"company": handler}).run()
+        self.assertEqual(calls, ["apple", "meta", "meta"])
+        self.assertEqual([r["status"] for r in results], ["ok", "fail", "fail"])
+        self.assertEqual([u["status"] for u in queue.units.values()], ["done", "failed"])
+
+    def test_heartbeats_renew_lease_while_unit_runs(self):
+        queue = _Queue(["apple"])
+
+        def handler(unit):
+            threading.Event().wait(0.2)
+            return {"company": unit.company_key, "status": "ok"}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            Worker(queue, owner="w1", heartbeat_sec=0.02, handlers={"company": handler}).run_once()
+        self.assertGreaterEqual(queue.beats, 3)
+
+    def test_result_of_a_reclaimed_unit_is_not_saved(self):
+        queue = _Queue(["apple"])
+
+        def handler(unit):
+            queue.units[unit.id]["owner"] = "w2"  # lease expired and another worker claimed it
+            return {"company": unit.company_key, "status": "ok"}
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            Worker(queue, owner="w1", heartbeat_sec=0.01, handlers={"company": handler}).run_once()
+        self.assertEqual(queue.units[1]["status"], "leased")
+        self.assertIn("lease was reclaimed", out.getvalue())
+
+    def test_unknown_unit_kind_fails_the_unit(self):
+        queue = _Queue(["apple"], max_attempts=1)
+        queue.units[1]["unit"].unit_kind = "detail_batch"
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = Worker(queue, owner="w1", handlers={}).run_once()
+        self.assertEqual(result["error_type"], "RuntimeError")
+        self.assertEqual(queue.units[1]["status"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
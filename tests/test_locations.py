@@ -0,0 +1,76 @@
+import unittest
+
+from backend.py.normalizers.gazetteer import GAZETTEER
+from backend.py.normalizers.locations import (
+    LocationNormalizer,
+    ResolvedLocation,
+    parse_city_first,
+    parse_country_last,
+    resolve_country,
+)
+from backend.py.pipeline.common import normalize_country_iso2
+
+
+class GazetteerTests(unittest.TestCase):
+    def test_country_names_codes_and_aliases(self):
+        cases = {
+            "UK": "GB",
+            "us": "US",
+            "DEU": "DE",
+            "U.S.A.": "US",
+            "Viet Nam": "VN",
+            "Côte d’Ivoire": "CI",
+            "Türkiye": "TR",
+            "XX": "UN",
+            "Deu": "UN",
+            "": "UN",
+        }
+        for raw, iso2 in cases.items():
+            self.assertEqual(normalize_country_iso2(raw), iso2, raw)
+
+    def test_scan_prefers_longest_non_overlapping_name(self):
+        self.assertEqual(GAZETTEER.scan("Remote - United States"), "US")
+        self.assertEqual(GAZETTEER.scan("Papua New Guinea"), "PG")
+        self.assertIsNone(GAZETTEER.scan("Latin America"))
+
+    def test_subdivisions_and_ambiguity(self):
+        self.assertEqual(resolve_country("Texas"), "US")
+        self.assertEqual(resolve_country("ON"), "CA")
+        self.assertEqual(resolve_country("WA"), "UN")
+        self.assertEqual(resolve_country("WA", "AU"), "AU")
+        self.assertEqual(resolve_country("Georgia"), "GE")
+        self.assertEqual(resolve_country("Georgia", "US"), "US")
+
+    def test_parsers_use_gazetteer(self):
+        self.assertEqual(parse_country_last("Austin, Texas", "UN")[2], "US")
+        self.assertEqual(parse_city_first("London, UK", "UN"), ("London", None, "GB", 0.9))
+
+
+class LocationNormalizerTests(unittest.TestCase):
+    def test_memoizes_and_learns_string_resolved_locations(self):
+        calls = []
+
+        def parser(loc, detail_country):
+            calls.append((loc, detail_country))
+            return parse_city_first(loc, detail_country)
+
+        norm = LocationNormalizer()
+        for _ in range(3):
+            resolved = norm.resolve(parser, "Zurich, Switzerland", "CH")
+        norm.resolve(parser, "Remote", "CH")
+
+        self.assertEqual((norm.hits, norm.misses), (2, 2))
+        self.assertAlmostEqual(norm.hit_rate, 0.5)
+        # "Remote" only resolved through the posting country, so it is not learned.
+        self.assertEqual(norm.learned, {"Zurich, Switzerland": ("Zurich", None, "CH", 0.9)})
+        self.assertEqual(calls.count(("Zurich, Switzerland", "CH")), 1)
+        self.assertEqual(resolved, ResolvedLocation("Zurich", None, "CH", 0.9))
+
+    def test_alias_table_overrides_parser(self):
+        norm = LocationNormalizer({"HQ": ("Menlo Park", "CA", "US", 1.0)})
+        self.assertEqual(norm.resolve(parse_city_first, "HQ", "UN"), ResolvedLocation("Menlo Park", "CA", "US", 1.0))
+        self.assertEqual((norm.alias_hits, norm.learned), (1, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.py.collectors import meta
+from backend.py.collectors.meta import _extract_ld_json, _parse_sitemap_entries, _read_ld_json_block
+from backend.py.storage.detail_cache import DetailCache
+
+PAGE = (
+    '<html><head><script type="application/ld+json" nonce="x">'
+    '{"title":"Ingénieur \\/ Lead","datePosted":"2026-09-14",'
+    '"jobLocation":[{"name":"Zürich, Switzerland"}]}</script></head><body>'
+    + "x" * 50000
+    + "</body></html>"
+)
+
+
+class MetaLdJsonTests(unittest.TestCase):
+    def test_keeps_non_ascii_and_escaped_slashes(self):
+        ldj = _extract_ld_json(PAGE)
+        self.assertEqual(ldj["title"], "Ingénieur / Lead")
+        self.assertEqual(ldj["jobLocation"], [{"name": "Zürich, Switzerland"}])
+
+    def test_stops_reading_after_block(self):
+        body = PAGE.encode("utf-8")
+        consumed = []
+
+        def chunks():
+            for i in range(0, len(body), 7):
+                consumed.append(i)
+                yield body[i : i + 7]
+
+        raw = _read_ld_json_block(chunks())
+        self.assertTrue(raw.startswith(b'{"title"'))
+        self.assertLess(len(consumed) * 7, 1000)
+
+    def test_missing_or_broken_block(self):
+        self.assertIsNone(_extract_ld_json("<html></html>"))
+        self.assertIsNone(_extract_ld_json('<script type="application/ld+json">{oops</script>'))
+
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://www.metacareers.com/profile/job_details/1/</loc><lastmod>2026-10-01</lastmod></url>
+  <url><loc>https://www.metacareers.com/profile/job_details/2/</loc></url>
+  <url><loc>https://www.metacareers.com/jobs/</loc><lastmod>2026-10-02</lastmod></url>
+</urlset>"""
+
+
+def _url(n: int) -> str:
+    return f"https://www.metacareers.com/profile/job_details/{n}/"
+
+
+class MetaSitemapTests(unittest.TestCase):
+    def test_entries_carry_lastmod(self):
+        self.assertEqual(_parse_sitemap_entries(SITEMAP), [(_url(1), "2026-10-01"), (_url(2), None)])
+
+    def test_only_new_or_changed_details_are_fetched(self):
+        fetched = []
+
+        def fetch(url):
+            fetched.append(url)
+            key = meta._job_key_from_url(url)
+            return {"job_key": key, "title": f"t{key}", "locations": ["Zurich, Switzerland"], "posted_on": None}
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(meta, "fetch_meta_job_detail", fetch):
+            cache = DetailCache(Path(tmp) / "cache.sqlite3")
+            week1 = [(_url(1), "a"), (_url(2), "a"), (_url(3), None)]
+            self.assertEqual(len(list(meta.iter_meta_jobs(urls=week1, cache=cache))), 3)
+
+            fetched.clear()
+            stats: dict = {}
+            week2 = [[_url(1), "a"], [_url(2), "b"], [_url(3), None], [_url(4), "a"]]
+            jobs = list(meta.iter_meta_jobs(stats=stats, urls=week2, cache=cache))
+            cache.close()
+
+        self.assertEqual([j["job_key"] for j in jobs], ["1", "2", "3", "4"])
+        self.assertEqual(fetched, [_url(2), _url(3), _url(4)])
+        self.assertEqual((stats["total"], stats["fetched"]), (4, 3))
+
+    def test_sitemap_producer_stays_a_bounded_distance_ahead(self):
+        produced = []
+        closed = threading.Event()
+
+        def sitemap():
+            try:
+                for i in range(10_000):
+                    produced.append(i)
+                    yield _url(i)
+            finally:
+                closed.set()
+
+        def fetch(url):
+            return {"job_key": meta._job_key_from_url(url), "title": "t", "locations": ["Zurich"], "posted_on": None}
+
+        with mock.patch.object(meta, "fetch_meta_job_detail", fetch):
+            jobs = meta.iter_meta_jobs(urls=sitemap())
+            next(jobs)
+            time.sleep(0.2)
+            self.assertLessEqual(len(produced), meta.URL_QUEUE_SIZE + 2)
+            jobs.close()
+        self.assertTrue(closed.wait(2))  # the abandoned sitemap stream is closed
+
+
+if __name__ == "__main__":
+    unittest.main()
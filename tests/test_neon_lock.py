@@ -0,0 +1,66 @@
+import threading
+import unittest
+from unittest import mock
+
+from backend.py.storage import neon
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        if "pg_locks" in sql:
+            self.conn.pinged.set()
+
+    def fetchone(self):
+        return (self.conn.held,)
+
+
+class _Conn:
+    def __init__(self, held=True):
+        self.held = held
+        self.executed = []
+        self.closed = False
+        self.pinged = threading.Event()
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class AdvisoryLockTests(unittest.TestCase):
+    def _lock(self, conn, name="companyloc:test"):
+        with mock.patch.object(neon, "_connect", return_value=conn), mock.patch.object(neon, "LOCK_KEEPALIVE_SEC", 0.01):
+            with neon.advisory_lock(name) as acquired:
+                if acquired:
+                    self.assertTrue(conn.pinged.wait(2))
+                return acquired
+
+    def test_held_lock_session_is_pinged_until_release(self):
+        conn = _Conn()
+        self.assertTrue(self._lock(conn))
+        self.assertTrue(conn.closed)
+        pings = sum("pg_locks" in sql for sql in conn.executed)
+        self.assertGreaterEqual(pings, 1)
+        threading.Event().wait(0.05)
+        self.assertEqual(sum("pg_locks" in sql for sql in conn.executed), pings)
+
+    def test_lock_held_elsewhere_is_not_pinged(self):
+        conn = _Conn(held=False)
+        self.assertFalse(self._lock(conn))
+        self.assertTrue(conn.closed)
+        self.assertEqual(len(conn.executed), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import threading
+import unittest
+
+from backend.py.collectors.facets import crawl_facet_partitions, flatten_workday_facets
+from backend.py.collectors.pagination import fetch_offset_sharded
+
+
+class ShardedPaginationTests(unittest.TestCase):
+    def test_fetches_every_offset_once_and_preserves_order(self):
+        listing = [{"id": f"j{i}"} for i in range(95)]
+        calls = []
+        lock = threading.Lock()
+
+        def fetch_page(offset, limit):
+            with lock:
+                calls.append(offset)
+            return (len(listing) if offset == 0 else 0), listing[offset : offset + limit]
+
+        total, items, stats = fetch_offset_sharded(
+            fetch_page, limit=10, key_fn=lambda x: x["id"], workers=3
+        )
+
+        self.assertEqual(total, 95)
+        self.assertEqual(items, listing)
+        self.assertEqual(sorted(calls), list(range(0, 95, 10)))
+        self.assertEqual(len(stats["shards"]), 3)
+        self.assertEqual(stats["repaired_pages"], 0)
+
+    def test_refetches_items_lost_to_listing_drift(self):
+        listing = [{"id": f"j{i}"} for i in range(50)]
+        state = {"calls": 0}
+        lock = threading.Lock()
+
+        def fetch_page(offset, limit):
+            with lock:
+                state["calls"] += 1
+                if state["calls"] == 2:
+                    # A posting on the first page closes mid-crawl; everything shifts left.
+                    del listing[5]
+                return 50 if offset == 0 else 0, list(listing[offset : offset + limit])
+
+        total, items, stats = fetch_offset_sharded(
+            fetch_page, limit=10, key_fn=lambda x: x["id"], workers=2
+        )
+
+        self.assertEqual(total, 50)
+        self.assertEqual(len({x["id"] for x in items}), 50)
+        self.assertGreater(stats["repair_added"], 0)
+
+
+class FacetPartitionTests(unittest.TestCase):
+    def test_splits_until_every_partition_fits_under_cap(self):
+        cap = 200
+        jobs = (
+            [{"id": f"a1-{i}", "country": "A", "city": "a1"} for i in range(150)]
+            + [{"id": f"a2-{i}", "country": "A", "city": "a2"} for i in range(170)]
+            + [{"id": f"b-{i}", "country": "B", "city": "b1"} for i in range(120)]
+        )
+
+        def select(applied):
+            out = jobs
+            for field, values in applied.items():
+                out = [j for j in out if j[field] in values]
+            return out
+
+        def counts(rows, field):
+            c = {}
+            for r in rows:
+                c[r[field]] = c.get(r[field], 0) + 1
+            return sorted(c.items())
+
+        def probe(applied):
+            rows = select(applied)
+            return len(rows), rows[:10], {"country": counts(rows, "country"), "city": counts(rows, "city")}
+
+        def crawl(applied, first):
+            rows = select(applied)
+            return fetch_offset_sharded(
+                lambda off, lim: (len(rows), rows[off : off + lim]),
+                limit=10,
+                key_fn=lambda x: x["id"],
+                first_page=first,
+                max_offset=cap,
+            )
+
+        total, items, stats = crawl_facet_partitions(
+            probe, crawl, cap=cap, key_fn=lambda x: x["id"], split_order=("country", "city")
+        )
+
+        self.assertEqual(total, len(jobs))
+        self.assertEqual({x["id"] for x in items}, {j["id"] for j in jobs})
+        self.assertEqual(stats["truncated"], 0)
+        self.assertEqual(sorted(tuple(p["facets"].items()) for p in stats["partitions"]), [
+            (("country", ["A"]), ("city", ["a1"])),
+            (("country", ["A"]), ("city", ["a2"])),
+            (("country", ["B"]),),
+        ])
+
+    def test_failed_leaf_falls_back_to_parent_capped_crawl(self):
+        cap = 100
+        jobs = [{"id": f"{c}-{i}", "country": c} for c in ("A", "B") for i in range(60)]
+
+        def probe(applied):
+            rows = [j for j in jobs if j["country"] in applied.get("country", "AB")]
+            return len(rows), rows[:10], {"country": [("A", 60), ("B", 60)]}
+
+        def crawl(applied, first):
+            if applied.get("country") == ["B"]:
+                raise ValueError("400 Bad Request: facet rejected")
+            rows = [j for j in jobs if j["country"] in applied.get("country", "AB")][:cap]
+            return len(rows), rows, {}
+
+        total, items, stats = crawl_facet_partitions(
+            probe, crawl, cap=cap, key_fn=lambda x: x["id"], split_order=("country",)
+        )
+        self.assertEqual(len(items), cap)  # A in full, plus what the capped root crawl reached
+        self.assertEqual(stats["failed_partitions"][0]["facets"], {"country": ["B"]})
+        self.assertIn("facet rejected", stats["failed_partitions"][0]["error"])
+        self.assertEqual(stats["truncated"], 1)
+        self.assertEqual(sorted(repr(p["facets"]) for p in stats["partitions"]), ["{'country': ['A']}", "{}"])
+
+    def test_postings_without_split_facet_come_from_parent_capped_crawl(self):
+        cap = 100
+        jobs = [{"id": f"none-{i}", "country": None} for i in range(30)]
+        jobs += [{"id": f"{c}-{i}", "country": c} for c, n in (("A", 60), ("B", 30)) for i in range(n)]
+
+        def select(applied):
+            return [j for j in jobs if j["country"] in applied.get("country", [j["country"]])]
+
+        def probe(applied):
+            rows = select(applied)
+            return len(rows), rows[:10], {"country": [("A", 60), ("B", 30)]}
+
+        def crawl(applied, first):
+            rows = select(applied)[:cap]
+            return len(select(applied)), rows, {}
+
+        total, items, stats = crawl_facet_partitions(
+            probe, crawl, cap=cap, key_fn=lambda x: x["id"], split_order=("country",)
+        )
+        self.assertEqual(total, len(jobs))
+        self.assertEqual({x["id"] for x in items}, {j["id"] for j in jobs})
+        self.assertEqual(stats["remainder_crawls"], 1)
+        self.assertEqual(stats["uncovered_estimate"], 0)
+        self.assertEqual(sorted(repr(p["facets"]) for p in stats["partitions"]), [
+            "{'country': ['A']}", "{'country': ['B']}", "{}",
+        ])
+
+    def test_flatten_workday_facets(self):
+        facets = [
+            {
+                "facetParameter": "locationMainGroup",
+                "values": [
+                    {"facetParameter": "locationCountry", "values": [{"id": "us", "count": 3}, {"id": "ca", "count": 1}]},
+                ],
+            },
+            {"facetParameter": "jobFamilyGroup", "values": [{"id": "eng", "count": 4, "descriptor": "Engineering"}]},
+        ]
+
+        self.assertEqual(
+            flatten_workday_facets(facets),
+            {"locationCountry": [("us", 3), ("ca", 1)], "jobFamilyGroup": [("eng", 4)]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
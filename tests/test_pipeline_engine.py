@@ -0,0 +1,144 @@
+import contextlib
+import io
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+from backend.py.normalizers.locations import LocationNormalizer
+from backend.py.pipeline import engine
+from backend.py.pipeline.common import stable_hash
+from backend.py.pipeline.engine import CollectorPlugin, RunContext, build_rows, load_plugin
+from backend.py.pipeline.config import PIPELINE_PLUGINS
+from tests.support import ExamplePlugin
+
+
+def _ctx() -> RunContext:
+    captured_at = datetime(2026, 10, 5, 12, 0, 0)
+    return RunContext(
+        company_id="c-1",
+        captured_at=captured_at,
+        snapshot_date=captured_at.date(),
+        snapshot_month=date(2026, 10, 1),
+    )
+
+
+class EngineTests(unittest.TestCase):
+    def test_normalize_and_rows(self):
+        plugin = ExamplePlugin()
+        ctx = _ctx()
+        raw = [
+            {"job_key": " 42 ", "title": "Engineer", "locations": ["Zurich, Switzerland", "", "London, United Kingdom"]},
+            {"job_key": "", "title": "No key", "locations": ["Paris, France"]},
+            {"job_key": "43", "title": "No locations", "locations": []},
+        ]
+        rows = build_rows(plugin, (plugin.normalize(p, ctx) for p in raw), ctx)
+
+        self.assertEqual([(r[1], r[7], r[8], r[10]) for r in rows], [
+            ("42", "Zurich, Switzerland", "Zurich", "CH"),
+            ("42", "London, United Kingdom", "London", "GB"),
+        ])
+        self.assertEqual(len(rows[0]), 18)
+        self.assertEqual(
+            rows[0][13],
+            stable_hash("c-1", "42", "2026-10-05", "Engineer", ["Zurich, Switzerland", "London, United Kingdom"]),
+        )
+
+    def test_keeps_most_confident_row_per_conflict_key(self):
+        plugin = ExamplePlugin()
+        ctx = _ctx()
+        # "Zurich, Nowhere" falls back to the posting country (CH) at lower confidence.
+        post = plugin.normalize({"job_key": "7", "locations": ["Zurich, Switzerland", "Zurich, Nowhere"]}, ctx)
+        rows = build_rows(plugin, [post], ctx)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][7], "Zurich, Switzerland")
+        self.assertEqual(rows[0][11], 0.9)
+
+    def test_learned_aliases_apply_only_to_the_company_that_learned_them(self):
+        def paris_fr(loc, detail_country):
+            return "Paris", None, "FR", 0.9
+
+        def paris_us(loc, detail_country):
+            return "Paris", "TX", "US", 0.9
+
+        manual = {"manual": {"HQ": ("Menlo Park", "CA", "US", 1.0)}}
+        with mock.patch.multiple(
+            engine,
+            _location_aliases=None,
+            fetch_location_aliases=lambda: manual,
+            insert_location_aliases=lambda aliases, source: list(aliases),
+        ):
+            plugin_a = ExamplePlugin()
+            plugin_a.key = "a"
+            aliases_a = engine._run_location_aliases("a")
+            norm_a = LocationNormalizer(aliases_a)
+            self.assertEqual(norm_a.resolve(paris_fr, "Paris", "UN").country_norm, "FR")
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine._report_locations(plugin_a, norm_a)
+            aliases_a["Lyon"] = ("Lyon", None, "FR", 1.0)  # a run's copy is its own
+
+            aliases_b = engine._run_location_aliases("b")
+            self.assertEqual(sorted(aliases_b), ["HQ"])
+            self.assertEqual(LocationNormalizer(aliases_b).resolve(paris_us, "Paris", "UN").country_norm, "US")
+            self.assertEqual(sorted(engine._run_location_aliases("a")), ["HQ", "Paris"])
+
+    def test_companies_learning_the_same_string_each_keep_their_alias(self):
+        def paris_fr(loc, detail_country):
+            return "Paris", None, "FR", 0.9
+
+        def paris_us(loc, detail_country):
+            return "Paris", "TX", "US", 0.9
+
+        def lyon_us(loc, detail_country):
+            return "Lyon", "TX", "US", 0.9
+
+        # location_aliases with its (source, raw_text) unique index; company a already
+        # stored "Lyon" in another process, so its conflicting insert is dropped.
+        table = {("pipeline:a", "Lyon"): ("Lyon", None, "FR", 0.9)}
+
+        def insert(aliases, source):
+            inserted = [raw for raw in aliases if (source, raw) not in table]
+            table.update({(source, raw): aliases[raw] for raw in inserted})
+            return inserted
+
+        def learn(key, parser, loc):
+            plugin = ExamplePlugin()
+            plugin.key = key
+            norm = LocationNormalizer(engine._run_location_aliases(key))
+            norm.resolve(parser, loc, "UN")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                engine._report_locations(plugin, norm)
+            return out.getvalue()
+
+        with mock.patch.multiple(
+            engine,
+            _location_aliases=None,
+            fetch_location_aliases=lambda: {},
+            insert_location_aliases=insert,
+        ):
+            self.assertIn("Location aliases learned: 1", learn("a", paris_fr, "Paris"))
+            self.assertIn("Location aliases learned: 1", learn("b", paris_us, "Paris"))
+            self.assertIn("Location aliases learned: 0", learn("a", lyon_us, "Lyon"))
+
+            self.assertEqual(table[("pipeline:a", "Paris")][2], "FR")
+            self.assertEqual(table[("pipeline:b", "Paris")][2], "US")
+            self.assertEqual(engine._run_location_aliases("a"), {"Paris": ("Paris", None, "FR", 0.9)})
+            self.assertEqual(engine._run_location_aliases("b"), {"Paris": ("Paris", "TX", "US", 0.9)})
+
+    def test_registry_loads_every_plugin(self):
+        for key in PIPELINE_PLUGINS:
+            plugin = load_plugin(key)
+            self.assertEqual(plugin.key, key)
+            self.assertTrue(plugin.company_name and plugin.session_name)
+        self.assertIsNone(load_plugin("unknown"))
+
+        class NoParser(CollectorPlugin):
+            def fetch(self, ctx):
+                return []
+
+        with self.assertRaises(TypeError):
+            NoParser()
+
+
+if __name__ == "__main__":
+    unittest.main()
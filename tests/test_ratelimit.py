@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.py.collectors import ratelimit
+from backend.py.collectors.ratelimit import AimdPolicy, HostLimiter, host_limiter, reset_host_limiters, save_host_limits
+
+
+class HostLimiterTests(unittest.TestCase):
+    def _round_trip(self, limiter, status=200, latency=0.1, retry_after=None):
+        limiter.acquire()
+        limiter.release(status, latency, retry_after)
+
+    def test_additive_increase_while_healthy(self):
+        limiter = HostLimiter("a", AimdPolicy(initial_rate=100.0, max_rate=200.0, jitter=0.0))
+        for _ in range(20):
+            self._round_trip(limiter)
+        self.assertGreater(limiter.rate, 100.0)
+        self.assertGreater(limiter.concurrency, 2.0)
+
+        # A response far slower than the running average holds the rate.
+        rate = limiter.rate
+        limiter.acquire()
+        limiter.release(200, 10.0)
+        self.assertEqual(limiter.rate, rate)
+
+    def test_multiplicative_decrease_once_per_round_trip(self):
+        limiter = HostLimiter("a", AimdPolicy(initial_rate=100.0, max_rate=200.0, initial_concurrency=8.0, jitter=0.0))
+        self._round_trip(limiter, status=429)
+        self._round_trip(limiter, status=429)
+        self.assertEqual((limiter.rate, limiter.concurrency), (50.0, 4.0))
+        self.assertEqual((limiter.counts["throttled"], limiter.counts["decreases"]), (2, 1))
+
+    def test_retry_after_pauses_host(self):
+        limiter = HostLimiter("a", AimdPolicy(initial_rate=100.0, jitter=0.0))
+        with mock.patch.object(ratelimit.time, "sleep") as sleep:
+            self._round_trip(limiter, status=200, retry_after="3")
+            limiter.acquire()
+        self.assertAlmostEqual(sleep.call_args[0][0], 3.0, places=1)
+        self.assertEqual(limiter.counts["decreases"], 1)
+
+    def test_try_acquire_never_waits(self):
+        limiter = HostLimiter("a", AimdPolicy(initial_rate=1000.0, max_rate=1000.0, initial_concurrency=1.0, jitter=0.0))
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())  # the only slot is taken
+        limiter.cancel()
+        self.assertEqual((limiter.in_flight, limiter.counts["requests"]), (0, 0))
+
+
+class PersistenceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "rate_limits.json"
+        self.env = mock.patch.dict(os.environ, {"COLLECTOR_RATE_LIMITS": str(self.path)})
+        self.env.start()
+        reset_host_limiters()
+
+    def tearDown(self):
+        reset_host_limiters()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_learned_limits_seed_the_next_run(self):
+        self.path.write_text(json.dumps({"other.example": {"rate": 1.0, "concurrency": 1.0}}))
+        limiter = host_limiter("https://Jobs.Example.com/api?page=2")
+        limiter.rate, limiter.concurrency = 7.5, 3.0
+        save_host_limits()
+
+        reset_host_limiters()
+        again = host_limiter("https://jobs.example.com/other")
+        self.assertEqual((again.rate, again.concurrency), (7.5, 3.0))
+        self.assertIn("other.example", json.loads(self.path.read_text()))
+
+    def test_replay_is_not_paced_and_not_saved(self):
+        live = host_limiter("https://jobs.example.com/api")
+        with mock.patch.dict(os.environ, {"COLLECTOR_HTTP_MODE": "replay"}):
+            self.assertIs(host_limiter("https://jobs.example.com/api"), ratelimit.UNPACED)
+            live.rate = 0.5
+            save_host_limits()
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
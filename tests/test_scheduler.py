@@ -0,0 +1,80 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from backend.py.pipeline.scheduler import (
+    CompanySchedule,
+    Scheduler,
+    SchedulerLockedError,
+    SchedulerState,
+    lockfile,
+)
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.state = SchedulerState(self.dir / "state.json")
+        self.ran: list[str] = []
+
+    def _run(self, schedule):
+        self.ran.append(schedule.company)
+        return {"company": schedule.company, "status": "fail" if schedule.company == "meta" else "ok"}
+
+    def _scheduler(self, schedules, stagger_sec=0.0):
+        return Scheduler(schedules, self.state, run=self._run, stagger_sec=stagger_sec)
+
+    def test_window_wraps_midnight(self):
+        s = CompanySchedule("apple", window_utc=(22, 4))
+        self.assertEqual(s.since_window_start(datetime(2026, 10, 19, 23, 0)), 3600)
+        self.assertEqual(s.since_window_start(datetime(2026, 10, 20, 3, 30)), 5.5 * 3600)
+        self.assertIsNone(s.since_window_start(datetime(2026, 10, 20, 4, 0)))
+        self.assertIsNotNone(CompanySchedule("apple").since_window_start(datetime(2026, 10, 19, 12, 0)))
+
+    def test_runs_each_company_on_its_own_cadence(self):
+        sched = self._scheduler([CompanySchedule("apple", every_hours=24), CompanySchedule("nokia", every_hours=168)])
+        t0 = datetime(2026, 10, 19, 3, 0)
+        while sched.run_due(t0):
+            pass
+        self.assertEqual(self.ran, ["apple", "nokia"])
+        self.assertIsNone(sched.run_due(t0 + timedelta(hours=12)))
+        self.assertEqual(sched.run_due(t0 + timedelta(hours=23, minutes=30))["company"], "apple")
+        self.assertIsNone(sched.run_due(t0 + timedelta(hours=24)))
+
+    def test_stagger_spaces_starts_and_offsets_window_opening(self):
+        schedules = [CompanySchedule(c, window_utc=(2, 8)) for c in ("amazon", "apple", "google")]
+        sched = self._scheduler(schedules, stagger_sec=300)
+        opening = datetime(2026, 10, 19, 2, 0)
+        offsets = [sched._offset(s) for s in schedules]
+        self.assertEqual(len(set(offsets)), 3)
+        self.assertTrue(all(0 <= o < 900 for o in offsets))
+        self.assertEqual(sched.due(opening), [s for s, o in zip(schedules, offsets) if o == 0])
+
+        t = opening + timedelta(seconds=900)
+        self.assertIsNotNone(sched.run_due(t))
+        self.assertIsNone(sched.run_due(t + timedelta(seconds=299)))
+        self.assertIsNotNone(sched.run_due(t + timedelta(seconds=300)))
+
+    def test_failed_runs_retry_soon_and_state_survives_restart(self):
+        t0 = datetime(2026, 10, 19, 3, 0)
+        self._scheduler([CompanySchedule("meta")]).run_due(t0)
+        restarted = Scheduler([CompanySchedule("meta")], SchedulerState(self.dir / "state.json"), run=self._run)
+        self.assertEqual(restarted.state.get("meta")["status"], "fail")
+        self.assertIsNone(restarted.run_due(t0 + timedelta(hours=1)))
+        self.assertIsNotNone(restarted.run_due(t0 + timedelta(hours=2)))
+
+    def test_lockfile_is_exclusive(self):
+        path = self.dir / "scheduler.lock"
+        with lockfile(path):
+            with self.assertRaises(SchedulerLockedError):
+                with lockfile(path):
+                    pass
+        with lockfile(path):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
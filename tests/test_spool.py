@@ -0,0 +1,158 @@
+import contextlib
+import io
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import psycopg2
+
+from backend.py.pipeline import engine, ingest_weekly
+from backend.py.pipeline.common import remember_company_id
+from backend.py.pipeline.engine import run_plugin
+from backend.py.storage import neon
+from backend.py.storage.spool import FactSpool, SpoolCorruptError, decode_segment, drain, encode_segment
+from tests.support import ExamplePlugin, isolate_env, stub_database
+
+
+def _row(job_key: str, city: str, conf: float) -> tuple:
+    return ("c-1", job_key, date(2026, 10, 1), date(2026, 10, 19), "t", None, None, city, city, None, "US", conf,
+            None, "h", datetime(2026, 10, 19, 3, 0), None, None, None)
+
+
+class _Plugin(ExamplePlugin):
+    postings = [{"job_key": str(i), "title": "Engineer", "locations": ["Zurich, Switzerland"]} for i in range(5)]
+
+
+class _Db:
+    """spool_loads + job_location_facts stand-in with the same exactly-once semantics."""
+
+    def __init__(self, fail: int = 0, error: Exception | None = None):
+        self.markers: set[str] = set()
+        self.rows: list[tuple] = []
+        self.fail = fail
+        self.error = error or psycopg2.OperationalError("server closed the connection")
+
+    def load(self, segment_id, rows):
+        if self.fail:
+            self.fail -= 1
+            raise self.error
+        if segment_id in self.markers:
+            return False
+        self.markers.add(segment_id)
+        self.rows.extend(rows)
+        return True
+
+
+class SpoolTests(unittest.TestCase):
+    def setUp(self):
+        isolate_env(self, COMPANYLOC_ARCHIVE="off")
+        self.spool = FactSpool()
+        self.part = self.spool.partition("example", date(2026, 10, 19))
+
+    def test_segment_round_trip_and_corruption(self):
+        rows = [_row("1", "Zürich", 0.9), _row("2", "Austin", 0.5)]
+        data = encode_segment(rows)
+        self.assertEqual(decode_segment(data)[0][:2], ("c-1", "1"))
+        self.assertEqual(decode_segment(data)[1][7], "Austin")
+        with self.assertRaises(SpoolCorruptError):
+            decode_segment(data[:-1] + bytes([data[-1] ^ 1]))
+
+    def test_segments_load_once_in_order(self):
+        self.part.write([_row("1", "A", 0.5)])
+        self.part.write([_row("1", "A", 0.9)])
+        db = _Db()
+        stats = drain(self.spool.partitions(), load=db.load)
+        self.assertEqual((stats["loaded"], stats["rows"], stats["pending"]), (2, 2, 0))
+        self.assertEqual([r[11] for r in db.rows], [0.5, 0.9])
+        self.assertFalse(self.part.path.exists())
+
+    def test_corrupt_segment_is_set_aside_and_drain_continues(self):
+        bad = self.part.write([_row("1", "A", 0.5)])
+        bad.write_bytes(bad.read_bytes()[:-3])  # truncated on disk
+        self.part.write([_row("2", "B", 0.5)])
+        db = _Db()
+        stats = drain(self.spool.partitions(), load=db.load)
+        self.assertEqual((stats["loaded"], stats["corrupt"], stats["pending"]), (1, 1, 0))
+        self.assertEqual([r[1] for r in db.rows], ["2"])
+        self.assertTrue(bad.with_suffix(".corrupt").exists())
+        self.assertEqual(list(self.spool.partitions()), [])
+
+    def test_crash_after_commit_does_not_load_twice(self):
+        path = self.part.write([_row("1", "A", 0.5)])
+        db = _Db()
+        db.load(self.part.segment_id(path), [])  # committed, but the rename never happened
+        stats = drain(self.spool.partitions(), load=db.load)
+        self.assertEqual((stats["loaded"], stats["duplicates"]), (0, 1))
+        self.assertEqual(db.rows, [])
+
+    def test_outage_keeps_segments_for_the_next_drain(self):
+        self.part.write([_row("1", "A", 0.5)])
+        self.part.write([_row("2", "B", 0.5)])
+        sleeps = []
+        db = _Db(fail=10)
+        stats = drain(self.spool.partitions(), load=db.load, attempts=3, backoff_sec=1.0, sleep=sleeps.append)
+        self.assertEqual((stats["loaded"], stats["pending"]), (0, 2))
+        self.assertIn("OperationalError", stats["error"])
+        self.assertEqual(sleeps, [1.0, 2.0])
+
+        db.fail = 1
+        stats = drain(self.spool.partitions(), load=db.load, sleep=lambda s: None)
+        self.assertEqual((stats["loaded"], stats["pending"]), (2, 0))
+
+    def test_non_transient_errors_are_not_retried(self):
+        self.part.write([_row("1", "A", 0.5)])
+        db = _Db(fail=1, error=psycopg2.errors.UndefinedTable("spool_loads"))
+        stats = drain(self.spool.partitions(), load=db.load, sleep=self.fail)
+        self.assertEqual(stats["pending"], 1)
+
+    def test_rejected_segment_is_set_aside_and_drain_continues(self):
+        bad = self.part.write([_row("1", "A", 0.5)])
+        self.part.write([_row("2", "B", 0.5)])
+        other = self.spool.partition("other", date(2026, 10, 19))
+        other.write([_row("3", "C", 0.5)])
+        db = _Db(fail=1, error=psycopg2.DataError("value too long for type character varying(2)"))
+        stats = drain(self.spool.partitions(), load=db.load, sleep=self.fail)
+        self.assertEqual((stats["loaded"], stats["failed"], stats["pending"]), (2, 1, 0))
+        self.assertIn("DataError", stats["error"])
+        self.assertEqual([r[1] for r in db.rows], ["2", "3"])
+        self.assertTrue(bad.with_suffix(".failed").exists())
+        self.assertEqual(list(self.spool.partitions()), [])
+
+    def test_run_survives_database_outage(self):
+        db = _Db(fail=100)
+        stub_database(self)
+        out = io.StringIO()
+        with mock.patch.object(engine, "drain", lambda parts: drain(parts, load=db.load, attempts=2, sleep=lambda s: None)), \
+                contextlib.redirect_stdout(out):
+            self.assertEqual(run_plugin(_Plugin()), 5)
+        self.assertIn("Spool load deferred: OperationalError", out.getvalue())
+        self.assertEqual(db.rows, [])
+
+        db.fail = 0
+        drain(self.spool.partitions(), load=db.load)
+        self.assertEqual(sorted(r[1] for r in db.rows), ["0", "1", "2", "3", "4"])
+
+    def test_run_one_spools_while_database_is_unreachable(self):
+        def connect(direct=False):
+            raise psycopg2.OperationalError("could not connect to server")
+
+        remember_company_id("Example", "c-1")  # resolved by an earlier, online run
+        with mock.patch.object(neon, "_connect", connect), \
+                mock.patch.object(engine, "_location_aliases", None), \
+                mock.patch.object(engine, "drain", lambda parts: drain(parts, sleep=lambda s: None)), \
+                mock.patch.object(ingest_weekly, "load_plugin", lambda key: _Plugin()), \
+                contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()) as err:
+            result = ingest_weekly._run_one("example")
+
+        # The crawl finishes into the spool, but the rows are not in the snapshot yet.
+        self.assertEqual((result["status"], result["metrics"]["fetched"]), ("fail", 5), out.getvalue())
+        self.assertIn("spool_not_loaded: pending=1", result["reason"])
+        self.assertIn("using a host lockfile", err.getvalue())
+        self.assertIn("Spool load deferred: OperationalError", out.getvalue())
+        pending = [seg for part in self.spool.partitions() for seg in part.pending()]
+        self.assertEqual(sorted(r[1] for seg in pending for r in decode_segment(seg.read_bytes())),
+                         ["0", "1", "2", "3", "4"])
+        self.assertEqual({r[0] for seg in pending for r in decode_segment(seg.read_bytes())}, {"c-1"})
+
+if __name__ == "__main__":
+    unittest.main()
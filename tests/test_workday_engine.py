@@ -0,0 +1,219 @@
+import contextlib
+import functools
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from backend.py.collectors import ratelimit
+from backend.py.collectors import workday as workday_registry
+from backend.py.collectors.http import reset_all_sessions
+from backend.py.collectors.ratelimit import AimdPolicy, HostLimiter, reset_host_limiters
+from backend.py.collectors.workday import WorkdayClient, WorkdayTenant, load_tenants
+from backend.py.normalizers.locations import parse_country_first, parse_workday_location
+from backend.py.pipeline import engine, ingest_weekly, ingest_workday
+from backend.py.pipeline.engine import load_plugin
+from backend.py.pipeline.ingest_weekly import _capture_output
+from backend.py.pipeline.ingest_workday import run_tenants
+from backend.py.storage.detail_cache import DetailCache
+from backend.py.storage.spool import drain
+
+POSTINGS = [
+    {"externalPath": "/job/Zurich/Engineer_1", "title": "Engineer", "locationsText": "Zurich, Switzerland"},
+    {"externalPath": "/job/Austin/Analyst_2", "title": "Analyst", "locationsText": "2 Locations"},
+    {"externalPath": "/job/Remote/Writer_3", "title": "Writer", "locationsText": "US, Remote"},
+]
+
+
+class _Workday(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    details = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not (self.path.startswith("/wday/cxs/") and self.path.endswith("/Careers/jobs")):
+            self._send(404, {})
+            return
+        page = POSTINGS[body["offset"]:body["offset"] + body["limit"]]
+        self._send(200, {"total": len(POSTINGS), "jobPostings": page, "facets": []})
+
+    def do_GET(self):
+        _Workday.details += 1
+        info = {"location": "Austin, TX, US", "additionalLocations": ["Toronto, ON, CA"],
+                "country": {"descriptor": "United States", "value": "US"}}
+        self._send(200, {"jobPostingInfo": info})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class RegistryTests(unittest.TestCase):
+    def test_bundled_tenants_load_as_plugins(self):
+        for key, parser in (("nvidia", parse_workday_location), ("intel", parse_country_first)):
+            plugin = load_plugin(key)
+            self.assertEqual((plugin.key, plugin.session_name), (key, key))
+            loc = "USA, California, Santa Clara"
+            self.assertEqual(plugin.parse_location(loc, None), parser(loc, None))
+        # Existing detail-cache entries stay valid.
+        self.assertEqual(load_plugin("nvidia").tenant.detail_cache_namespace, "workday:nvidia/NVIDIAExternalCareerSite")
+
+    def test_defaults_and_duplicate_keys(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tenants.json"
+            entry = {"key": "acme", "company_name": "Acme", "base": "https://acme.wd1.myworkdayjobs.com",
+                     "tenant": "acme", "site": "Careers", "extra_search_texts": ["intern"]}
+            path.write_text(json.dumps([entry]), encoding="utf-8")
+            tenant = load_tenants(path)["acme"]
+            self.assertEqual(tenant.session_name, "acme")
+            self.assertEqual(tenant.extra_search_texts, ("intern",))
+            self.assertEqual(tenant.headers["Referer"], "https://acme.wd1.myworkdayjobs.com/Careers/")
+
+            path.write_text(json.dumps([entry, entry]), encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_tenants(path)
+
+
+class _ServerCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = {"COMPANYLOC_CACHE_DIR": self.tmp.name, "COLLECTOR_HTTP_CACHE": "off", "COMPANYLOC_ARCHIVE": "off"}
+        self.env = mock.patch.dict(os.environ, env)
+        self.env.start()
+        _Workday.details = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Workday)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        fast = AimdPolicy(initial_rate=1000.0, max_rate=1000.0, initial_concurrency=8.0, jitter=0.0)
+        ratelimit._limiters["127.0.0.1"] = HostLimiter("127.0.0.1", fast)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        reset_all_sessions()
+        reset_host_limiters()
+        self.server.shutdown()
+        self.server.server_close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+
+class ClientTests(_ServerCase):
+    def setUp(self):
+        super().setUp()
+        self.client = WorkdayClient(
+            WorkdayTenant("acme", "Acme", base=self.base, tenant="acme", site="Careers", session_name="workday-test")
+        )
+
+    def test_crawls_listing_and_caches_multi_location_details(self):
+        stats = {}
+        total, postings = self.client.fetch_all_jobs(limit=2, stats=stats)
+        self.assertEqual(total, 3)
+        self.assertEqual(sorted(p["externalPath"] for p in postings), sorted(p["externalPath"] for p in POSTINGS))
+        self.assertEqual(stats["searches"][0]["search_text"], "")
+
+        cache = DetailCache(Path(self.tmp.name) / "detail.sqlite3")
+        try:
+            for _ in range(2):
+                locs, country = self.client.get_effective_locations_for_job(POSTINGS[1], cache=cache)
+                self.assertEqual((locs, country), (["Austin, TX, US", "Toronto, ON, CA"], "US"))
+            self.assertEqual(self.client.get_effective_locations_for_job(POSTINGS[0]), (["Zurich, Switzerland"], None))
+        finally:
+            cache.close()
+        self.assertEqual(_Workday.details, 1)
+
+
+class ConcurrentRunTests(unittest.TestCase):
+    def test_tenants_run_concurrently_with_output_captured_per_thread(self):
+        barrier = threading.Barrier(3, timeout=5)
+        captured = {}
+
+        def run(company_key, **kwargs):
+            out = io.StringIO()
+            with _capture_output(out, io.StringIO()):
+                barrier.wait()  # all three tenants are in flight at once
+                for _ in range(50):
+                    print(f"Fetched postings: {company_key}")
+            captured[company_key] = out.getvalue()
+            self.assertFalse(kwargs["refresh_views"])
+            return {"company": company_key, "status": "ok", "captured_at": kwargs["captured_at"]}
+
+        with contextlib.redirect_stdout(io.StringIO()) as outer:
+            with mock.patch.object(ingest_workday, "refresh_mv_country_month_counts") as refresh:
+                results = run_tenants(["a", "b", "c"], concurrency=3, run=run)
+            print("after")
+        refresh.assert_called_once_with()
+        self.assertEqual([r["company"] for r in results], ["a", "b", "c"])
+        self.assertEqual(len({r["captured_at"] for r in results}), 1)
+        for key, text in captured.items():
+            self.assertEqual(text, f"Fetched postings: {key}\n" * 50)
+        self.assertEqual(outer.getvalue(), "Refreshed trend MVs (count + avg variants if present)\nafter\n")
+
+
+class ConcurrentIngestTests(_ServerCase):
+    """Two registry tenants through the real _run_one -> run_plugin, with the spool on."""
+
+    def setUp(self):
+        super().setUp()
+        registry = Path(self.tmp.name) / "tenants.json"
+        entries = [
+            {"key": key, "company_name": key.title(), "base": self.base, "tenant": key, "site": "Careers"}
+            for key in ("acme", "globex")
+        ]
+        registry.write_text(json.dumps(entries), encoding="utf-8")
+        self.loaded: dict[str, list[tuple]] = {}
+        self.refreshes = 0
+
+        def load(segment_id, rows):
+            self.loaded.setdefault(segment_id.split("/")[0], []).extend(rows)
+            return True
+
+        def refresh():
+            self.refreshes += 1
+
+        @contextlib.contextmanager
+        def lock(name):
+            yield True
+
+        patches = [
+            mock.patch.dict(os.environ, {"COMPANYLOC_WORKDAY_TENANTS": str(registry), "COMPANYLOC_SPOOL": "on"}),
+            mock.patch.object(workday_registry, "_tenants", None),
+            mock.patch.object(workday_registry, "_clients", {}),
+            mock.patch("backend.py.pipeline.workday.ensure_company_id", lambda name, url, source_type: f"id-{name}"),
+            mock.patch.object(engine, "_location_aliases", {}),
+            mock.patch.object(engine, "insert_location_aliases", lambda aliases, source: list(aliases)),
+            mock.patch.object(engine, "refresh_mv_country_month_counts", refresh),
+            mock.patch.object(engine, "drain", functools.partial(drain, load=load)),
+            mock.patch.object(ingest_weekly, "advisory_or_host_lock", lock),
+            mock.patch.object(ingest_workday, "refresh_mv_country_month_counts", refresh),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_tenants_ingest_concurrently_and_refresh_views_once(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()):
+            results = run_tenants(["acme", "globex"], concurrency=2)
+        self.assertEqual([(r["company"], r["status"]) for r in results], [("acme", "ok"), ("globex", "ok")])
+        for r in results:
+            self.assertEqual(r["metrics"]["fetched"], 3)
+        self.assertEqual(self.refreshes, 1)
+        self.assertEqual(out.getvalue().count("Refreshed trend MVs"), 1)
+        self.assertEqual(sorted(self.loaded), ["acme", "globex"])
+        for key, rows in self.loaded.items():
+            self.assertEqual({row[0] for row in rows}, {f"id-{key.title()}"})
+        self.assertTrue((Path(self.tmp.name) / "rate_limits.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()